@@ -1,2 +1,45 @@
-from .crimial_ip import CriminalIP
-from .crimial_ip import User
+import importlib
+
+# The names are imported on first access, so that `import criminalip`
+# doesn't load the HTTP transports, asyncio or sqlite3
+_EXPORTS = {
+    "CriminalIP": ".crimial_ip",
+    "AsyncCriminalIP": ".crimial_ip",
+    "MultiKeyCriminalIP": ".crimial_ip",
+    "User": ".crimial_ip",
+    "BulkResult": ".bulk",
+    "MemoryCache": ".cache",
+    "SQLiteCache": ".cache",
+    "RateLimiter": ".ratelimit",
+    "TokenBucket": ".ratelimit",
+    "RetryBudget": ".retry",
+    "RetryPolicy": ".retry",
+    "DomainScanner": ".scan",
+    "ScanResult": ".scan",
+    "IPReport": ".models",
+    "IPSummary": ".models",
+    "IPMaliciousInfo": ".models",
+    "BannerSearch": ".models",
+    "ExploitSearch": ".models",
+    "APIKeyPool": ".keys",
+    "Snapshot": ".snapshot",
+    "Scheduler": ".scheduler",
+    "PriorityClass": ".scheduler",
+    "priority": ".scheduler",
+    "Watchlist": ".watchlist",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_EXPORTS])
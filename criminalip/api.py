@@ -1,24 +1,123 @@
+import functools
+import inspect
+import ipaddress
 import logging
-import json
-import requests
+import re
+import threading
+import time
 import typing
 import urllib.parse
 
+from .cache import MISS, make_key
+from .codec import JSONCodec, get_codec
 from .exceptions import ApiClientException, APIClientModelException
+from .exceptions import CIPException, CIPLimitExcceed, CIPRequestError
+from .hooks import HOOK_EVENTS, RequestEvent
+from .ratelimit import RateLimiter, parse_retry_after
+from .retry import RetryPolicy
+from .singleflight import SingleFlight
+from .transport import TransportStats, require_http2
+
+if typing.TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+PATH_ARGUMENT = re.compile(r"<(\w+)>")
 
 
 class ApiClient:
+    """Base client holding the connection settings and the pooled session
+
+    The session is created on first use and shared by every `RequestRoute`
+    of the client, so connections are kept alive between calls. Call
+    `close()` or use the client as a context manager to release them.
+
+    :param pool_connections: Number of host pools to cache.
+    :param pool_maxsize: Maximum number of connections kept per host.
+    :param pool_block: Block when the pool is full instead of opening
+        a throwaway connection.
+    :param max_retries: Retries of the transport adapter, int or
+        `urllib3.util.Retry`.
+    :param keep_alive: Reuse the connections between requests.
+    :param cache: Response cache, e.g. `MemoryCache` or `SQLiteCache`.
+    :param rate_limiter: `RateLimiter` shared by the threads and tasks
+        using the client.
+    :param retry: `RetryPolicy` for the transient failures.
+    :param json_codec: JSON codec name (auto, orjson, msgspec or json) or
+        a `JSONCodec`, auto uses the fastest installed one.
+    :param raw_response: Return the undecoded bytes of every route.
+    :param coalesce: Share one in-flight request among the concurrent
+        identical GET calls, from threads or asyncio tasks.
+    :param key_pool: `APIKeyPool` spreading the requests over API keys.
+    :param snapshot: `Snapshot` answering the IP routes while fresh,
+        the API results of these routes are stored into it.
+    :param scheduler: `Scheduler` admitting the requests by priority class,
+        e.g. interactive calls ahead of the bulk lookups.
+    :param compression: Accept the compressed responses the transport can
+        decode, e.g. br and zstd with their decoders installed, or ask for
+        identity if False.
+    :param http2: Send the requests through httpx with HTTP/2, which
+        multiplexes the concurrent requests over a few connections
+        (`pip install pycriminalip[http2]`).
+    :param transport_stats: Count the bytes on the wire, the encodings
+        and the connections, see `get_transport_stats`.
+    """
+
+    is_async = False
+
     def __init__(
         self,
         base_url: str,
         headers: typing.Optional[dict[str, typing.Any]] = None,
         proxies: typing.Any = None,
         verify: typing.Any = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        max_retries: typing.Any = 0,
+        keep_alive: bool = True,
+        cache: typing.Any = None,
+        rate_limiter: typing.Optional[RateLimiter] = None,
+        retry: typing.Optional[RetryPolicy] = None,
+        json_codec: typing.Union[str, JSONCodec, None] = "auto",
+        raw_response: bool = False,
+        coalesce: bool = False,
+        key_pool: typing.Any = None,
+        snapshot: typing.Any = None,
+        scheduler: typing.Any = None,
+        compression: bool = True,
+        http2: bool = False,
+        transport_stats: bool = False,
     ):
+        if http2:
+            require_http2()
         self.base_url = base_url
         self.headers = dict()
         self.proxies = proxies
         self.verify = verify
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.max_retries = max_retries
+        self.keep_alive = keep_alive
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.json_codec = get_codec(json_codec)
+        self.raw_response = raw_response
+        self.singleflight = SingleFlight() if coalesce else None
+        self.key_pool = key_pool
+        self.snapshot = snapshot
+        self.scheduler = scheduler
+        self.http2 = http2
+        self.transport_stats = TransportStats() if transport_stats else None
+        self.hooks: dict[str, list[typing.Callable]] = {
+            event: [] for event in HOOK_EVENTS
+        }
+        self.has_hooks = False
+        self._session = None
+        self._session_lock = threading.Lock()
 
         if headers and isinstance(headers, dict):
             self.headers.update(headers)
@@ -27,6 +126,204 @@ class ApiClient:
             self.headers["Content-Type"] = "application/json"
         if "accept" not in [header.lower() for header in self.headers.keys()]:
             self.headers["Accept"] = "application/json"
+        # The sessions of requests and httpx accept the encodings they decode
+        if not compression and "accept-encoding" not in [
+            header.lower() for header in self.headers.keys()
+        ]:
+            self.headers["Accept-Encoding"] = "identity"
+
+    @property
+    def session(self) -> "requests.Session":
+        """Pooled session shared by all the requests of the client"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self.create_session()
+        return self._session
+
+    def create_session(self) -> "requests.Session":
+        if self.http2:
+            import httpx
+
+            return httpx.Client(transport=httpx.HTTPTransport(**self.httpx_options()))
+
+        # Imported on the first request, not with the package
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.max_retries,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def httpx_options(self) -> dict[str, typing.Any]:
+        """Options of the httpx transports from the connection settings"""
+        import httpx
+
+        proxy = self.proxies
+        if isinstance(proxy, dict):
+            proxy = proxy.get("https") or proxy.get("http")
+        limits = httpx.Limits(
+            max_connections=self.pool_connections * self.pool_maxsize,
+            max_keepalive_connections=self.pool_maxsize if self.keep_alive else 0,
+        )
+        return {
+            "verify": True if self.verify is None else self.verify,
+            "proxy": proxy,
+            "limits": limits,
+            "retries": self.max_retries if isinstance(self.max_retries, int) else 0,
+            "http2": self.http2,
+        }
+
+    def get_extensions(self, event: typing.Optional[RequestEvent] = None):
+        """httpx extensions of a request, the traces of the transport stats
+        and of the hooks, used by the HTTP/2 session
+        """
+        stats = self.transport_stats
+        if event is None:
+            return None if stats is None else {"trace": stats.trace}
+        if stats is None:
+            return {"trace": event.trace_sync}
+
+        def trace(name: str, info: dict):
+            stats.trace(name, info)
+            event.trace_sync(name, info)
+
+        return {"trace": trace}
+
+    def get_transport_stats(self) -> dict[str, typing.Any]:
+        """Bytes on the wire and decoded, content encodings and number of
+        connections opened, see `TransportStats`
+        """
+        if self.transport_stats is None:
+            raise ApiClientException(
+                "Create the client with transport_stats=True to count the transport"
+            )
+        connections = 0
+        adapters = getattr(self._session, "adapters", None) or {}
+        for adapter in set(adapters.values()):
+            # urllib3 counts the connections opened per host pool
+            pools = adapter.poolmanager.pools
+            connections += sum(pools[key].num_connections for key in pools.keys())
+        return self.transport_stats.as_dict(connections)
+
+    def add_hook(self, event: str, hook: typing.Callable[[RequestEvent], None]):
+        """Call `hook` with a `RequestEvent` on before_request, after_response
+        or on_error. Cache hits only fire after_response with `cached` set.
+        """
+        if event not in self.hooks:
+            raise ApiClientException(f"Not supported hook event, {event}")
+        self.hooks[event].append(hook)
+        self.has_hooks = True
+
+    def remove_hook(self, event: str, hook: typing.Callable[[RequestEvent], None]):
+        self.hooks[event].remove(hook)
+        self.has_hooks = any(self.hooks.values())
+
+    def emit(self, event: str, request_event: RequestEvent):
+        for hook in self.hooks[event]:
+            try:
+                hook(request_event)
+            except Exception:
+                logger.exception("Hook %r failed on %s", hook, event)
+
+    def stream(
+        self,
+        name: str,
+        *args,
+        prefix: typing.Optional[str] = None,
+        chunk_size: int = 65536,
+        **kwargs,
+    ):
+        """Yield the items of an array of the route result as the body is read
+
+        The memory per request is bounded by the largest item instead of the
+        whole response. The cache, the retries and the models are bypassed.
+        AsyncApiClient returns an async iterator.
+
+        :param name: Route name, e.g. "banner_search".
+        :param prefix: Dotted path of the array, e.g. "port.data" for the
+            ports of ip_report. Defaults to the `items` of the route.
+        :param chunk_size: Size of the chunks read from the connection.
+        """
+        route = getattr(getattr(type(self), name, None), "route", None)
+        if route is None:
+            raise ApiClientException(f"Unknown route, {name}")
+        prefix = route.items if prefix is None else prefix
+        if prefix is None:
+            raise ApiClientException(f"{name} requires the prefix of the items")
+        return route.stream(self, prefix, chunk_size, *args, **kwargs)
+
+    def close(self):
+        """Close the pooled connections"""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncApiClient(ApiClient):
+    """ApiClient whose routes return coroutines
+
+    The requests are sent through a pooled `httpx.AsyncClient`, which is
+    an optional dependency (`pip install pycriminalip[async]`).
+    Call `aclose()` or use the client as an async context manager.
+    """
+
+    is_async = True
+
+    def create_session(self):
+        try:
+            import httpx
+        except ImportError:
+            raise ApiClientException(
+                "httpx is required for the asyncio client, "
+                "install it with `pip install pycriminalip[async]`"
+            )
+        transport = httpx.AsyncHTTPTransport(**self.httpx_options())
+        return httpx.AsyncClient(transport=transport)
+
+    def get_extensions(self, event: typing.Optional[RequestEvent] = None):
+        """httpx extensions of a request, the async traces of the transport
+        stats and of the hooks
+        """
+        if self.transport_stats is not None:
+            return {"trace": self.transport_stats.get_atrace(event)}
+        if event is not None:
+            return {"trace": event.trace}
+        return None
+
+    def close(self):
+        raise ApiClientException("Use `await client.aclose()` to close AsyncApiClient")
+
+    async def aclose(self):
+        """Close the pooled connections"""
+        session, self._session = self._session, None
+        if session is not None:
+            await session.aclose()
+
+    def __enter__(self):
+        raise ApiClientException("Use `async with` for AsyncApiClient")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
 
 class Response:
@@ -40,14 +337,36 @@ class Response:
     def __call__(self, func):
         def wraps(*args, **kwargs):
             data = func(*args, **kwargs)
-            m = self.model.map_model(data)
-            return m
+            if inspect.isawaitable(data):
+                return self.amap(data)
+            return self.map_model(data)
 
-        return wraps
+        return functools.wraps(func)(wraps)
+
+    def map_model(self, data):
+        # Raw bytes are passed through untouched
+        if isinstance(data, bytes):
+            return data
+        return self.model.map_model(data)
+
+    async def amap(self, data):
+        return self.map_model(await data)
 
 
 class RequestRoute:
-    """RequestRoute"""
+    """RequestRoute
+
+    :param cache: Cache the results in the client cache, GET routes are
+        cached by default.
+    :param group: Rate limit group, derived from the path if not given
+        (ip, banner, domain, exploit or default).
+    :param retry: Allow the client retry policy to retry the route, by
+        default only the idempotent methods are retried.
+    :param snapshot: Answer from the client snapshot, keyed by the `ip`
+        parameter, before the cache and the API.
+    :param items: Dotted path of the array of items in the result, the
+        default prefix of `ApiClient.stream`.
+    """
 
     def __init__(
         self,
@@ -55,10 +374,21 @@ class RequestRoute:
         path: str,
         headers: typing.Optional[dict[str, typing.Any]] = None,
         raw_response: bool = False,
+        cache: typing.Optional[bool] = None,
+        group: typing.Optional[str] = None,
+        retry: typing.Optional[bool] = None,
+        snapshot: bool = False,
+        items: typing.Optional[str] = None,
     ):
         self.method = method.upper()
         self.path = path
         self.raw_response = raw_response
+        self.cacheable = self.method == "GET" if cache is None else cache
+        self.retryable = retry
+        self.snapshot = snapshot
+        self.items = items
+        self.name = None
+        self.func = None
         self.additional_headers = dict()
         if headers and isinstance(headers, dict):
             self.additional_headers.update(headers)
@@ -69,78 +399,477 @@ class RequestRoute:
 
         if self.path.startswith("/"):
             self.path = self.path[1:]
+        self.group = group or RateLimiter.get_group(self.path)
 
     def __call__(self, func):
+        self.name = func.__name__
+        self.func = func
+        self.compile(func)
+
+        @functools.wraps(func)
         def wraps(*args, **kwargs):
             return self.call(func, *args, **kwargs)
 
+        wraps.route = self
         return wraps
 
-    def get_path(self, func, *args, **kwargs):
-        path = self.path
-        idx = 0
-        for keyword in self.path.split("/"):
-            print(f"{self.path=}, {keyword=}, {idx=}")
-            if len(keyword) > 2 and keyword[0] == "<" and keyword[-1] == ">":
-                try:
-                    path = path.replace(keyword, args[idx])
-                except Exception:
-                    raise Exception(
-                        f"{func.__name__} doesn't have argument for {keyword}"
-                    )
-                idx += 1
-        return path
+    def compile(self, func):
+        """Compile the path template into a format string and the position
+        of its arguments in the signature of `func`
+        """
+        parameters = list(inspect.signature(func).parameters.values())
+        names = [parameter.name for parameter in parameters]
+        self.path_args = []
+        for name in PATH_ARGUMENT.findall(self.path):
+            if name not in names:
+                raise ApiClientException(
+                    f"{func.__name__} doesn't have argument for <{name}>"
+                )
+            parameter = parameters[names.index(name)]
+            self.path_args.append((name, names.index(name), parameter.default))
+        self.template = PATH_ARGUMENT.sub(r"{\1}", self.path)
 
-    def call(self, func, *args, **kwargs):
+    def get_path(self, func, *args, **kwargs):
+        if not self.path_args:
+            return self.path
+        values = {}
+        for name, index, default in self.path_args:
+            if name in kwargs:
+                value = kwargs[name]
+            elif index < len(args):
+                value = args[index]
+            elif default is not inspect.Parameter.empty:
+                value = default
+            else:
+                raise ApiClientException(
+                    f"{func.__name__} doesn't have argument for <{name}>"
+                )
+            values[name] = urllib.parse.quote(str(value), safe="")
+        return self.template.format_map(values)
+
+    def prepare(self, func, *args, **kwargs):
+        """Return the path, endpoint, headers, params, data and files of the
+        request of `func`
+        """
         client: ApiClient = args[0]
         params, data, files = func(*args, **kwargs)
 
         path = self.get_path(func, *args, **kwargs)
-        if not isinstance(data, str) and data is not None:
-            data = json.dumps(data)
+        if not isinstance(data, (str, bytes)) and data is not None:
+            data = client.json_codec.dumps(data)
+        if files:
+            from .multipart import MultipartEncoder
+
+            if not isinstance(files, MultipartEncoder):
+                # Encoded once, the retries rewind the same files
+                files = MultipartEncoder(files)
 
         endpoint: str = urllib.parse.urljoin(client.base_url, path)
-        logging.debug(f"url: {endpoint}")
+        logger.debug("url: %s", endpoint)
 
-        # Set headers
+        # Set headers, the client headers are shared by the threads
         headers = client.headers
         if self.additional_headers:
-            headers.update(self.additional_headers)
-        res: requests.Response = self.request(
-            self.method,
-            endpoint,
-            headers,
-            params,
-            data,
-            files,
-            proxies=client.proxies,
-            verify=client.verify,
+            headers = {**headers, **self.additional_headers}
+        return path, endpoint, headers, params, data, files
+
+    def call(self, func, *args, **kwargs):
+        client: ApiClient = args[0]
+        path, endpoint, headers, params, data, files = self.prepare(
+            func, *args, **kwargs
+        )
+
+        raw = self.raw_response or client.raw_response
+        cache_key = None
+        if client.cache is not None and self.cacheable:
+            cache_key = make_key(self.method, path, params, raw)
+        flight_key = None
+        if client.singleflight is not None and self.method == "GET":
+            flight_key = cache_key or make_key(self.method, path, params, raw)
+
+        request = (client, endpoint, headers, params, data, files, cache_key)
+        if client.is_async:
+            return self.acall(flight_key, *request)
+
+        results = self.get_cached(client, endpoint, cache_key, params)
+        if results is not MISS:
+            return results
+        if flight_key is not None:
+            # Concurrent identical calls share the in-flight one
+            return client.singleflight.do(flight_key, self.fetch, *request)
+        return self.fetch(*request)
+
+    async def acall(self, flight_key, *request):
+        client, endpoint, params, cache_key = (
+            request[0],
+            request[1],
+            request[3],
+            request[-1],
+        )
+        results = self.get_cached(client, endpoint, cache_key, params)
+        if results is not MISS:
+            return results
+        if flight_key is not None:
+            return await client.singleflight.ado(flight_key, self.afetch, *request)
+        return await self.afetch(*request)
+
+    def get_cached(self, client, endpoint, cache_key, params=None):
+        results = MISS
+        snapshot_key = self.get_snapshot_key(client, params)
+        if snapshot_key is not None:
+            results = client.snapshot.get(*snapshot_key)
+        if results is MISS and cache_key is not None:
+            results = client.cache.get(cache_key)
+        if results is not MISS and client.has_hooks:
+            self.emit_cached(client, endpoint)
+        return results
+
+    def fetch(self, client, endpoint, headers, params, data, files, cache_key=None):
+        """Send the request with the retries and cache the results"""
+        attempt = 0
+        scheduler = client.scheduler
+        while True:
+            # The slot is held per attempt, not during the backoff
+            ticket = scheduler.acquire() if scheduler is not None else None
+            try:
+                send = self.send if client.key_pool is None else self.send_with_key
+                results = send(client, endpoint, headers, params, data, files, attempt)
+                break
+            except Exception as e:
+                delay = None
+                if client.retry is not None:
+                    delay = client.retry.get_delay(self, attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                if ticket is not None:
+                    scheduler.release(ticket)
+            attempt += 1
+            time.sleep(delay)
+
+        if cache_key is not None:
+            client.cache.set(cache_key, results, client.cache.get_ttl(self.name))
+        snapshot_key = self.get_snapshot_key(client, params)
+        if snapshot_key is not None:
+            client.snapshot.put(*snapshot_key, results)
+        return results
+
+    async def afetch(
+        self, client, endpoint, headers, params, data, files, cache_key=None
+    ):
+        import asyncio
+
+        attempt = 0
+        scheduler = client.scheduler
+        while True:
+            ticket = None
+            if scheduler is not None:
+                ticket = await scheduler.acquire_async()
+            try:
+                send = self.asend if client.key_pool is None else self.asend_with_key
+                results = await send(
+                    client, endpoint, headers, params, data, files, attempt
+                )
+                break
+            except Exception as e:
+                delay = None
+                if client.retry is not None:
+                    delay = client.retry.get_delay(self, attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                if ticket is not None:
+                    scheduler.release(ticket)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+        if cache_key is not None:
+            client.cache.set(cache_key, results, client.cache.get_ttl(self.name))
+        snapshot_key = self.get_snapshot_key(client, params)
+        if snapshot_key is not None:
+            client.snapshot.put(*snapshot_key, results)
+        return results
+
+    def get_snapshot_key(self, client, params):
+        """Route and IP of the snapshot entry, the other parameters that
+        are set are part of the route, e.g. "ip_report:full=True"
+        """
+        if client.snapshot is None or not self.snapshot:
+            return None
+        if self.raw_response or client.raw_response:
+            return None
+        if not isinstance(params, dict) or not params.get("ip"):
+            return None
+        try:
+            ipaddress.ip_address(params["ip"])
+        except ValueError:
+            # Left to the API, which answers with its error
+            return None
+        route = self.name + "".join(
+            f":{key}={value}"
+            for key, value in sorted(params.items())
+            if key != "ip" and value
         )
+        return route, params["ip"]
+
+    def emit_cached(self, client, endpoint):
+        event = RequestEvent(self, endpoint, cached=True)
+        event.finish()
+        client.emit("after_response", event)
+
+    def send_with_key(self, client, endpoint, headers, *request):
+        """Send with a key of the pool, switching keys on limit errors"""
+        pool = client.key_pool
+        while True:
+            key = pool.acquire()
+            try:
+                results = self.send(
+                    client, endpoint, {**headers, pool.header: key.api_key}, *request
+                )
+            except CIPLimitExcceed as e:
+                # The next acquire raises once no key is left
+                pool.release(key, e)
+                continue
+            except BaseException as e:
+                pool.release(key, e)
+                raise
+            pool.release(key)
+            return results
+
+    async def asend_with_key(self, client, endpoint, headers, *request):
+        pool = client.key_pool
+        while True:
+            key = pool.acquire()
+            try:
+                results = await self.asend(
+                    client, endpoint, {**headers, pool.header: key.api_key}, *request
+                )
+            except CIPLimitExcceed as e:
+                pool.release(key, e)
+                continue
+            except BaseException as e:
+                pool.release(key, e)
+                raise
+            pool.release(key)
+            return results
+
+    def send(self, client, endpoint, headers, params, data, files, attempt=0):
+        if client.rate_limiter is not None:
+            client.rate_limiter.acquire(self.group)
+        event = None
+        if client.has_hooks:
+            event = RequestEvent(self, endpoint, attempt)
+            client.emit("before_request", event)
+        try:
+            res = self.request(
+                self.method,
+                endpoint,
+                headers,
+                params,
+                data,
+                files,
+                proxies=client.proxies,
+                verify=client.verify,
+                session=client.session,
+                extensions=client.get_extensions(event),
+            )
+            if event is not None:
+                # Unless traced by httpx
+                event.timings.setdefault("ttfb", res.elapsed.total_seconds())
+            results = self.process_response(client, res, endpoint, event)
+        except Exception as e:
+            if event is not None:
+                event.finish(e)
+                client.emit("on_error", event)
+            raise
+        if event is not None:
+            event.finish()
+            client.emit("after_response", event)
+        return results
 
-        if res.status_code == 401 and self.reauth:
-            logging.error("Error Code 401 - API Key likely incorrect")
-        if not res.ok:
-            raise Exception(
+    async def asend(self, client, endpoint, headers, params, data, files, attempt=0):
+        if client.rate_limiter is not None:
+            await client.rate_limiter.acquire_async(self.group)
+        event = None
+        if client.has_hooks:
+            event = RequestEvent(self, endpoint, attempt)
+            client.emit("before_request", event)
+        try:
+            res = await self.arequest(
+                self.method,
+                endpoint,
+                headers,
+                params,
+                data,
+                files,
+                session=client.session,
+                extensions=client.get_extensions(event),
+            )
+            results = self.process_response(client, res, endpoint, event)
+        except Exception as e:
+            if event is not None:
+                event.finish(e)
+                client.emit("on_error", event)
+            raise
+        if event is not None:
+            event.finish()
+            client.emit("after_response", event)
+        return results
+
+    def stream(self, client, prefix: str, chunk_size: int, *args, **kwargs):
+        """Send the request and yield the items of the `prefix` array"""
+        _, endpoint, headers, params, data, files = self.prepare(
+            self.func, client, *args, **kwargs
+        )
+        request = (client, endpoint, headers, params, data, files, prefix, chunk_size)
+        if client.is_async:
+            return self.aiter_stream(*request)
+        return self.iter_stream(*request)
+
+    def iter_stream(
+        self, client, endpoint, headers, params, data, files, prefix, chunk_size
+    ):
+        from .streaming import iter_items
+
+        if client.rate_limiter is not None:
+            client.rate_limiter.acquire(self.group)
+        pool, key = client.key_pool, None
+        if pool is not None:
+            key = pool.acquire()
+            headers = {**headers, pool.header: key.api_key}
+        error = None
+        try:
+            res = self.request(
+                self.method,
+                endpoint,
+                headers,
+                params,
+                data,
+                files,
+                proxies=client.proxies,
+                verify=client.verify,
+                session=client.session,
+                stream=True,
+                extensions=client.get_extensions(),
+            )
+            # requests, or httpx with HTTP/2
+            is_httpx = hasattr(res, "iter_bytes")
+            try:
+                if res.status_code != 200:
+                    if is_httpx:
+                        res.read()
+                    # Raises the errors, the other statuses have no items
+                    self.process_response(client, res, endpoint)
+                    return
+                if is_httpx:
+                    chunks = res.iter_bytes(chunk_size)
+                else:
+                    chunks = res.iter_content(chunk_size)
+                yield from iter_items(chunks, prefix, client.json_codec.loads)
+            finally:
+                res.close()
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if key is not None:
+                pool.release(key, error)
+
+    async def aiter_stream(
+        self, client, endpoint, headers, params, data, files, prefix, chunk_size
+    ):
+        from .streaming import aiter_items
+
+        if client.rate_limiter is not None:
+            await client.rate_limiter.acquire_async(self.group)
+        pool, key = client.key_pool, None
+        if pool is not None:
+            key = pool.acquire()
+            headers = {**headers, pool.header: key.api_key}
+        error = None
+        try:
+            res = await self.arequest(
+                self.method,
+                endpoint,
+                headers,
+                params,
+                data,
+                files,
+                session=client.session,
+                extensions=client.get_extensions(),
+                stream=True,
+            )
+            try:
+                if res.status_code != 200:
+                    await res.aread()
+                    self.process_response(client, res, endpoint)
+                    return
+                chunks = res.aiter_bytes(chunk_size)
+                async for item in aiter_items(chunks, prefix, client.json_codec.loads):
+                    yield item
+            finally:
+                await res.aclose()
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if key is not None:
+                pool.release(key, error)
+
+    def process_response(self, client, res, endpoint: str, event=None):
+        """Render the response of requests or httpx into the result"""
+        if event is not None:
+            event.status_code = res.status_code
+            event.response_bytes = len(res.content)
+        if res.status_code == 429:
+            self.limit_exceeded(
+                client, endpoint, parse_retry_after(res.headers.get("Retry-After"))
+            )
+        if res.status_code == 401:
+            logger.error("Error Code 401 - API Key likely incorrect")
+        if res.status_code >= 400:
+            raise CIPRequestError(
                 f"Failed to run command uri: {endpoint}, Method: {self.method},"
-                f"request status code: {res.status_code}, Body: {res.text}"
+                f"request status code: {res.status_code}, Body: {res.text}",
+                status_code=res.status_code,
             )
 
-        if not res.text:
-            logging.info(f"Succeed but no result: {res.status_code}, {res.text}")
+        content = res.content
+        if client.transport_stats is not None:
+            client.transport_stats.record(res, len(content))
+        if not content:
+            logger.info("Succeed but no result: %s", res.status_code)
             return {}
-        if self.raw_response:
-            return res.content
+        if self.raw_response or client.raw_response:
+            return content
         try:
-            results = res.json()
+            if event is None:
+                results = client.json_codec.loads(content)
+            else:
+                started = time.perf_counter()
+                results = client.json_codec.loads(content)
+                event.timings["decode"] = time.perf_counter() - started
         except Exception:
-            raise Exception(
+            raise CIPException(
                 f"Failed to render JSON response into Dictionary command "
                 f"uri: {endpoint}, Method: {self.method}, "
                 f"request status code: {res.status_code}, Body: {res.text}"
             )
-        logging.debug(f"API Call result: {res.status_code}")
+        if isinstance(results, dict) and results.get("status") == 429:
+            self.limit_exceeded(client, endpoint, None)
+        logger.debug("API Call result: %s", res.status_code)
         return results
 
+    def limit_exceeded(self, client, endpoint: str, retry_after):
+        if client.rate_limiter is not None and client.key_pool is None:
+            # Hold the whole group instead of letting every worker retry
+            client.rate_limiter.penalize(self.group, retry_after or 1.0)
+        raise CIPLimitExcceed(
+            f"API limit has been exceeded uri: {endpoint}, Method: {self.method}, "
+            f"Retry-After: {retry_after}",
+            retry_after=retry_after,
+        )
+
     def request(
         self,
         method: str,
@@ -151,7 +880,10 @@ class RequestRoute:
         files: typing.Any = None,
         proxies: typing.Any = None,
         verify: typing.Any = None,
-    ) -> requests.Request:
+        session: typing.Optional["requests.Session"] = None,
+        stream: bool = False,
+        extensions: typing.Optional[dict[str, typing.Any]] = None,
+    ) -> "requests.Response":
         """Wrap the requests
 
         :param method: method for the new Request object: GET, POST, PUT, PATCH, or DELETE.
@@ -169,7 +901,8 @@ class RequestRoute:
         :param data: Dictionary to send in the body of the Request
         :type data: Dict[str, Any]
 
-        :param files: Dictionary of 'name', file-like-objects for multipart encoding upload.
+        :param files: Dictionary of 'name', file-like-objects for multipart encoding upload,
+            streamed by `MultipartEncoder`.
         :type files: Dict[str, Any]
 
         :param proxies:
@@ -178,29 +911,112 @@ class RequestRoute:
         :param verify:
         :type verify: bool | None | str
 
+        :param session: Pooled session of the client, a new one is used if not given
+        :type session: requests.Session
+
+        :param stream: Return once the headers are read, the body is read
+            with `iter_content`
+        :type stream: bool
+
+        :param extensions: httpx request extensions, used with HTTP/2
+        :type extensions: Dict[str, Any]
+
         :return: Response Object
         :rtype: requests.Response
         """
-        if files:
+        if session is None:
+            import requests
+
             session = requests.Session()
-            file_request = requests.Request(
-                method, endpoint, headers=headers, files=files
-            )
-            prepped = file_request.prepare()
-            boundary_value = prepped.body.split(b"\r\n")[0].decode()[2:]
-            prepped.headers[
-                "Content-Type"
-            ] = f"multipart/form-data; boundary={boundary_value}"
-            res = session.send(prepped, verify=verify, proxies=proxies)
-        else:
-            res = requests.request(
+        if files:
+            from .multipart import MultipartEncoder
+
+            if not isinstance(files, MultipartEncoder):
+                files = MultipartEncoder(files)
+            files.reset()
+            # Streamed from the files with a known Content-Length
+            headers = {
+                **{
+                    key: value
+                    for key, value in headers.items()
+                    if key.lower() not in ("content-type", "content-length")
+                },
+                "Content-Type": files.content_type,
+                "Content-Length": str(len(files)),
+            }
+            data = files
+        if hasattr(session, "build_request"):
+            # httpx.Client of HTTP/2, configured with the proxies and verify
+            request = session.build_request(
                 method,
                 endpoint,
                 headers=headers,
                 params=params,
-                data=data,
-                files=files,
-                proxies=proxies,
-                verify=verify,
+                content=data,
+                extensions=extensions,
             )
+            return session.send(request, stream=stream)
+        res = session.request(
+            method,
+            endpoint,
+            headers=headers,
+            params=params,
+            data=data,
+            proxies=proxies,
+            verify=verify,
+            stream=stream,
+        )
         return res
+
+    async def arequest(
+        self,
+        method: str,
+        endpoint: str,
+        headers: dict[str, typing.Any],
+        params: typing.Any = None,
+        data: typing.Any = None,
+        files: typing.Any = None,
+        session: typing.Any = None,
+        extensions: typing.Optional[dict[str, typing.Any]] = None,
+        stream: bool = False,
+    ):
+        """Wrap the httpx.AsyncClient, see `request` for the parameters
+
+        :param session: Pooled `httpx.AsyncClient` of the client
+        :type session: httpx.AsyncClient
+
+        :param extensions: httpx request extensions, e.g. trace
+        :type extensions: Dict[str, Any]
+
+        :param stream: Return once the headers are read, the body is read
+            with `aiter_bytes` and the response must be closed
+        :type stream: bool
+
+        :return: Response Object
+        :rtype: httpx.Response
+        """
+        if files:
+            from .multipart import MultipartEncoder
+
+            if not isinstance(files, MultipartEncoder):
+                files = MultipartEncoder(files)
+            files.reset()
+            headers = {
+                **{
+                    key: value
+                    for key, value in headers.items()
+                    if key.lower() not in ("content-type", "content-length")
+                },
+                "Content-Type": files.content_type,
+                "Content-Length": str(len(files)),
+            }
+            data = files
+        request = session.build_request(
+            method,
+            endpoint,
+            headers=headers,
+            params=params,
+            content=data,
+            extensions=extensions,
+        )
+        return await session.send(request, stream=stream)
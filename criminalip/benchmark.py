@@ -0,0 +1,251 @@
+"""Benchmark of the client overhead against the local MockServer
+
+    python -m criminalip.benchmark --requests 2000 --output bench.json
+    python -m criminalip.benchmark --compare bench.json
+
+It reports the requests per second and the p50/p99 latency of the sync,
+threaded and asyncio paths, and the peak memory allocated per call of the
+sync and asyncio ones. The mock server runs in a child process so that its
+allocations aren't counted.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import tracemalloc
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import ApiClientException
+from .mock_server import MockServer
+from .version import __version__
+
+MODES = ("sync", "threaded", "asyncio")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def summarize(
+    latencies: list[float], elapsed: float, memory: typing.Optional[float]
+) -> dict:
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "memory_per_call_bytes": memory,
+    }
+
+
+def timed(call, *args) -> float:
+    start = time.perf_counter()
+    call(*args)
+    return time.perf_counter() - start
+
+
+async def atimed(call, *args) -> float:
+    start = time.perf_counter()
+    await call(*args)
+    return time.perf_counter() - start
+
+
+def serve(connection, **options):
+    """Run a MockServer until the parent sends on the connection"""
+    with MockServer(**options) as server:
+        connection.send(server.url)
+        connection.recv()
+
+
+@contextlib.contextmanager
+def server_process(**options) -> typing.Iterator[str]:
+    """URL of a MockServer running in a child process"""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=serve, args=(child,), kwargs=options, daemon=True
+    )
+    process.start()
+    try:
+        yield parent.recv()
+    finally:
+        parent.send(None)
+        process.join()
+
+
+def memory_per_call(call, ips: list[str]) -> float:
+    """Average of the peak memory allocated during a call, the memory
+    freed before it returns included
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for ip in ips:
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            call(ip)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks)
+
+
+async def amemory_per_call(call, ips: list[str]) -> float:
+    peaks = []
+    tracemalloc.start()
+    try:
+        for ip in ips:
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            await call(ip)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks)
+
+
+def bench_sync(client, endpoint: str, ips: list[str], concurrency: int) -> dict:
+    call = getattr(client, endpoint)
+    call(ips[0])
+    start = time.perf_counter()
+    latencies = [timed(call, ip) for ip in ips]
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, memory_per_call(call, ips[:100]))
+
+
+def bench_threaded(client, endpoint: str, ips: list[str], concurrency: int) -> dict:
+    call = getattr(client, endpoint)
+    call(ips[0])
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        latencies = list(executor.map(lambda ip: timed(call, ip), ips))
+        elapsed = time.perf_counter() - start
+    # The peaks of concurrent calls overlap, see the sync mode for the memory
+    return summarize(latencies, elapsed, None)
+
+
+async def abench(client, endpoint: str, ips: list[str], concurrency: int) -> dict:
+    call = getattr(client, endpoint)
+    await call(ips[0])
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(ip):
+        async with semaphore:
+            return await atimed(call, ip)
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(bounded(ip) for ip in ips))
+    elapsed = time.perf_counter() - start
+    memory = await amemory_per_call(call, ips[:100])
+    return summarize(list(latencies), elapsed, memory)
+
+
+def bench_asyncio(base_url: str, endpoint: str, ips: list[str], concurrency: int):
+    from .crimial_ip import AsyncCriminalIP
+
+    async def run():
+        async with AsyncCriminalIP(
+            base_url, "api_key", pool_maxsize=concurrency
+        ) as client:
+            return await abench(client, endpoint, ips, concurrency)
+
+    return asyncio.run(run())
+
+
+def run(
+    requests: int = 1000,
+    concurrency: int = 16,
+    endpoint: str = "ip_summary",
+    modes: typing.Sequence[str] = MODES,
+    latency: float = 0.0,
+    payload_size: int = 10,
+) -> dict[str, typing.Any]:
+    """Run the benchmark and return the machine-readable results"""
+    from .crimial_ip import CriminalIP
+
+    ips = [f"10.0.{n >> 8 & 255}.{n & 255}" for n in range(requests)]
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "latency": latency,
+        "payload_size": payload_size,
+        "modes": {},
+    }
+    with server_process(latency=latency, payload_size=payload_size) as url:
+        for mode in modes:
+            if mode == "asyncio":
+                try:
+                    results["modes"][mode] = bench_asyncio(
+                        url, endpoint, ips, concurrency
+                    )
+                except (ImportError, ApiClientException) as e:
+                    # httpx isn't installed
+                    results["modes"][mode] = {"skipped": str(e)}
+                continue
+            bench = bench_sync if mode == "sync" else bench_threaded
+            with CriminalIP(url, "api_key", pool_maxsize=concurrency) as client:
+                results["modes"][mode] = bench(client, endpoint, ips, concurrency)
+    return results
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    """Return the ratios of the current results to the baseline"""
+    lines = []
+    for mode, stats in current["modes"].items():
+        old = baseline.get("modes", {}).get(mode)
+        if not old or "rps" not in stats or "rps" not in old:
+            continue
+        for key in ("rps", "p50_ms", "p99_ms", "memory_per_call_bytes"):
+            if stats.get(key) is None or old.get(key) is None:
+                continue
+            ratio = stats[key] / old[key] if old[key] else float("nan")
+            lines.append(
+                f"{mode:9} {key:22} {old[key]:12.2f} -> {stats[key]:12.2f} ({ratio:.2f}x)"
+            )
+    return lines
+
+
+def main(argv: typing.Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--endpoint", default="ip_summary")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--payload-size", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON results into the file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args(argv)
+
+    results = run(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        endpoint=args.endpoint,
+        modes=[mode for mode in args.modes.split(",") if mode],
+        latency=args.latency,
+        payload_size=args.payload_size,
+    )
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(results, json.load(f))), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+import collections
+import typing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from .scheduler import PRIORITY, batch_class, default_context
+
+
+@dataclass
+class BulkResult:
+    """Results of the endpoints for one value of a bulk lookup
+
+    Failed endpoints are collected in `errors` instead of stopping the batch.
+    """
+
+    value: str
+    results: dict[str, typing.Any] = field(default_factory=dict)
+    errors: dict[str, Exception] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def iter_values(values: typing.Iterable[str], dedupe: bool = True):
+    """Yield the values, skipping the repeated ones if `dedupe` is set"""
+    seen = set()
+    for value in values:
+        if dedupe:
+            if value in seen:
+                continue
+            seen.add(value)
+        yield value
+
+
+def lookup(client, endpoints: typing.Sequence[str], value: str) -> BulkResult:
+    result = BulkResult(value)
+    for endpoint in endpoints:
+        try:
+            result.results[endpoint] = getattr(client, endpoint)(value)
+        except Exception as e:
+            result.errors[endpoint] = e
+    return result
+
+
+async def alookup(client, endpoints: typing.Sequence[str], value: str) -> BulkResult:
+    result = BulkResult(value)
+    for endpoint in endpoints:
+        try:
+            result.results[endpoint] = await getattr(client, endpoint)(value)
+        except Exception as e:
+            result.errors[endpoint] = e
+    return result
+
+
+def bulk_lookup(
+    client,
+    values: typing.Iterable[str],
+    endpoints: typing.Sequence[str],
+    concurrency: int = 8,
+    ordered: bool = True,
+    dedupe: bool = True,
+) -> typing.Iterator[BulkResult]:
+    """Run the endpoints for every value over a pool of worker threads
+
+    The values are consumed lazily, at most `2 * concurrency` lookups are
+    pending at a time.
+
+    Args:
+        client (CriminalIP): client to run the endpoints with
+        values (Iterable[str]): IP addresses or domains
+        endpoints (Sequence[str]): names of the endpoints to call per value
+        concurrency (int): number of worker threads [default: 8]
+        ordered (bool): yield in input order, otherwise as finished [default: True]
+        dedupe (bool): skip the repeated values [default: True]
+    Returns:
+        results (Iterator[BulkResult]): one result per value
+    """
+    window = concurrency * 2
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    # The workers run with the priority of the caller, batch by default
+    context = default_context(batch_class(client.scheduler))
+    try:
+        if ordered:
+            pending = collections.deque()
+            for value in iter_values(values, dedupe):
+                pending.append(
+                    executor.submit(
+                        context.copy().run, lookup, client, endpoints, value
+                    )
+                )
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        else:
+            pending = set()
+            for value in iter_values(values, dedupe):
+                pending.add(
+                    executor.submit(
+                        context.copy().run, lookup, client, endpoints, value
+                    )
+                )
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in wait(pending).done:
+                yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def async_bulk_lookup(
+    client,
+    values: typing.Iterable[str],
+    endpoints: typing.Sequence[str],
+    concurrency: int = 8,
+    ordered: bool = True,
+    dedupe: bool = True,
+) -> typing.AsyncIterator[BulkResult]:
+    """Asyncio version of `bulk_lookup` for AsyncCriminalIP"""
+    window = concurrency * 2
+    semaphore = asyncio.Semaphore(concurrency)
+    batch = batch_class(client.scheduler)
+
+    async def run(value):
+        # Every task has its own copy of the context
+        if PRIORITY.get() is None:
+            PRIORITY.set((batch, None))
+        async with semaphore:
+            return await alookup(client, endpoints, value)
+
+    pending = collections.deque() if ordered else set()
+    try:
+        for value in iter_values(values, dedupe):
+            task = asyncio.ensure_future(run(value))
+            if ordered:
+                pending.append(task)
+                if len(pending) >= window:
+                    yield await pending.popleft()
+            else:
+                pending.add(task)
+                if len(pending) >= window:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield task.result()
+        if ordered:
+            while pending:
+                yield await pending.popleft()
+        else:
+            for task in asyncio.as_completed(pending):
+                yield await task
+            pending = set()
+    finally:
+        for task in pending:
+            task.cancel()
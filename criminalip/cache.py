@@ -0,0 +1,197 @@
+import abc
+import collections
+import json
+import os
+import threading
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    import sqlite3
+
+MISS = object()
+
+
+def get_connection(local: threading.local, path: str) -> "sqlite3.Connection":
+    """SQLite connection of the current thread, in WAL mode so that the
+    readers of the threads and processes sharing the file don't wait for
+    the writer
+    """
+    connection = getattr(local, "connection", None)
+    if connection is None:
+        import sqlite3
+
+        connection = sqlite3.connect(path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        local.connection = connection
+    return connection
+
+
+def make_key(
+    method: str, path: str, params: typing.Any = None, raw: bool = False
+) -> str:
+    """Key of a request from the method, resolved path, sorted params and
+    response mode, so that the raw bytes and the decoded results of a
+    shared cache don't mix
+    """
+    if isinstance(params, dict):
+        params = sorted(params.items())
+    return json.dumps([method, path, params, raw], default=str)
+
+
+class BaseCache(abc.ABC):
+    """Response cache used by `RequestRoute` for the cacheable routes
+
+    Only GET routes are cached unless the route sets `cache=True`.
+
+    :param ttl: Default time to live of the entries in seconds.
+    :param ttls: Time to live per route name, e.g. {"ip_summary": 3600}.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300,
+        ttls: typing.Optional[dict[str, float]] = None,
+    ):
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    make_key = staticmethod(make_key)
+
+    def get_ttl(self, name: str) -> float:
+        return self.ttls.get(name, self.ttl)
+
+    def get(self, key: str) -> typing.Any:
+        """Return the cached value or `MISS`"""
+        value = self._get(key, time.time())
+        with self._lock:
+            if value is MISS:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: typing.Any, ttl: typing.Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl > 0:
+            self._set(key, value, time.time() + ttl)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    @abc.abstractmethod
+    def clear(self):
+        pass
+
+    @abc.abstractmethod
+    def _get(self, key: str, now: float) -> typing.Any:
+        pass
+
+    @abc.abstractmethod
+    def _set(self, key: str, value: typing.Any, expires: float):
+        pass
+
+
+class MemoryCache(BaseCache):
+    """In-memory LRU cache
+
+    :param maxsize: Maximum number of entries, the least recently used
+        entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300,
+        ttls: typing.Optional[dict[str, float]] = None,
+    ):
+        super().__init__(ttl, ttls)
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            value, expires = entry
+            if expires <= now:
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value, expires):
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCache(BaseCache):
+    """On-disk cache shared by the processes using the same file
+
+    :param path: Path of the SQLite database.
+    """
+
+    def __init__(
+        self,
+        path: typing.Union[str, os.PathLike],
+        ttl: float = 300,
+        ttls: typing.Optional[dict[str, float]] = None,
+    ):
+        super().__init__(ttl, ttls)
+        self.path = os.fspath(path)
+        self._local = threading.local()
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value BLOB, is_raw INTEGER, expires REAL)"
+            )
+
+    @property
+    def connection(self) -> "sqlite3.Connection":
+        return get_connection(self._local, self.path)
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM cache")
+
+    def purge(self):
+        """Delete the expired entries"""
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM cache WHERE expires <= ?", (time.time(),)
+            )
+
+    def _get(self, key, now):
+        row = self.connection.execute(
+            "SELECT value, is_raw FROM cache WHERE key = ? AND expires > ?",
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return MISS
+        value, is_raw = row
+        return bytes(value) if is_raw else json.loads(value)
+
+    def _set(self, key, value, expires):
+        is_raw = isinstance(value, bytes)
+        if not is_raw:
+            value = json.dumps(value)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (key, value, is_raw, expires),
+            )
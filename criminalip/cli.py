@@ -0,0 +1,187 @@
+"""Enrich IP addresses or domains read from files or stdin
+
+    cat ips.txt | criminalip --endpoints ip_report,ip_malicious_info > out.ndjson
+    criminalip ips.txt --format csv --output out.csv --checkpoint out.ckpt
+
+The input is streamed and the results are written in input order as they
+complete, so the memory stays constant whatever the input size. With
+--checkpoint, a restarted run skips the values already written.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import typing
+
+from .bulk import BulkResult
+from .cache import SQLiteCache
+from .crimial_ip import CriminalIP
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+
+DEFAULT_BASE_URL = "https://api.criminalip.io"
+
+
+def iter_inputs(paths: typing.Sequence[str]) -> typing.Iterator[str]:
+    """Yield the non-empty lines of the files, `-` is stdin"""
+    for path in paths:
+        f = sys.stdin if path == "-" else open(path)
+        try:
+            for line in f:
+                value = line.strip()
+                if value and not value.startswith("#"):
+                    yield value
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def to_json(obj: typing.Any) -> typing.Any:
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, Exception):
+        return str(obj)
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+class NDJSONWriter:
+    def __init__(self, f, endpoints: typing.Sequence[str], resume: bool):
+        self.f = f
+
+    def write(self, result: BulkResult):
+        row = {"value": result.value, **result.results}
+        if result.errors:
+            row["errors"] = result.errors
+        self.f.write(json.dumps(row, default=to_json) + "\n")
+
+
+class CSVWriter:
+    def __init__(self, f, endpoints: typing.Sequence[str], resume: bool):
+        self.endpoints = endpoints
+        self.writer = csv.writer(f)
+        if not resume:
+            self.writer.writerow(["value", *endpoints, "errors"])
+
+    def write(self, result: BulkResult):
+        row = [result.value]
+        for endpoint in self.endpoints:
+            value = result.results.get(endpoint)
+            row.append("" if value is None else json.dumps(value, default=to_json))
+        row.append(json.dumps(result.errors, default=to_json) if result.errors else "")
+        self.writer.writerow(row)
+
+
+WRITERS = {"ndjson": NDJSONWriter, "csv": CSVWriter}
+
+
+def read_checkpoint(path: typing.Optional[str]) -> tuple[int, typing.Optional[int]]:
+    """Return the number of values processed and the size of the output
+    when the checkpoint was written
+    """
+    if not path or not os.path.exists(path):
+        return 0, None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    return checkpoint["processed"], checkpoint.get("offset")
+
+
+def write_checkpoint(path: str, processed: int, offset: typing.Optional[int] = None):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"processed": processed, "offset": offset}, f)
+    os.replace(tmp, path)
+
+
+def truncate_output(path: str, offset: typing.Optional[int]):
+    """Drop what was written after the checkpoint, the rows written again
+    and the last line cut by a crash
+    """
+    if offset is not None and os.path.exists(path):
+        os.truncate(path, offset)
+
+
+def parse_args(argv: typing.Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="criminalip",
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[1:]),
+    )
+    parser.add_argument("inputs", nargs="*", default=["-"], help="Files, - is stdin")
+    parser.add_argument(
+        "-e",
+        "--endpoints",
+        default=",".join(CriminalIP.IP_ENDPOINTS),
+        help="Comma separated CriminalIP methods [default: %(default)s]",
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS), default="ndjson")
+    parser.add_argument("-o", "--output", help="Output file [default: stdout]")
+    parser.add_argument("--checkpoint", help="Resume from and update this file")
+    parser.add_argument("--checkpoint-every", type=int, default=1000)
+    parser.add_argument("--api-key", default=os.getenv("CRIMINALIP_API_KEY"))
+    parser.add_argument(
+        "--base-url", default=os.getenv("CRIMINALIP_BASE_URL", DEFAULT_BASE_URL)
+    )
+    parser.add_argument("--cache", help="SQLite file caching the responses")
+    parser.add_argument("--cache-ttl", type=float, default=86400)
+    parser.add_argument("--rate", type=float, help="Maximum requests per second")
+    parser.add_argument("--retries", type=int, default=3)
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("--api-key or CRIMINALIP_API_KEY is required")
+    if args.checkpoint and not args.output:
+        parser.error("--checkpoint requires --output")
+    return args
+
+
+def create_client(args: argparse.Namespace) -> CriminalIP:
+    return CriminalIP(
+        args.base_url,
+        args.api_key,
+        pool_maxsize=args.concurrency,
+        cache=SQLiteCache(args.cache, ttl=args.cache_ttl) if args.cache else None,
+        rate_limiter=RateLimiter(default_rate=args.rate) if args.rate else None,
+        retry=RetryPolicy(total=args.retries) if args.retries else None,
+    )
+
+
+def main(argv: typing.Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    endpoints = [endpoint for endpoint in args.endpoints.split(",") if endpoint]
+    processed, offset = read_checkpoint(args.checkpoint)
+    resume = processed > 0
+    if resume:
+        truncate_output(args.output, offset)
+
+    values = itertools.islice(iter_inputs(args.inputs), processed, None)
+    output = (
+        open(args.output, "a" if resume else "w", newline="")
+        if args.output
+        else sys.stdout
+    )
+    failed = 0
+    try:
+        with create_client(args) as client:
+            writer = WRITERS[args.format](output, endpoints, resume)
+            results = client.bulk_lookup(
+                values, endpoints, concurrency=args.concurrency, dedupe=False
+            )
+            for result in results:
+                writer.write(result)
+                failed += not result.ok
+                processed += 1
+                if args.checkpoint and processed % args.checkpoint_every == 0:
+                    output.flush()
+                    write_checkpoint(args.checkpoint, processed, output.tell())
+    finally:
+        output.flush()
+        if args.checkpoint:
+            write_checkpoint(args.checkpoint, processed, output.tell())
+        if output is not sys.stdout:
+            output.close()
+    print(f"Processed {processed} values, {failed} with errors", file=sys.stderr)
+    return 0
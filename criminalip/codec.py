@@ -0,0 +1,68 @@
+import json
+import typing
+
+from .exceptions import ApiClientException
+
+
+class JSONCodec:
+    """JSON codec of the standard library"""
+
+    name = "json"
+
+    def loads(self, data: typing.Union[bytes, str]) -> typing.Any:
+        return json.loads(data)
+
+    def dumps(self, obj: typing.Any) -> typing.Union[bytes, str]:
+        return json.dumps(obj)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec using orjson"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.loads = orjson.loads
+        self.dumps = orjson.dumps
+
+
+class MsgspecCodec(JSONCodec):
+    """JSON codec using msgspec"""
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self.loads = msgspec.json.Decoder().decode
+        self.dumps = msgspec.json.Encoder().encode
+
+
+CODECS = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JSONCodec,
+}
+
+
+def get_codec(name: typing.Union[str, JSONCodec, None] = "auto") -> JSONCodec:
+    """Return the JSON codec by name
+
+    `auto` picks the fastest installed one: orjson, msgspec then json.
+    """
+    if isinstance(name, JSONCodec):
+        return name
+    if name is None or name == "auto":
+        for codec in CODECS.values():
+            try:
+                return codec()
+            except ImportError:
+                continue
+    if name not in CODECS:
+        raise ApiClientException(f"Not supported JSON codec, {name}")
+    try:
+        return CODECS[name]()
+    except ImportError:
+        raise ApiClientException(f"{name} is not installed")
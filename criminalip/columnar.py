@@ -0,0 +1,363 @@
+"""Columnar export of the results for Arrow, Parquet and pandas
+
+The results are flattened into column buffers with a fixed schema per
+endpoint and converted by batches, pyarrow and pandas are optional and
+only imported by the functions converting the buffers.
+"""
+
+import importlib
+import os
+import typing
+from collections.abc import Mapping
+
+from .exceptions import ApiClientException
+
+BOOLEANS = {"true": True, "false": False, "1": True, "0": False}
+
+
+def to_bool(value: typing.Any) -> typing.Optional[bool]:
+    """Bools, 0 and 1 and their strings, None for the other values"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return {0: False, 1: True}.get(value)
+    if isinstance(value, str):
+        return BOOLEANS.get(value.strip().lower())
+    return None
+
+
+COERCE = {
+    "string": str,
+    "int64": int,
+    "float64": float,
+    "bool": to_bool,
+}
+
+
+def import_optional(name: str, extra: str = "columnar"):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ApiClientException(
+            f"{name.split('.')[0]} is required for the columnar export, "
+            f"install it with `pip install pycriminalip[{extra}]`"
+        )
+
+
+def get_path(data: typing.Any, path: tuple) -> typing.Any:
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
+
+
+def coerce(value: typing.Any, type: str) -> typing.Any:
+    if value is None:
+        return None
+    if type.startswith("list<"):
+        if not isinstance(value, (list, tuple)):
+            return None
+        return [coerce(item, type[5:-1]) for item in value]
+    try:
+        return COERCE[type](value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Column:
+    """Column of a schema, the value is read at `path` of the row
+
+    :param convert: Function applied to the value before the type
+        coercion, e.g. to collect the ports of a list of dicts.
+    """
+
+    __slots__ = ("name", "type", "path", "convert")
+
+    def __init__(
+        self,
+        name: str,
+        type: str,
+        *path: typing.Union[str, int],
+        convert: typing.Optional[typing.Callable] = None,
+    ):
+        if type.removeprefix("list<").removesuffix(">") not in COERCE:
+            raise ApiClientException(f"Not supported column type, {type}")
+        self.name = name
+        self.type = type
+        self.path = path or (name,)
+        self.convert = convert
+
+    def get(self, row: typing.Any) -> typing.Any:
+        value = get_path(row, self.path)
+        if self.convert is not None and value is not None:
+            value = self.convert(value)
+        return coerce(value, self.type)
+
+
+class Schema:
+    """Columns of an endpoint and the rows of its results
+
+    :param rows: Function returning the rows of a result, the result is
+        one row if not given.
+    """
+
+    def __init__(
+        self,
+        columns: typing.Sequence[Column],
+        rows: typing.Optional[typing.Callable[[typing.Any], typing.Iterable]] = None,
+    ):
+        self.columns = tuple(columns)
+        self.rows = rows or (lambda result: (result,))
+
+    @property
+    def names(self) -> list[str]:
+        return [column.name for column in self.columns]
+
+    def to_arrow(self):
+        pa = import_optional("pyarrow")
+        types = {
+            "string": pa.string(),
+            "int64": pa.int64(),
+            "float64": pa.float64(),
+            "bool": pa.bool_(),
+        }
+
+        def arrow_type(type):
+            if type.startswith("list<"):
+                return pa.list_(arrow_type(type[5:-1]))
+            return types[type]
+
+        return pa.schema(
+            [pa.field(column.name, arrow_type(column.type)) for column in self.columns]
+        )
+
+
+def pluck(key: str) -> typing.Callable[[list], list]:
+    return lambda items: [get_path(item, (key,)) for item in items]
+
+
+def items(*path: str) -> typing.Callable[[typing.Any], list]:
+    def rows(result):
+        value = get_path(result, path)
+        return value if isinstance(value, list) else []
+
+    return rows
+
+
+def aggregations(result: typing.Any) -> typing.Iterator[dict[str, typing.Any]]:
+    """Rows of banner_stats, one per bucket of each aggregation"""
+    aggs = get_path(result, ("data", "result"))
+    if not isinstance(aggs, Mapping):
+        return
+    for name, buckets in aggs.items():
+        field = name.removesuffix("_agg")
+        for bucket in buckets if isinstance(buckets, list) else ():
+            key = bucket.get(field)
+            if key is None:
+                key = next((v for k, v in bucket.items() if k != "count"), None)
+            yield {"aggregation": field, "key": key, "count": bucket.get("count")}
+
+
+SCHEMAS: dict[str, Schema] = {
+    "ip_report": Schema(
+        [
+            Column("ip", "string"),
+            Column("score_inbound", "string", "score", "inbound"),
+            Column("score_outbound", "string", "score", "outbound"),
+            Column("is_vpn", "bool", "issues", "is_vpn"),
+            Column("is_proxy", "bool", "issues", "is_proxy"),
+            Column("is_tor", "bool", "issues", "is_tor"),
+            Column("is_hosting", "bool", "issues", "is_hosting"),
+            Column("is_scanner", "bool", "issues", "is_scanner"),
+            Column("as_no", "int64", "whois", "data", 0, "as_no"),
+            Column("as_name", "string", "whois", "data", 0, "as_name"),
+            Column("country_code", "string", "whois", "data", 0, "org_country_code"),
+            Column("port_count", "int64", "port", "count"),
+            Column(
+                "open_ports",
+                "list<int64>",
+                "port",
+                "data",
+                convert=pluck("open_port_no"),
+            ),
+            Column("vulnerability_count", "int64", "vulnerability", "count"),
+            Column(
+                "cve_ids",
+                "list<string>",
+                "vulnerability",
+                "data",
+                convert=pluck("cve_id"),
+            ),
+        ]
+    ),
+    "ip_summary": Schema(
+        [
+            Column("ip", "string"),
+            Column("score_inbound", "string", "score", "inbound"),
+            Column("score_outbound", "string", "score", "outbound"),
+            Column("country_code", "string"),
+            Column("city", "string"),
+            Column("isp", "string"),
+            Column("org_name", "string"),
+            Column("as_no", "int64"),
+        ]
+    ),
+    "banner_search": Schema(
+        [
+            Column("ip", "string", "ip_address"),
+            Column("port", "int64", "open_port_no"),
+            Column("as_name", "string"),
+            Column("country", "string"),
+            Column("city", "string"),
+            Column("product", "string"),
+            Column("score", "string"),
+            Column("banner", "string"),
+            Column("scan_dtime", "string"),
+        ],
+        rows=items("data", "result"),
+    ),
+    "banner_stats": Schema(
+        [
+            Column("aggregation", "string"),
+            Column("key", "string"),
+            Column("count", "int64"),
+        ],
+        rows=aggregations,
+    ),
+    "search_exploit": Schema(
+        [
+            Column("edb_id", "int64"),
+            Column("cve_ids", "list<string>", "cve_id"),
+            Column("title", "string"),
+            Column("author", "string"),
+            Column("platform", "string"),
+            Column("type", "string"),
+            Column("published_date", "string", "edb_reg_date"),
+        ],
+        rows=items("data", "result"),
+    ),
+}
+
+
+def get_schema(endpoint: typing.Union[str, Schema]) -> Schema:
+    if isinstance(endpoint, Schema):
+        return endpoint
+    schema = SCHEMAS.get(endpoint)
+    if schema is None:
+        raise ApiClientException(f"No columnar schema for {endpoint}")
+    return schema
+
+
+class ColumnarBuffer:
+    """Column lists filled with the rows of the results of an endpoint
+
+    :param endpoint: Endpoint name in `SCHEMAS` or a `Schema`.
+    """
+
+    def __init__(self, endpoint: typing.Union[str, Schema]):
+        self.schema = get_schema(endpoint)
+        self.columns: dict[str, list] = {name: [] for name in self.schema.names}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def add(self, result: typing.Any) -> int:
+        """Add the rows of a result, a dict or a model, return their number"""
+        result = getattr(result, "raw", result)
+        count = 0
+        appends = [
+            (column.get, self.columns[column.name].append)
+            for column in self.schema.columns
+        ]
+        for row in self.schema.rows(result):
+            for get, append in appends:
+                append(get(row))
+            count += 1
+        return count
+
+    def flush(self) -> dict[str, list]:
+        """Return the columns and empty the buffer"""
+        columns = self.columns
+        self.columns = {name: [] for name in self.schema.names}
+        return columns
+
+    def to_batch(self):
+        """Flush the buffer into a `pyarrow.RecordBatch`"""
+        pa = import_optional("pyarrow")
+        return pa.RecordBatch.from_pydict(self.flush(), schema=self.schema.to_arrow())
+
+
+class ColumnarWriter:
+    """Write the results of an endpoint to a Parquet or Arrow IPC file by
+    record batches, so that the memory is bounded by `batch_size` rows
+
+    :param path: Path of the output file.
+    :param endpoint: Endpoint name in `SCHEMAS` or a `Schema`.
+    :param format: parquet or arrow.
+    :param batch_size: Number of rows of the record batches.
+    """
+
+    def __init__(
+        self,
+        path: typing.Union[str, os.PathLike],
+        endpoint: typing.Union[str, Schema],
+        format: str = "parquet",
+        batch_size: int = 65536,
+    ):
+        if format not in ("parquet", "arrow"):
+            raise ApiClientException(f"Not supported columnar format, {format}")
+        self.buffer = ColumnarBuffer(endpoint)
+        self.batch_size = batch_size
+        self.rows = 0
+        schema = self.buffer.schema.to_arrow()
+        if format == "parquet":
+            parquet = import_optional("pyarrow.parquet")
+            self.writer = parquet.ParquetWriter(os.fspath(path), schema)
+        else:
+            ipc = import_optional("pyarrow.ipc")
+            self.writer = ipc.new_file(os.fspath(path), schema)
+
+    def write(self, result: typing.Any):
+        self.rows += self.buffer.add(result)
+        if len(self.buffer) >= self.batch_size:
+            self.writer.write_batch(self.buffer.to_batch())
+
+    def close(self):
+        if len(self.buffer):
+            self.writer.write_batch(self.buffer.to_batch())
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def to_table(results: typing.Iterable[typing.Any], endpoint: typing.Union[str, Schema]):
+    """Convert the results into a `pyarrow.Table`"""
+    pa = import_optional("pyarrow")
+    buffer = ColumnarBuffer(endpoint)
+    for result in results:
+        buffer.add(result)
+    return pa.Table.from_pydict(buffer.flush(), schema=buffer.schema.to_arrow())
+
+
+def to_dataframe(
+    results: typing.Iterable[typing.Any], endpoint: typing.Union[str, Schema]
+):
+    """Convert the results into a `pandas.DataFrame`, through Arrow if
+    pyarrow is installed
+    """
+    pandas = import_optional("pandas", "pandas")
+    buffer = ColumnarBuffer(endpoint)
+    for result in results:
+        buffer.add(result)
+    try:
+        pa = importlib.import_module("pyarrow")
+    except ImportError:
+        return pandas.DataFrame(buffer.flush(), columns=buffer.schema.names)
+    table = pa.Table.from_pydict(buffer.flush(), schema=buffer.schema.to_arrow())
+    return table.to_pandas()
@@ -1,8 +1,13 @@
 import logging
+import typing
 from dataclasses import dataclass
 
-from .api import ApiClient, RequestRoute
+from .api import ApiClient, AsyncApiClient, RequestRoute
 from .api import Response
+from .exceptions import CIPException
+from .keys import APIKeyPool
+from .models import BannerSearch, ExploitSearch
+from .models import IPMaliciousInfo, IPReport, IPSummary
 
 
 @dataclass
@@ -21,21 +26,224 @@ class User:
 
 
 class CriminalIP(ApiClient):
-    def __init__(self, base_url, api_key):
-        super(CriminalIP, self).__init__(base_url)
+    IP_ENDPOINTS = ("ip_report", "ip_malicious_info", "ip_privacy_threat")
+
+    def __init__(self, base_url, api_key, **kwargs):
+        super(CriminalIP, self).__init__(base_url, **kwargs)
         self.headers["x-api-key"] = api_key
 
+    def bulk_lookup(
+        self,
+        values: typing.Iterable[str],
+        endpoints: typing.Sequence[str],
+        concurrency: int = 8,
+        ordered: bool = True,
+        dedupe: bool = True,
+    ):
+        """Run the endpoints for many IPs or domains concurrently
+
+        Errors are collected per value and endpoint in `BulkResult.errors`.
+        AsyncCriminalIP returns an async iterator.
+
+        Args:
+            values (Iterable[str]): IP addresses or domains
+            endpoints (Sequence[str]): names of the endpoints, e.g. ["ip_report"]
+            concurrency (int): number of concurrent lookups [default: 8]
+            ordered (bool): yield in input order, otherwise as finished [default: True]
+            dedupe (bool): skip the repeated values [default: True]
+        Returns:
+            results (Iterator[BulkResult]): one result per value
+        """
+        for endpoint in endpoints:
+            # Only the routes, or their overrides in a subclass
+            routes = [
+                getattr(vars(cls).get(endpoint), "route", None)
+                for cls in type(self).__mro__
+            ]
+            if all(route is None for route in routes):
+                raise CIPException(f"Unknown endpoint, {endpoint}")
+        from . import bulk
+
+        run = bulk.async_bulk_lookup if self.is_async else bulk.bulk_lookup
+        return run(self, values, endpoints, concurrency, ordered, dedupe)
+
+    def bulk_ip_lookup(
+        self,
+        ips: typing.Iterable[str],
+        endpoints: typing.Sequence[str] = IP_ENDPOINTS,
+        concurrency: int = 8,
+        ordered: bool = True,
+        dedupe: bool = True,
+    ):
+        """Enrich many IPs, by default with ip_report, ip_malicious_info and
+        ip_privacy_threat. See `bulk_lookup`.
+        """
+        return self.bulk_lookup(ips, endpoints, concurrency, ordered, dedupe)
+
+    def export(
+        self,
+        endpoint: str,
+        values: typing.Iterable[str],
+        path: str,
+        format: str = "parquet",
+        batch_size: int = 65536,
+        concurrency: int = 8,
+    ) -> int:
+        """Run an endpoint for many values and write the results to a Parquet
+        or Arrow file with the fixed schema of the endpoint, by record batches
+
+        It requires pyarrow (`pip install pycriminalip[columnar]`). The values
+        failing are skipped, see `bulk_lookup` to handle the errors.
+
+        Args:
+            endpoint (str): ip_report, ip_summary, banner_search, banner_stats
+                or search_exploit
+            values (Iterable[str]): IP addresses or queries
+            path (str): path of the output file
+            format (str): parquet or arrow [default: parquet]
+            batch_size (int): rows of the record batches [default: 65536]
+            concurrency (int): number of concurrent lookups [default: 8]
+        Returns:
+            rows (int): number of rows written
+        """
+        from .columnar import ColumnarWriter
+
+        if self.is_async:
+            raise CIPException("export isn't supported by the asyncio client")
+        with ColumnarWriter(path, endpoint, format, batch_size) as writer:
+            for result in self.bulk_lookup(values, [endpoint], concurrency):
+                if result.ok:
+                    writer.write(result.results[endpoint])
+        return writer.rows
+
+    def to_dataframe(
+        self, endpoint: str, values: typing.Iterable[str], concurrency: int = 8
+    ):
+        """Run an endpoint for many values into a pandas DataFrame with the
+        columns of `export`
+        """
+        from .columnar import to_dataframe
+
+        if self.is_async:
+            raise CIPException("to_dataframe isn't supported by the asyncio client")
+        results = self.bulk_lookup(values, [endpoint], concurrency)
+        return to_dataframe(
+            (result.results[endpoint] for result in results if result.ok), endpoint
+        )
+
+    def scan_domains(self, queries: typing.Iterable[str], lite: bool = False, **kwargs):
+        """Scan many domains and yield the reports as the scans complete
+
+        It runs domain_scan, domain_scan_status and domain_report, or the
+        domain_lite_* endpoints if `lite` is set. AsyncCriminalIP returns
+        an async iterator.
+
+        Args:
+            queries (Iterable[str]): domains to scan
+            lite (bool): run lite scans [default: False]
+            kwargs: polling options of `DomainScanner`
+        Returns:
+            results (Iterator[ScanResult]): results in completion order
+        """
+        from .scan import DomainScanner
+
+        scanner = DomainScanner(self, lite=lite, **kwargs)
+        return scanner.ascan(queries) if self.is_async else scanner.scan(queries)
+
+    def paginate(self, fetch, offset: int = 0, max_results=None, prefetch=False):
+        from .pagination import Paginator
+
+        paginator = Paginator(fetch, offset, max_results, prefetch)
+        return paginator.__aiter__() if self.is_async else iter(paginator)
+
+    def iter_banner_search(
+        self,
+        query: str,
+        offset: int = 0,
+        max_results: typing.Optional[int] = None,
+        prefetch: bool = False,
+    ):
+        """Iterate the banners of banner_search page by page
+        Args:
+            query (str): Domain saerch query
+            offset (int): starting position in the dataset [default: 0]
+            max_results (int): maximum number of banners [default: None]
+            prefetch (bool): fetch the next page in advance [default: False]
+        Returns:
+            banners (Iterator[dict]): Banners, async iterator for AsyncCriminalIP
+        """
+        return self.paginate(
+            lambda offset: self.banner_search(query, offset=offset),
+            offset,
+            max_results,
+            prefetch,
+        )
+
+    def iter_search_exploit(
+        self,
+        query: str,
+        offset: int = 0,
+        max_results: typing.Optional[int] = None,
+        prefetch: bool = False,
+    ):
+        """Iterate the exploits of search_exploit page by page, see `iter_banner_search`"""
+        return self.paginate(
+            lambda offset: self.search_exploit(query, offset=offset),
+            offset,
+            max_results,
+            prefetch,
+        )
+
+    def iter_domain_reports(
+        self,
+        query: str,
+        offset: int = 0,
+        max_results: typing.Optional[int] = None,
+        prefetch: bool = False,
+    ):
+        """Iterate the reports of domain_reports page by page, see `iter_banner_search`"""
+        return self.paginate(
+            lambda offset: self.domain_reports(query, offset=offset),
+            offset,
+            max_results,
+            prefetch,
+        )
+
+    def iter_scan_history(
+        self,
+        offset: int = 0,
+        show_public: bool = False,
+        show_private: bool = False,
+        scan_type: str = "lite",
+        max_results: typing.Optional[int] = None,
+        prefetch: bool = False,
+    ):
+        """Iterate the reports of scan_history page by page, see `iter_banner_search`"""
+        return self.paginate(
+            lambda offset: self.scan_history(
+                offset,
+                show_public=show_public,
+                show_private=show_private,
+                scan_type=scan_type,
+            ),
+            offset,
+            max_results,
+            prefetch,
+        )
+
     @Response(model=User)
     @RequestRoute("POST", "v1/user/me")
     def get_user(self):
         return (None, None, None)
 
-    @RequestRoute("GET", "v1/asset/ip/report")
+    @Response(model=IPReport)
+    @RequestRoute("GET", "v1/asset/ip/report", snapshot=True)
     def ip_report(self, ip: str, full: bool = False):
         params = {"ip": ip, "full": full}
         return (params, None, None)
 
-    @RequestRoute("GET", "v1/ip/summary")
+    @Response(model=IPSummary)
+    @RequestRoute("GET", "v1/ip/summary", snapshot=True)
     def ip_summary(self, ip: str):
         """Get Ip information
         Args:
@@ -78,6 +286,7 @@ class CriminalIP(ApiClient):
         }
         return params, None, None
 
+    @Response(model=IPMaliciousInfo)
     @RequestRoute("GET", "v1/feature/ip/malicious-info")
     def ip_malicious_info(self, ip: str):
         """Get Ip information
@@ -122,7 +331,8 @@ class CriminalIP(ApiClient):
         params = {"ip": ip}
         return params, None, None
 
-    @RequestRoute("GET", "v1/banner/search")
+    @Response(model=BannerSearch)
+    @RequestRoute("GET", "v1/banner/search", items="data.result")
     def banner_search(self, query: str, offset: int = 0):
         """API for searching banner_data with filter
         Args:
@@ -130,7 +340,7 @@ class CriminalIP(ApiClient):
             offset (int): starting position in the dataset [default: 0]
         Returns:
             banners (List[dict]): list of Banners
-        TODO: pagination offset ?
+        See `iter_banner_search` to iterate all the pages.
         """
         params = {
             "query": query,
@@ -151,7 +361,7 @@ class CriminalIP(ApiClient):
         # return result["data"]
         return params, None, None
 
-    @RequestRoute("POST", "v1/domain/scan/<scan_type>")
+    @RequestRoute("POST", "v1/domain/scan")
     def domain_scan(self, query: str):
         """Request domain to scan
         Args:
@@ -179,7 +389,7 @@ class CriminalIP(ApiClient):
         # scan_id = result["data"]["scan_id"]
         return None, data, None
 
-    @RequestRoute("GET", "v1/domain/reports")
+    @RequestRoute("GET", "v1/domain/reports", items="data.reports")
     def domain_reports(self, query: str, offset: int = 0):
         """Get existing domain reports
         Args:
@@ -187,7 +397,7 @@ class CriminalIP(ApiClient):
             offset (int): starting position in the dataset [default: 0]
         Returns:
             reports (List[dict]): list of Reports
-        TODO: pagination offset ?
+        See `iter_domain_reports` to iterate all the pages.
         """
         params = {
             "query": query,
@@ -207,7 +417,7 @@ class CriminalIP(ApiClient):
         # domain_scan_result = result["data"]
         return None, None, None
 
-    @RequestRoute("GET", "v1/domain/status/<scan_id>")
+    @RequestRoute("GET", "v1/domain/status/<scan_id>", cache=False)
     def domain_scan_status(self, scan_id: str) -> int:
         """Get progress of domain scan
 
@@ -219,7 +429,7 @@ class CriminalIP(ApiClient):
         # scan_percentage = scan_status["data"]["scan_percentage"]
         return None, None, None
 
-    @RequestRoute("GET", "v1/domain/reports/personal")
+    @RequestRoute("GET", "v1/domain/reports/personal", items="data.reports")
     def scan_history(
         self,
         offset: int,
@@ -237,13 +447,13 @@ class CriminalIP(ApiClient):
         )
         return params, None, None
 
-    @RequestRoute("GET", "v1/domain/lite/scan")
+    @RequestRoute("GET", "v1/domain/lite/scan", cache=False)
     def domain_lite_scan(self, query: str):
         params = {"query": query}
         # data['data']['scan_id]
         return params, None, None
 
-    @RequestRoute("GET", "v1/domain/lite/progress")
+    @RequestRoute("GET", "v1/domain/lite/progress", cache=False)
     def domain_lite_progress(self, scan_id: str):
         params = {"scan_id": scan_id}
         return params, None, None
@@ -267,7 +477,8 @@ class CriminalIP(ApiClient):
         params = {"domain": domain}
         return params, None, None
 
-    @RequestRoute("GET", "v1/exploit/search")
+    @Response(model=ExploitSearch)
+    @RequestRoute("GET", "v1/exploit/search", items="data.result")
     def search_exploit(self, query: str, offset: int = 0):
         """API for searching exploit data with filter
         Args:
@@ -275,7 +486,7 @@ class CriminalIP(ApiClient):
             offset (int): Starting position in the dataset(entering in increments of 10)
         Returns:
             exploits (list[dict]): list of found Exploits
-        TODO: pagination offset ?
+        See `iter_search_exploit` to iterate all the pages.
         """
         params = {
             "query": query,
@@ -283,3 +494,45 @@ class CriminalIP(ApiClient):
         }
         # exploits = result["data"]
         return params, None, None
+
+
+class AsyncCriminalIP(AsyncApiClient, CriminalIP):
+    """CriminalIP client whose endpoints are coroutines
+
+    It shares the route definitions of `CriminalIP`, e.g.
+
+        async with AsyncCriminalIP(base_url, api_key) as client:
+            ip_data = await client.ip_summary("1.1.1.1")
+    """
+
+
+class MultiKeyCriminalIP(CriminalIP):
+    """CriminalIP client spreading the requests over several API keys
+
+    Args:
+        base_url (str): CriminalIP API URL
+        api_keys (Sequence[str]): API keys of the accounts
+        strategy (str): `least_loaded` or `round_robin` [default: least_loaded]
+        cooldown (float): seconds a limited key is out of rotation [default: 60]
+    """
+
+    def __init__(
+        self,
+        base_url,
+        api_keys: typing.Sequence[str],
+        strategy: str = "least_loaded",
+        cooldown: float = 60.0,
+        **kwargs,
+    ):
+        kwargs.setdefault("key_pool", APIKeyPool(api_keys, strategy, cooldown))
+        super(MultiKeyCriminalIP, self).__init__(base_url, api_keys[0], **kwargs)
+        del self.headers["x-api-key"]
+
+    def refresh_quotas(self):
+        """Set the `max_search` of every key from get_user"""
+        for key in self.key_pool.keys:
+            client = CriminalIP(self.base_url, key.api_key)
+            # Borrow the pooled session, it stays owned by this client
+            client._session = self.session
+            key.max_search = int(client.get_user().max_search)
+        return self.key_pool.stats()
@@ -0,0 +1,206 @@
+import collections
+import itertools
+import multiprocessing
+import pickle
+import typing
+
+from .bulk import BulkResult
+from .exceptions import CIPException, CIPQuotaExhausted
+from .ratelimit import RateLimiter, TokenBucket
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose state lives in shared memory
+
+    It's shared by the worker processes it's passed to at their creation,
+    e.g. through the initializer arguments of a process pool.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: typing.Optional[float] = None,
+        context: typing.Any = None,
+    ):
+        context = context or multiprocessing.get_context()
+        # tokens, updated
+        self._state = context.Array("d", 2)
+        super().__init__(rate, capacity)
+        self._lock = self._state.get_lock()
+
+    tokens = property(
+        lambda self: self._state[0],
+        lambda self, value: self._state.__setitem__(0, value),
+    )
+    updated = property(
+        lambda self: self._state[1],
+        lambda self, value: self._state.__setitem__(1, value),
+    )
+
+
+class SharedQuota:
+    """Number of API calls left, shared by the worker processes
+
+    Once used, the calls fail with `CIPQuotaExhausted`, which is neither
+    retried nor cools down the API keys.
+    """
+
+    def __init__(self, limit: int, context: typing.Any = None):
+        context = context or multiprocessing.get_context()
+        self.limit = limit
+        self._used = context.Value("q", 0)
+
+    @property
+    def used(self) -> int:
+        return self._used.value
+
+    def consume(self):
+        with self._used.get_lock():
+            if self._used.value >= self.limit:
+                raise CIPQuotaExhausted(f"Quota of {self.limit} API calls is exhausted")
+            self._used.value += 1
+
+
+class SharedRateLimiter(RateLimiter):
+    """RateLimiter shared by processes, with an optional shared quota
+
+    The buckets of all the groups are created upfront so that the worker
+    processes inherit them.
+
+    :param quota: Maximum number of API calls of all the processes.
+    """
+
+    def __init__(
+        self,
+        rates: typing.Optional[dict[str, float]] = None,
+        default_rate: typing.Optional[float] = None,
+        burst: typing.Optional[float] = None,
+        quota: typing.Optional[int] = None,
+        context: typing.Any = None,
+    ):
+        super().__init__(rates, default_rate, burst)
+        self.context = context or multiprocessing.get_context()
+        self.quota = SharedQuota(quota, self.context) if quota is not None else None
+        for group in self.GROUPS + ("default",) + tuple(self.rates):
+            self.bucket(group)
+
+    def create_bucket(self, group: str) -> typing.Optional[TokenBucket]:
+        rate = self.rates.get(group, self.default_rate)
+        if rate is None:
+            return None
+        return SharedTokenBucket(rate, self.burst, self.context)
+
+    def acquire(self, group: str):
+        if self.quota is not None:
+            self.quota.consume()
+        super().acquire(group)
+
+    async def acquire_async(self, group: str):
+        if self.quota is not None:
+            self.quota.consume()
+        await super().acquire_async(group)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"], state["context"]
+        return state
+
+    def __setstate__(self, state):
+        import threading
+
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self.context = multiprocessing.get_context()
+
+
+worker_client = None
+
+
+def init_worker(base_url: str, api_key: str, options: dict[str, typing.Any]):
+    global worker_client
+    from .crimial_ip import CriminalIP
+
+    worker_client = CriminalIP(base_url, api_key, **options)
+
+
+def enrich_chunk(
+    chunk: list[str], endpoints: typing.Sequence[str], concurrency: int
+) -> list[BulkResult]:
+    results = list(
+        worker_client.bulk_lookup(chunk, endpoints, concurrency, dedupe=False)
+    )
+    for result in results:
+        for endpoint, error in result.errors.items():
+            try:
+                pickle.dumps(error)
+            except Exception:
+                result.errors[endpoint] = CIPException(repr(error))
+    return results
+
+
+def iter_chunks(values: typing.Iterable[str], size: int) -> typing.Iterator[list]:
+    values = iter(values)
+    while True:
+        chunk = list(itertools.islice(values, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ProcessPoolEnricher:
+    """Enrich values over worker processes, each with its own CriminalIP
+
+    The input is split in chunks consumed lazily, at most `2 * processes`
+    chunks are in flight, and the results are yielded in input order.
+    Pass a `SharedRateLimiter` to share the rate limits and the quota of
+    the account among the processes.
+
+    Args:
+        base_url (str): CriminalIP API URL
+        api_key (str): API key
+        endpoints (Sequence[str]): names of the endpoints per value
+        processes (int): number of worker processes [default: cpu count]
+        concurrency (int): concurrent lookups per process [default: 4]
+        chunksize (int): values per task [default: 100]
+        rate_limiter (SharedRateLimiter): limits shared by the processes
+        client_options (dict): other CriminalIP options of the workers
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        endpoints: typing.Sequence[str] = ("ip_report",),
+        processes: typing.Optional[int] = None,
+        concurrency: int = 4,
+        chunksize: int = 100,
+        rate_limiter: typing.Optional[SharedRateLimiter] = None,
+        client_options: typing.Optional[dict[str, typing.Any]] = None,
+        context: typing.Any = None,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.endpoints = tuple(endpoints)
+        self.processes = processes or multiprocessing.cpu_count()
+        self.concurrency = concurrency
+        self.chunksize = chunksize
+        self.context = context or multiprocessing.get_context()
+        self.client_options = dict(client_options or {})
+        self.client_options.setdefault("pool_maxsize", concurrency)
+        if rate_limiter is not None:
+            self.client_options["rate_limiter"] = rate_limiter
+
+    def run(self, values: typing.Iterable[str]) -> typing.Iterator[BulkResult]:
+        initargs = (self.base_url, self.api_key, self.client_options)
+        with self.context.Pool(self.processes, init_worker, initargs) as pool:
+            pending = collections.deque()
+            for chunk in iter_chunks(values, self.chunksize):
+                pending.append(
+                    pool.apply_async(
+                        enrich_chunk, (chunk, self.endpoints, self.concurrency)
+                    )
+                )
+                if len(pending) >= self.processes * 2:
+                    yield from pending.popleft().get()
+            while pending:
+                yield from pending.popleft().get()
@@ -1,3 +1,6 @@
+import typing
+
+
 class ApiClientException(Exception):
     pass
 
@@ -10,5 +13,21 @@ class CIPException(Exception):
     pass
 
 
-class CIPLimitExcceed(Exception):
+class CIPLimitExcceed(CIPException):
+    def __init__(self, message: str, retry_after: typing.Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CIPRequestError(CIPException):
+    def __init__(self, message: str, status_code: typing.Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CIPDeadlineExceeded(CIPException):
+    pass
+
+
+class CIPQuotaExhausted(CIPException):
     pass
@@ -0,0 +1,66 @@
+import time
+import typing
+
+HOOK_EVENTS = ("before_request", "after_response", "on_error")
+
+
+class RequestEvent:
+    """Event passed to the hooks of `ApiClient.add_hook`
+
+    `timings` has the seconds of `total`, `ttfb` (until the response
+    headers), `decode` (JSON decoding) and, with the httpx transports of
+    the asyncio client or `http2=True`, `connect` (DNS and TCP connect)
+    and `tls`. The requests transport has no connection phases.
+    `context` is free for the hooks to keep state between the events.
+    """
+
+    __slots__ = (
+        "route",
+        "method",
+        "url",
+        "attempt",
+        "started",
+        "timings",
+        "status_code",
+        "response_bytes",
+        "cached",
+        "error",
+        "context",
+        "_trace",
+    )
+
+    def __init__(self, route, url: str, attempt: int = 0, cached: bool = False):
+        self.route = route.name
+        self.method = route.method
+        self.url = url
+        self.attempt = attempt
+        self.started = time.perf_counter()
+        self.timings: dict[str, float] = {}
+        self.status_code: typing.Optional[int] = None
+        self.response_bytes = 0
+        self.cached = cached
+        self.error: typing.Optional[Exception] = None
+        self.context: dict[str, typing.Any] = {}
+        self._trace: dict[str, float] = {}
+
+    def finish(self, error: typing.Optional[Exception] = None):
+        self.timings["total"] = time.perf_counter() - self.started
+        self.error = error
+
+    async def trace(self, name: str, info: dict):
+        """httpx trace extension collecting the connection timings"""
+        self.trace_sync(name, info)
+
+    def trace_sync(self, name: str, info: dict):
+        """Trace extension of the sync httpx transport, see `trace`"""
+        step, _, state = name.rpartition(".")
+        if state == "started":
+            self._trace[step] = time.perf_counter()
+        elif state == "complete" and step in self._trace:
+            elapsed = time.perf_counter() - self._trace.pop(step)
+            if step.endswith("connect_tcp"):
+                self.timings["connect"] = elapsed
+            elif step.endswith("start_tls"):
+                self.timings["tls"] = elapsed
+            elif step.endswith("receive_response_headers"):
+                self.timings["ttfb"] = elapsed
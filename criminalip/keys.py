@@ -0,0 +1,124 @@
+import itertools
+import threading
+import time
+import typing
+
+from .exceptions import CIPLimitExcceed
+
+
+class APIKey:
+    """State of an API key of an `APIKeyPool`"""
+
+    __slots__ = ("api_key", "in_flight", "used", "max_search", "limited_until")
+
+    def __init__(self, api_key: str, max_search: typing.Optional[int] = None):
+        self.api_key = api_key
+        self.in_flight = 0
+        self.used = 0
+        self.max_search = max_search
+        self.limited_until = 0.0
+
+    def is_available(self, now: float) -> bool:
+        if self.limited_until > now:
+            return False
+        return self.max_search is None or self.used < self.max_search
+
+    def __repr__(self):
+        return (
+            f"APIKey({self.api_key[:4]}..., in_flight={self.in_flight}, "
+            f"used={self.used}, max_search={self.max_search})"
+        )
+
+
+class APIKeyPool:
+    """Spread the requests over several API keys
+
+    A key is taken out of rotation for `cooldown` seconds (or the
+    Retry-After of the response) when it hits a limit, and for good once
+    it used its `max_search`.
+
+    :param api_keys: API keys of the accounts.
+    :param strategy: `round_robin` or `least_loaded` (fewest requests in
+        flight, then fewest used).
+    :param cooldown: Seconds a limited key stays out of rotation.
+    :param header: Header of the API key.
+    """
+
+    STRATEGIES = ("round_robin", "least_loaded")
+
+    def __init__(
+        self,
+        api_keys: typing.Sequence[str],
+        strategy: str = "least_loaded",
+        cooldown: float = 60.0,
+        header: str = "x-api-key",
+    ):
+        if not api_keys:
+            raise ValueError("api_keys must not be empty")
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Not supported strategy, {strategy}")
+        self.keys = [APIKey(api_key) for api_key in api_keys]
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.header = header
+        self._cycle = itertools.cycle(self.keys)
+        self._lock = threading.Lock()
+
+    def available(self) -> list[APIKey]:
+        now = time.monotonic()
+        return [key for key in self.keys if key.is_available(now)]
+
+    def acquire(self) -> APIKey:
+        """Return the key for the next request"""
+        with self._lock:
+            now = time.monotonic()
+            if self.strategy == "round_robin":
+                for key in itertools.islice(self._cycle, len(self.keys)):
+                    if key.is_available(now):
+                        break
+                else:
+                    key = None
+            else:
+                available = [key for key in self.keys if key.is_available(now)]
+                key = min(
+                    available,
+                    key=lambda key: (key.in_flight, key.used),
+                    default=None,
+                )
+            if key is None:
+                raise CIPLimitExcceed(
+                    "All API keys have exceeded their limits",
+                    retry_after=self.retry_after(now),
+                )
+            key.in_flight += 1
+            key.used += 1
+            return key
+
+    def release(self, key: APIKey, error: typing.Optional[Exception] = None):
+        with self._lock:
+            key.in_flight -= 1
+            if isinstance(error, CIPLimitExcceed):
+                cooldown = error.retry_after or self.cooldown
+                key.limited_until = time.monotonic() + cooldown
+
+    def retry_after(self, now: float) -> typing.Optional[float]:
+        limited = [
+            key.limited_until - now
+            for key in self.keys
+            if key.limited_until > now
+            and (key.max_search is None or key.used < key.max_search)
+        ]
+        return min(limited) if limited else None
+
+    def stats(self) -> list[dict[str, typing.Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "api_key": key.api_key[:4] + "...",
+                "in_flight": key.in_flight,
+                "used": key.used,
+                "max_search": key.max_search,
+                "available": key.is_available(now),
+            }
+            for key in self.keys
+        ]
@@ -0,0 +1,195 @@
+import bisect
+import threading
+import typing
+
+from .hooks import RequestEvent
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Counter:
+    """Prometheus style counter with labels"""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), value: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def get(self, labels: tuple = ()) -> float:
+        return self.values.get(labels, 0)
+
+    def render(self, label_names: tuple) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{format_labels(label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Prometheus style histogram with labels"""
+
+    def __init__(self, name: str, help: str, buckets: typing.Sequence[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                # Bucket counts, then +Inf count and sum
+                counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def count(self, labels: tuple) -> int:
+        counts = self.values.get(labels)
+        return sum(counts[:-1]) if counts else 0
+
+    def render(self, label_names: tuple) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, counts in sorted(self.values.items()):
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                bucket_labels = format_labels(label_names + ("le",), labels + (bound,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {total}")
+            lines.append(
+                f"{self.name}_sum{format_labels(label_names, labels)} {counts[-1]}"
+            )
+            lines.append(
+                f"{self.name}_count{format_labels(label_names, labels)} {total}"
+            )
+        return lines
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metrics:
+    """Counters and histograms per route fed by the client hooks
+
+    metrics = Metrics().install(client)
+    print(metrics.render())
+    """
+
+    def __init__(self, prefix: str = "criminalip"):
+        self.requests = Counter(f"{prefix}_requests_total", "HTTP requests")
+        self.errors = Counter(f"{prefix}_errors_total", "Failed requests")
+        self.cache_hits = Counter(f"{prefix}_cache_hits_total", "Cache hits")
+        self.retries = Counter(f"{prefix}_retries_total", "Retried requests")
+        self.latency = Histogram(
+            f"{prefix}_request_duration_seconds", "Request latency", LATENCY_BUCKETS
+        )
+        self.ttfb = Histogram(
+            f"{prefix}_ttfb_seconds", "Time to the response headers", LATENCY_BUCKETS
+        )
+        self.decode = Histogram(
+            f"{prefix}_decode_seconds", "JSON decoding time", LATENCY_BUCKETS
+        )
+        self.response_bytes = Histogram(
+            f"{prefix}_response_bytes", "Response body size", SIZE_BUCKETS
+        )
+
+    def install(self, client) -> "Metrics":
+        client.add_hook("after_response", self.on_response)
+        client.add_hook("on_error", self.on_error)
+        return self
+
+    def uninstall(self, client):
+        client.remove_hook("after_response", self.on_response)
+        client.remove_hook("on_error", self.on_error)
+
+    def on_response(self, event: RequestEvent):
+        route = (event.route,)
+        if event.cached:
+            self.cache_hits.inc(route)
+            return
+        self.observe(event)
+
+    def on_error(self, event: RequestEvent):
+        self.errors.inc((event.route, type(event.error).__name__))
+        self.observe(event)
+
+    def observe(self, event: RequestEvent):
+        route = (event.route,)
+        self.requests.inc((event.route, str(event.status_code)))
+        if event.attempt:
+            self.retries.inc(route)
+        timings = event.timings
+        self.latency.observe(route, timings["total"])
+        if "ttfb" in timings:
+            self.ttfb.observe(route, timings["ttfb"])
+        if "decode" in timings:
+            self.decode.observe(route, timings["decode"])
+        if event.status_code is not None:
+            self.response_bytes.observe(route, event.response_bytes)
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text format"""
+        lines = []
+        lines += self.requests.render(("route", "status"))
+        lines += self.errors.render(("route", "error"))
+        lines += self.cache_hits.render(("route",))
+        lines += self.retries.render(("route",))
+        for histogram in (self.latency, self.ttfb, self.decode, self.response_bytes):
+            lines += histogram.render(("route",))
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryHook:
+    """Export a span per request with OpenTelemetry
+
+    It requires `opentelemetry-api`, the spans are sent by the configured
+    tracer provider.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            from opentelemetry import trace
+
+            tracer = trace.get_tracer("criminalip")
+        self.tracer = tracer
+
+    def install(self, client) -> "OpenTelemetryHook":
+        client.add_hook("before_request", self.on_request)
+        client.add_hook("after_response", self.on_response)
+        client.add_hook("on_error", self.on_response)
+        return self
+
+    def on_request(self, event: RequestEvent):
+        span = self.tracer.start_span(
+            f"criminalip {event.route}",
+            attributes={
+                "http.request.method": event.method,
+                "url.full": event.url,
+                "criminalip.route": event.route,
+                "criminalip.attempt": event.attempt,
+            },
+        )
+        event.context["span"] = span
+
+    def on_response(self, event: RequestEvent):
+        span = event.context.pop("span", None)
+        if span is None:
+            return
+        if event.status_code is not None:
+            span.set_attribute("http.response.status_code", event.status_code)
+            span.set_attribute("http.response.body.size", event.response_bytes)
+        for name, seconds in event.timings.items():
+            span.set_attribute(f"criminalip.timing.{name}", seconds)
+        if event.error is not None:
+            span.record_exception(event.error)
+        span.end()
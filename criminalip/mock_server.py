@@ -0,0 +1,416 @@
+"""Local stand-in for the CriminalIP API
+
+It answers every route of `CriminalIP` with generated responses, or with
+recorded ones given per route name, e.g.
+
+    with MockServer(latency=0.01, error_rate=0.05) as server:
+        client = CriminalIP(server.url, "api_key")
+        client.ip_summary("1.1.1.1")
+"""
+
+import collections
+import gzip
+import json
+import random
+import re
+import socket
+import threading
+import time
+import typing
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def iter_routes(client_class) -> typing.Iterator[tuple[str, typing.Any]]:
+    """Yield the name and the RequestRoute of the endpoints of a client class"""
+    for name in dir(client_class):
+        route = getattr(getattr(client_class, name), "route", None)
+        if route is not None:
+            yield name, route
+
+
+def ip_address(n: int) -> str:
+    return f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+
+
+def port(n: int) -> dict[str, typing.Any]:
+    return {
+        "app_name": "OpenSSH",
+        "app_version": "8.9",
+        "banner": "SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.1" * 4,
+        "confirmed_time": "2023-01-01 00:00:00",
+        "open_port_no": 22 + n,
+        "port_status": "open",
+        "protocol": "tcp",
+        "socket": "tcp",
+        "is_vulnerability": n % 2 == 0,
+    }
+
+
+def vulnerability(n: int) -> dict[str, typing.Any]:
+    return {
+        "cve_id": f"CVE-2023-{1000 + n}",
+        "cve_description": "Description of the vulnerability " * 8,
+        "cvssv2_score": 5.0,
+        "cvssv3_score": 7.5,
+        "app_name": "OpenSSH",
+        "app_version": "8.9",
+    }
+
+
+def banner(n: int) -> dict[str, typing.Any]:
+    return {
+        "ip_address": ip_address(n),
+        "open_port_no": 22,
+        "as_name": "EXAMPLE-AS",
+        "country": "US",
+        "city": "Seattle",
+        "product": "OpenSSH",
+        "score": "Low",
+        "banner": "SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.1" * 4,
+        "scan_dtime": "2023-01-01 00:00:00",
+    }
+
+
+def exploit(n: int) -> dict[str, typing.Any]:
+    return {
+        "cve_id": [f"CVE-2006-{5911 + n}"],
+        "edb_id": 1000 + n,
+        "title": "Example exploit",
+        "author": "example",
+        "platform": "linux",
+        "type": "remote",
+        "edb_reg_date": "2006-11-14",
+    }
+
+
+def page(items, total: int) -> dict[str, typing.Any]:
+    return {"status": 200, "data": {"count": total, "result": items}}
+
+
+class Fixtures:
+    """Generated responses per route name
+
+    :param payload_size: Number of items of the lists, e.g. the ports of
+        ip_report or the banners of a banner_search page.
+    :param total_results: Total count of the paginated results.
+    """
+
+    def __init__(self, payload_size: int = 10, total_results: int = 100):
+        self.payload_size = payload_size
+        self.total_results = total_results
+
+    def items(self, factory, offset: int = 0) -> list:
+        end = min(self.total_results, offset + self.payload_size)
+        return [factory(n) for n in range(offset, end)]
+
+    def get_user(self, params, path_args):
+        return {
+            "status": 200,
+            "data": {
+                "account_type": "free",
+                "api_key": "api_key",
+                "email": "user@example.com",
+                "last_access_date": "2023-01-01",
+                "max_search": "100",
+                "membership_date": "2023-01-01",
+                "name": "user",
+            },
+        }
+
+    def ip_report(self, params, path_args):
+        size = self.payload_size
+        return {
+            "ip": params.get("ip"),
+            "score": {"inbound": "Safe", "outbound": "Low"},
+            "issues": {"is_vpn": False, "is_proxy": False, "is_scanner": True},
+            "user_search_count": 1,
+            "whois": {
+                "count": 1,
+                "data": [{"as_name": "EXAMPLE-AS", "as_no": 64500}],
+            },
+            "port": {"count": size, "data": [port(n) for n in range(size)]},
+            "vulnerability": {
+                "count": size,
+                "data": [vulnerability(n) for n in range(size)],
+            },
+            "status": 200,
+        }
+
+    def ip_summary(self, params, path_args):
+        return {
+            "ip": params.get("ip"),
+            "score": {"inbound": "Safe", "outbound": "Low"},
+            "country": "United States",
+            "country_code": "us",
+            "city": "Seattle",
+            "isp": "EXAMPLE",
+            "org_name": "EXAMPLE",
+            "as_no": 64500,
+            "status": 200,
+        }
+
+    def ip_malicious_info(self, params, path_args):
+        return {
+            "ip": params.get("ip"),
+            "is_malicious": False,
+            "is_vpn": False,
+            "can_remote_access": True,
+            "current_opened_port": {
+                "count": self.payload_size,
+                "data": [
+                    {"port": 22 + n, "protocol": "tcp", "socket_type": "tcp"}
+                    for n in range(self.payload_size)
+                ],
+            },
+            "vulnerability": {"count": 0, "data": []},
+            "status": 200,
+        }
+
+    def ip_vpn(self, params, path_args):
+        return {"ip": params.get("ip"), "is_vpn": False, "status": 200}
+
+    def ip_hosting(self, params, path_args):
+        return {"ip": params.get("ip"), "is_hosting": False, "status": 200}
+
+    def ip_privacy_threat(self, params, path_args):
+        return {"ip": params.get("ip"), "is_tor": False, "status": 200}
+
+    def is_safe_dns_server(self, params, path_args):
+        return {"ip": params.get("ip"), "is_safe_dns_server": True, "status": 200}
+
+    def ip_suspicious_info(self, params, path_args):
+        return {
+            "ip": params.get("ip"),
+            "score": {"inbound": "Safe", "outbound": "Safe"},
+            "abuse_record_count": 0,
+            "current_opened_port": {
+                "count": self.payload_size,
+                "data": [
+                    {"port": 22 + n, "protocol": "tcp", "socket_type": "tcp"}
+                    for n in range(self.payload_size)
+                ],
+            },
+            "ids": {"count": 0, "data": []},
+            "issues": {
+                "is_vpn": False,
+                "is_proxy": False,
+                "is_cloud": False,
+                "is_tor": False,
+                "is_hosting": False,
+                "is_mobile": False,
+                "is_darkweb": False,
+                "is_scanner": False,
+                "is_snort": False,
+                "is_anonymous_vpn": False,
+            },
+            "representative_domain": "",
+            "whois": {"count": 0, "data": []},
+            "status": 200,
+        }
+
+    def banner_search(self, params, path_args):
+        offset = int(params.get("offset", 0))
+        return page(self.items(banner, offset), self.total_results)
+
+    def banner_stats(self, params, path_args):
+        return {
+            "status": 200,
+            "data": {
+                "result": {"as_name_agg": [{"as_name": "EXAMPLE-AS", "count": 1}]}
+            },
+        }
+
+    def search_exploit(self, params, path_args):
+        offset = int(params.get("offset", 0))
+        return page(self.items(exploit, offset), self.total_results)
+
+    def domain_scan(self, params, path_args):
+        return {"status": 200, "data": {"scan_id": 1234}}
+
+    domain_private_scan = domain_scan
+
+    def domain_reports(self, params, path_args):
+        offset = int(params.get("offset", 0))
+        reports = self.items(
+            lambda n: {"reg_dtime": "2023-01-01", "scan_id": n, "countries": ["US"]},
+            offset,
+        )
+        return {
+            "status": 200,
+            "data": {"count": self.total_results, "reports": reports},
+        }
+
+    scan_history = domain_reports
+
+    def domain_report(self, params, path_args):
+        return {
+            "status": 200,
+            "data": {"scan_id": path_args.get("scan_id"), "certificates": []},
+        }
+
+    domain_lite_report = domain_report
+
+    def domain_scan_status(self, params, path_args):
+        return {"status": 200, "data": {"scan_percentage": 100}}
+
+    domain_lite_progress = domain_scan_status
+
+    def domain_lite_scan(self, params, path_args):
+        return {"status": 200, "data": {"scan_id": 5678}}
+
+    def check_domain(self, params, path_args):
+        return {"status": 200, "data": {"domain": params.get("domain")}}
+
+    def check_domain_malicious(self, params, path_args):
+        return {
+            "status": 200,
+            "data": {"domain": params.get("domain"), "is_malicious": False},
+        }
+
+    def check_domain_trusted(self, params, path_args):
+        return {
+            "status": 200,
+            "data": {"domain": params.get("domain"), "is_trusted": True},
+        }
+
+
+class MockServer:
+    """Local HTTP server answering the routes of `client_class`
+
+    Args:
+        latency (float): seconds to wait before every response [default: 0]
+        error_rate (float): ratio of 503 responses [default: 0]
+        payload_size (int): number of items of the lists [default: 10]
+        total_results (int): total count of paginated results [default: 100]
+        responses (dict[str, Any]): recorded responses per route name,
+            they replace the generated ones
+        client_class (type): client whose routes are served [default: CriminalIP]
+        limited_keys (Iterable[str]): API keys answered with 429
+        seed (int): seed of the error generator
+        compression (bool): gzip the responses of the clients accepting it
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        payload_size: int = 10,
+        total_results: int = 100,
+        responses: typing.Optional[dict[str, typing.Any]] = None,
+        client_class: typing.Optional[type] = None,
+        seed: typing.Optional[int] = None,
+        limited_keys: typing.Iterable[str] = (),
+        host: str = "127.0.0.1",
+        port: int = 0,
+        compression: bool = False,
+    ):
+        if client_class is None:
+            from .crimial_ip import CriminalIP
+
+            client_class = CriminalIP
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fixtures = Fixtures(payload_size, total_results)
+        self.responses = {
+            name: json.dumps(body).encode() for name, body in (responses or {}).items()
+        }
+        self.random = random.Random(seed)
+        self.limited_keys = set(limited_keys)
+        self.compression = compression
+        self.requests = 0
+        self.connections = 0
+        self.requests_per_key = collections.Counter()
+        # The counters are updated by the handler threads
+        self._lock = threading.Lock()
+        self.routes = []
+        for name, route in iter_routes(client_class):
+            pattern = re.sub(
+                r"\\{(\w+)\\}", r"(?P<\1>[^/]+)", re.escape(route.template)
+            )
+            self.routes.append((route.method, re.compile(f"/{pattern}$"), name))
+        self.httpd = ThreadingHTTPServer((host, port), self.handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+                # Headers and body are written apart, don't wait for the ACK
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle_route(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                status, body = server.respond(
+                    self.command, self.path, self.headers.get("x-api-key")
+                )
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                accept = self.headers.get("Accept-Encoding") or ""
+                if server.compression and "gzip" in accept:
+                    body = gzip.compress(body)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_route
+
+        return Handler
+
+    def respond(
+        self, method: str, target: str, api_key: typing.Optional[str] = None
+    ) -> tuple[int, bytes]:
+        with self._lock:
+            self.requests += 1
+            self.requests_per_key[api_key] += 1
+        if api_key in self.limited_keys:
+            return 429, b'{"status": 429, "message": "Limit exceeded"}'
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return 503, b'{"status": 503, "message": "Service Unavailable"}'
+        url = urllib.parse.urlsplit(target)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        for route_method, pattern, name in self.routes:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                if name in self.responses:
+                    return 200, self.responses[name]
+                body = getattr(self.fixtures, name)(params, match.groupdict())
+                return 200, json.dumps(body).encode()
+        return 404, b'{"status": 404, "message": "Not Found"}'
+
+    def start(self) -> "MockServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
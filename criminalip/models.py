@@ -0,0 +1,224 @@
+import typing
+
+
+class Field:
+    """Read a value of the raw data, following the keys of `path`
+
+    A missing value is `default`, or a new `factory()` for the mutable ones.
+    """
+
+    __slots__ = ("path", "default", "factory")
+
+    def __init__(
+        self,
+        *path: str,
+        default: typing.Any = None,
+        factory: typing.Optional[typing.Callable[[], typing.Any]] = None,
+    ):
+        self.path = path
+        self.default = default
+        self.factory = factory
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = obj
+        for key in self.path:
+            if not isinstance(value, dict) or key not in value:
+                return self.default if self.factory is None else self.factory()
+            value = value[key]
+        return value
+
+
+class Section:
+    """Parse a nested section into models on first access
+
+    The section is either a `{"count": ..., "data": [...]}` dict or a list.
+    """
+
+    __slots__ = ("path", "model", "name")
+
+    def __init__(self, *path: str, model: typing.Type["Model"]):
+        self.path = path
+        self.model = model
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        cache = obj._cache
+        if cache is None:
+            cache = obj._cache = {}
+        try:
+            return cache[self.name]
+        except KeyError:
+            pass
+        value = obj
+        for key in self.path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if isinstance(value, dict):
+            value = value.get("data")
+        items = tuple(self.model(item) for item in value or ())
+        cache[self.name] = items
+        return items
+
+
+class Model(dict):
+    """API result with typed attributes
+
+    It's the dict of the raw result, so `result["ip"]`, `json.dumps(result)`
+    and `isinstance(result, dict)` keep working. The fields are read from it
+    when accessed and the nested sections are parsed on first access.
+    """
+
+    __slots__ = ("_cache",)
+
+    def __init__(self, data: typing.Optional[dict[str, typing.Any]]):
+        super().__init__(data if isinstance(data, dict) else ())
+        self._cache = None
+
+    @classmethod
+    def map_model(cls, data):
+        return cls(data)
+
+    @property
+    def raw(self) -> dict[str, typing.Any]:
+        """Raw result of the API"""
+        return dict(self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict.__repr__(self)})"
+
+
+class Whois(Model):
+    __slots__ = ()
+    as_name = Field("as_name")
+    as_no = Field("as_no")
+    org_name = Field("org_name")
+    country_code = Field("org_country_code")
+    city = Field("city")
+    confirmed_time = Field("confirmed_time")
+
+
+class Port(Model):
+    __slots__ = ()
+    port = Field("open_port_no")
+    protocol = Field("protocol")
+    socket = Field("socket")
+    status = Field("port_status")
+    app_name = Field("app_name")
+    app_version = Field("app_version")
+    banner = Field("banner")
+    is_vulnerability = Field("is_vulnerability")
+    confirmed_time = Field("confirmed_time")
+
+
+class Vulnerability(Model):
+    __slots__ = ()
+    cve_id = Field("cve_id")
+    description = Field("cve_description")
+    cvssv2_score = Field("cvssv2_score")
+    cvssv3_score = Field("cvssv3_score")
+    app_name = Field("app_name")
+    app_version = Field("app_version")
+
+
+class OpenedPort(Model):
+    __slots__ = ()
+    port = Field("port")
+    protocol = Field("protocol")
+    socket_type = Field("socket_type")
+    product_name = Field("product_name")
+    product_version = Field("product_version")
+    has_vulnerability = Field("has_vulnerability")
+    confirmed_time = Field("confirmed_time")
+
+
+class IPReport(Model):
+    """Result of `CriminalIP.ip_report`"""
+
+    __slots__ = ()
+    ip = Field("ip")
+    score_inbound = Field("score", "inbound")
+    score_outbound = Field("score", "outbound")
+    issues = Field("issues", factory=dict)
+    is_vpn = Field("issues", "is_vpn")
+    is_proxy = Field("issues", "is_proxy")
+    is_tor = Field("issues", "is_tor")
+    is_hosting = Field("issues", "is_hosting")
+    is_scanner = Field("issues", "is_scanner")
+    user_search_count = Field("user_search_count")
+    whois = Section("whois", model=Whois)
+    ports = Section("port", model=Port)
+    vulnerabilities = Section("vulnerability", model=Vulnerability)
+
+
+class IPSummary(Model):
+    """Result of `CriminalIP.ip_summary`"""
+
+    __slots__ = ()
+    ip = Field("ip")
+    score_inbound = Field("score", "inbound")
+    score_outbound = Field("score", "outbound")
+    country = Field("country")
+    country_code = Field("country_code")
+    region = Field("region")
+    city = Field("city")
+    isp = Field("isp")
+    org_name = Field("org_name")
+    as_no = Field("as_no")
+
+
+class IPMaliciousInfo(Model):
+    """Result of `CriminalIP.ip_malicious_info`"""
+
+    __slots__ = ()
+    ip = Field("ip")
+    is_malicious = Field("is_malicious")
+    is_vpn = Field("is_vpn")
+    can_remote_access = Field("can_remote_access")
+    remote_ports = Section("remote_port", model=OpenedPort)
+    opened_ports = Section("current_opened_port", model=OpenedPort)
+    vulnerabilities = Section("vulnerability", model=Vulnerability)
+
+
+class Banner(Model):
+    __slots__ = ()
+    ip = Field("ip_address")
+    port = Field("open_port_no")
+    as_name = Field("as_name")
+    country = Field("country")
+    city = Field("city")
+    product = Field("product")
+    score = Field("score")
+    banner = Field("banner")
+    scan_dtime = Field("scan_dtime")
+
+
+class Exploit(Model):
+    __slots__ = ()
+    cve_id = Field("cve_id", factory=list)
+    edb_id = Field("edb_id")
+    title = Field("title")
+    author = Field("author")
+    platform = Field("platform")
+    type = Field("type")
+    published_date = Field("edb_reg_date")
+
+
+class BannerSearch(Model):
+    """Result of `CriminalIP.banner_search`"""
+
+    __slots__ = ()
+    count = Field("data", "count")
+    banners = Section("data", "result", model=Banner)
+
+
+class ExploitSearch(Model):
+    """Result of `CriminalIP.search_exploit`"""
+
+    __slots__ = ()
+    count = Field("data", "count")
+    exploits = Section("data", "result", model=Exploit)
@@ -0,0 +1,126 @@
+import io
+import mimetypes
+import os
+import typing
+import uuid
+
+CRLF = b"\r\n"
+
+
+class MultipartEncoder:
+    """Stream a multipart/form-data body without loading the files
+
+    The body is read in chunks from the file objects, and sliced without
+    copy from bytes or memory-mapped files. Its length is known upfront,
+    so it's sent with a Content-Length instead of chunked.
+
+    :param fields: Dictionary of name and value, the value is bytes, str,
+        a file-like object, an mmap, or a tuple of (filename, value) or
+        (filename, value, content_type) like `requests` files.
+    :param boundary: Boundary of the parts, random if not given.
+    :param chunk_size: Size of the chunks read from the files.
+    """
+
+    def __init__(
+        self,
+        fields: typing.Union[dict[str, typing.Any], list[tuple[str, typing.Any]]],
+        boundary: typing.Optional[str] = None,
+        chunk_size: int = 65536,
+    ):
+        self.boundary = boundary or uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.chunk_size = chunk_size
+        self.parts = []
+        items = fields.items() if isinstance(fields, dict) else fields
+        for name, value in items:
+            filename, content_type = None, None
+            if isinstance(value, tuple):
+                filename, value, *rest = value
+                content_type = rest[0] if rest else None
+            elif hasattr(value, "read"):
+                filename = os.path.basename(getattr(value, "name", name) or name)
+            if isinstance(value, str):
+                value = value.encode()
+            if filename and not content_type:
+                content_type = (
+                    mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                )
+            start = value.tell() if hasattr(value, "read") else 0
+            self.parts.append(
+                (self.part_header(name, filename, content_type), value, start)
+            )
+        self.footer = f"--{self.boundary}--".encode() + CRLF
+        self.length = sum(
+            len(header) + self.body_length(value, start) + len(CRLF)
+            for header, value, start in self.parts
+        ) + len(self.footer)
+        self.reset()
+
+    def part_header(self, name, filename, content_type) -> bytes:
+        disposition = f'form-data; name="{name}"'
+        if filename:
+            disposition += f'; filename="{filename}"'
+        lines = [f"--{self.boundary}", f"Content-Disposition: {disposition}"]
+        if content_type:
+            lines.append(f"Content-Type: {content_type}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    @staticmethod
+    def body_length(value, start: int) -> int:
+        if not hasattr(value, "read") or hasattr(value, "__len__"):
+            # bytes, bytearray, memoryview and mmap
+            return len(value)
+        try:
+            return os.fstat(value.fileno()).st_size - start
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            end = value.seek(0, io.SEEK_END)
+            value.seek(start)
+            return end - start
+
+    def __len__(self) -> int:
+        return self.length
+
+    def reset(self):
+        """Rewind the files to send the body again, e.g. on a retry"""
+        for _, value, start in self.parts:
+            if hasattr(value, "seek") and not hasattr(value, "__len__"):
+                value.seek(start)
+        self._chunks = self.iter_chunks()
+        self._buffer = b""
+
+    def iter_chunks(self) -> typing.Iterator[typing.Union[bytes, memoryview]]:
+        for header, value, start in self.parts:
+            yield header
+            if hasattr(value, "read") and not hasattr(value, "__len__"):
+                while True:
+                    chunk = value.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            else:
+                view = memoryview(value)
+                for offset in range(0, len(view), self.chunk_size):
+                    yield view[offset : offset + self.chunk_size]
+            yield CRLF
+        yield self.footer
+
+    def read(self, size: int = -1) -> bytes:
+        """File-like read used by requests to stream the body"""
+        if size is None or size < 0:
+            return self._buffer + b"".join(bytes(chunk) for chunk in self._chunks)
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return bytes(data)
+
+    def __iter__(self) -> typing.Iterator[bytes]:
+        self.reset()
+        for chunk in self._chunks:
+            yield bytes(chunk)
+
+    async def __aiter__(self) -> typing.AsyncIterator[bytes]:
+        for chunk in self:
+            yield chunk
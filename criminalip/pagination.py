@@ -0,0 +1,130 @@
+import asyncio
+import typing
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+ITEM_KEYS = ("result", "reports", "data")
+
+
+def get_items(page: typing.Any) -> list:
+    """Return the list of items of an offset paginated result"""
+    data = page.get("data", page) if isinstance(page, Mapping) else page
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for key in ITEM_KEYS:
+            items = data.get(key)
+            if isinstance(items, list):
+                return items
+    return []
+
+
+def get_count(page: typing.Any) -> typing.Optional[int]:
+    """Return the total number of items if the result has it"""
+    data = page.get("data", page) if isinstance(page, Mapping) else None
+    if isinstance(data, dict):
+        count = data.get("count")
+        if isinstance(count, int):
+            return count
+    return None
+
+
+class Paginator:
+    """Iterate the items of an offset paginated endpoint page by page
+
+    Only the current page, and the next one if `prefetch` is set, are kept
+    in memory.
+
+    Args:
+        fetch (Callable[[int], Any]): endpoint call for the given offset
+        offset (int): first offset [default: 0]
+        max_results (int): stop after this number of items [default: None]
+        prefetch (bool): fetch the next page while the current one is
+            consumed [default: False]
+    """
+
+    def __init__(
+        self,
+        fetch: typing.Callable[[int], typing.Any],
+        offset: int = 0,
+        max_results: typing.Optional[int] = None,
+        prefetch: bool = False,
+    ):
+        self.fetch = fetch
+        self.offset = offset
+        self.max_results = max_results
+        self.prefetch = prefetch
+
+    def next_offset(
+        self, page: typing.Any, offset: int, size: int
+    ) -> typing.Optional[int]:
+        """Return the offset of the next page, None at the end of the data"""
+        offset += size
+        count = get_count(page)
+        if size == 0 or (count is not None and offset >= count):
+            return None
+        return offset
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        remaining = self.max_results
+        offset = self.offset
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        try:
+            page = self.fetch(offset)
+            while True:
+                items = get_items(page)
+                next_offset = self.next_offset(page, offset, len(items))
+                upcoming = None
+                if (
+                    executor is not None
+                    and next_offset is not None
+                    and (remaining is None or remaining > len(items))
+                ):
+                    upcoming = executor.submit(self.fetch, next_offset)
+                page = None
+                for item in items:
+                    if remaining is not None:
+                        if remaining <= 0:
+                            return
+                        remaining -= 1
+                    yield item
+                if next_offset is None or remaining == 0:
+                    return
+                offset = next_offset
+                page = upcoming.result() if upcoming else self.fetch(offset)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    async def __aiter__(self) -> typing.AsyncIterator[typing.Any]:
+        remaining = self.max_results
+        offset = self.offset
+        upcoming = None
+        try:
+            page = await self.fetch(offset)
+            while True:
+                items = get_items(page)
+                next_offset = self.next_offset(page, offset, len(items))
+                if (
+                    self.prefetch
+                    and next_offset is not None
+                    and (remaining is None or remaining > len(items))
+                ):
+                    upcoming = asyncio.ensure_future(self.fetch(next_offset))
+                page = None
+                for item in items:
+                    if remaining is not None:
+                        if remaining <= 0:
+                            return
+                        remaining -= 1
+                    yield item
+                if next_offset is None or remaining == 0:
+                    return
+                offset = next_offset
+                if upcoming is not None:
+                    page, upcoming = await upcoming, None
+                else:
+                    page = await self.fetch(offset)
+        finally:
+            if upcoming is not None:
+                upcoming.cancel()
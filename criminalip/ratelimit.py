@@ -0,0 +1,138 @@
+import threading
+import time
+import typing
+
+
+class TokenBucket:
+    """Thread-safe token bucket usable from threads and asyncio tasks
+
+    Every acquire reserves a token right away and waits for its turn, so the
+    callers are served in order and never retry in a loop.
+
+    :param rate: Tokens refilled per second.
+    :param capacity: Maximum burst, defaults to `rate` (at least 1).
+    """
+
+    def __init__(self, rate: float, capacity: typing.Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, rate) if capacity is None else capacity
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def refill(self):
+        """Add the tokens of the time elapsed, the lock must be held"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it"""
+        with self._lock:
+            self.refill()
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait > 0:
+            import asyncio
+
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds`, e.g. after a 429 response
+
+        The debt of the bucket covers the pause, so the callers queued
+        meanwhile resume spaced at `rate` instead of all at once.
+        """
+        with self._lock:
+            self.refill()
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class RateLimiter:
+    """Token buckets per route group
+
+    The routes are grouped by their path, see `RequestRoute.group`.
+
+    :param rates: Requests per second per group, e.g. {"domain": 0.5}.
+    :param default_rate: Requests per second of the groups not in `rates`,
+        they are not limited if it's None.
+    :param burst: Capacity of the buckets, defaults to the rate.
+    """
+
+    GROUPS = ("ip", "banner", "domain", "exploit")
+
+    def __init__(
+        self,
+        rates: typing.Optional[dict[str, float]] = None,
+        default_rate: typing.Optional[float] = None,
+        burst: typing.Optional[float] = None,
+    ):
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.burst = burst
+        self.buckets: dict[str, typing.Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_group(cls, path: str) -> str:
+        for segment in path.strip("/").split("/"):
+            if segment in cls.GROUPS:
+                return segment
+        return "default"
+
+    def create_bucket(self, group: str) -> typing.Optional[TokenBucket]:
+        rate = self.rates.get(group, self.default_rate)
+        if rate is None:
+            return None
+        return TokenBucket(rate, self.burst)
+
+    def bucket(self, group: str) -> typing.Optional[TokenBucket]:
+        try:
+            return self.buckets[group]
+        except KeyError:
+            with self._lock:
+                if group not in self.buckets:
+                    self.buckets[group] = self.create_bucket(group)
+                return self.buckets[group]
+
+    def acquire(self, group: str):
+        bucket = self.bucket(group)
+        if bucket is not None:
+            bucket.acquire()
+
+    async def acquire_async(self, group: str):
+        bucket = self.bucket(group)
+        if bucket is not None:
+            await bucket.acquire_async()
+
+    def penalize(self, group: str, seconds: float):
+        bucket = self.bucket(group)
+        if bucket is not None:
+            bucket.pause(seconds)
+
+
+def parse_retry_after(value: typing.Optional[str]) -> typing.Optional[float]:
+    """Parse the Retry-After header, in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    import email.utils
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
@@ -0,0 +1,125 @@
+import collections
+import random
+import sys
+import threading
+import time
+import typing
+
+from .exceptions import CIPLimitExcceed, CIPRequestError
+
+IDEMPOTENT_METHODS = frozenset(["GET", "PUT", "DELETE"])
+
+
+class RetryBudget:
+    """Global budget of retries shared by all the routes
+
+    It refills `rate` retries per second up to `capacity`, so an outage
+    doesn't multiply the load with retries.
+    """
+
+    def __init__(self, rate: float = 1.0, capacity: float = 10.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """Retry the transient failures with exponential backoff and full jitter
+
+    Connection errors, timeouts and the statuses of `status_forcelist` are
+    retried for the idempotent methods, or the routes created with
+    `RequestRoute(..., retry=True)`.
+
+    :param total: Maximum retries per call.
+    :param backoff_factor: Base delay in seconds, doubled on every attempt.
+    :param max_backoff: Maximum delay in seconds.
+    :param jitter: Pick a random delay between 0 and the backoff.
+    :param status_forcelist: HTTP statuses to retry.
+    :param routes: Maximum retries per route name, e.g. {"ip_report": 5}.
+    :param budget: `RetryBudget` shared by the routes, unlimited if None.
+    """
+
+    def __init__(
+        self,
+        total: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        jitter: bool = True,
+        status_forcelist: typing.Iterable[int] = (429, 500, 502, 503, 504),
+        routes: typing.Optional[dict[str, int]] = None,
+        budget: typing.Optional[RetryBudget] = None,
+    ):
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_forcelist = frozenset(status_forcelist)
+        self.routes = dict(routes or {})
+        self.budget = budget
+        self.retries = collections.Counter()
+        self.exhausted = collections.Counter()
+        self._lock = threading.Lock()
+
+    def is_retryable_error(self, error: Exception) -> bool:
+        if isinstance(error, CIPLimitExcceed):
+            return 429 in self.status_forcelist
+        if isinstance(error, CIPRequestError):
+            return error.status_code in self.status_forcelist
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            return True
+        # The transports are checked only once the client has loaded them
+        requests = sys.modules.get("requests")
+        if requests is not None and isinstance(
+            error, (requests.ConnectionError, requests.Timeout)
+        ):
+            return True
+        httpx = sys.modules.get("httpx")
+        return httpx is not None and isinstance(error, httpx.TransportError)
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff_factor * (2**attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def get_delay(
+        self, route, attempt: int, error: Exception
+    ) -> typing.Optional[float]:
+        """Return the delay before the next attempt, or None to raise the error"""
+        if route.retryable is False:
+            return None
+        if route.retryable is None and route.method not in IDEMPOTENT_METHODS:
+            return None
+        if not self.is_retryable_error(error):
+            return None
+        # The bulk threads share the policy and its budget
+        with self._lock:
+            if attempt >= self.routes.get(route.name, self.total) or (
+                self.budget is not None and not self.budget.withdraw()
+            ):
+                self.exhausted[route.name] += 1
+                return None
+            self.retries[route.name] += 1
+        delay = self.backoff(attempt)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {"retries": dict(self.retries), "exhausted": dict(self.exhausted)}
@@ -0,0 +1,234 @@
+import asyncio
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .exceptions import CIPException
+
+
+@dataclass
+class ScanResult:
+    """Result of a domain scan, `error` is set if the scan failed"""
+
+    query: str
+    scan_id: typing.Any = None
+    report: typing.Any = None
+    error: typing.Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class PendingScan:
+    __slots__ = (
+        "result",
+        "percentage",
+        "polled_at",
+        "next_poll",
+        "interval",
+        "deadline",
+    )
+
+    def __init__(self, result: ScanResult, interval: float, timeout: float):
+        now = time.monotonic()
+        self.result = result
+        self.percentage = 0
+        self.polled_at = now
+        self.next_poll = now + interval
+        self.interval = interval
+        self.deadline = now + timeout
+
+
+def get_data(result: typing.Any, key: str) -> typing.Any:
+    """Return `key` of the `data` of the API result"""
+    if isinstance(result, dict):
+        data = result.get("data", result)
+        if isinstance(data, dict):
+            return data.get(key)
+    return result
+
+
+class DomainScanner:
+    """Run many domain scans and poll all the pending scans together
+
+    The next poll of every scan is scheduled from its progress rate, so fast
+    scans are fetched early and slow ones are polled less often.
+
+    Args:
+        client (CriminalIP): client to run the scans with
+        lite (bool): use the lite scan endpoints [default: False]
+        interval (float): first poll delay in seconds [default: 2]
+        max_interval (float): maximum poll delay in seconds [default: 30]
+        backoff (float): delay multiplier without progress [default: 1.5]
+        timeout (float): seconds before giving up a scan [default: 600]
+        concurrency (int): number of concurrent requests [default: 8]
+    """
+
+    def __init__(
+        self,
+        client,
+        lite: bool = False,
+        interval: float = 2.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        timeout: float = 600.0,
+        concurrency: int = 8,
+    ):
+        self.client = client
+        self.lite = lite
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.concurrency = concurrency
+        if lite:
+            self.submit_endpoint = client.domain_lite_scan
+            self.status_endpoint = client.domain_lite_progress
+            self.report_endpoint = client.domain_lite_report
+        else:
+            self.submit_endpoint = client.domain_scan
+            self.status_endpoint = client.domain_scan_status
+            self.report_endpoint = client.domain_report
+
+    def reschedule(self, scan: PendingScan, percentage: typing.Any):
+        """Set the next poll from the progress since the last poll"""
+        now = time.monotonic()
+        percentage = percentage if isinstance(percentage, (int, float)) else 0
+        progress = percentage - scan.percentage
+        if progress > 0:
+            eta = (100 - percentage) * (now - scan.polled_at) / progress
+            scan.interval = min(self.max_interval, max(self.interval, eta))
+        else:
+            scan.interval = min(self.max_interval, scan.interval * self.backoff)
+        scan.percentage = percentage
+        scan.polled_at = now
+        scan.next_poll = now + scan.interval
+
+    def check(self, scan: PendingScan, status: typing.Any) -> typing.Optional[bool]:
+        """Return True if the scan is done, None if it failed"""
+        if isinstance(status, Exception):
+            scan.result.error = status
+            return None
+        percentage = get_data(status, "scan_percentage")
+        if isinstance(percentage, (int, float)) and percentage >= 100:
+            return True
+        if time.monotonic() >= scan.deadline:
+            scan.result.error = CIPException(
+                f"Scan {scan.result.scan_id} timed out at {percentage}%"
+            )
+            return None
+        self.reschedule(scan, percentage)
+        return False
+
+    def submit(self, query: str) -> ScanResult:
+        result = ScanResult(query)
+        try:
+            result.scan_id = get_data(self.submit_endpoint(query), "scan_id")
+        except Exception as e:
+            result.error = e
+        return result
+
+    def poll(self, scan: PendingScan) -> typing.Any:
+        try:
+            return self.status_endpoint(scan.result.scan_id)
+        except Exception as e:
+            return e
+
+    def report(self, result: ScanResult) -> ScanResult:
+        try:
+            result.report = self.report_endpoint(result.scan_id)
+        except Exception as e:
+            result.error = e
+        return result
+
+    def scan(self, queries: typing.Iterable[str]) -> typing.Iterator[ScanResult]:
+        """Submit the scans and yield the results as they complete"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = []
+            for result in executor.map(self.submit, queries):
+                if result.ok:
+                    pending.append(PendingScan(result, self.interval, self.timeout))
+                else:
+                    yield result
+
+            while pending:
+                next_poll = min(scan.next_poll for scan in pending)
+                time.sleep(max(0.0, next_poll - time.monotonic()))
+                now = time.monotonic()
+                due = [scan for scan in pending if scan.next_poll <= now]
+                pending = [scan for scan in pending if scan.next_poll > now]
+
+                done = []
+                for scan, status in zip(due, executor.map(self.poll, due)):
+                    state = self.check(scan, status)
+                    if state is None:
+                        yield scan.result
+                    elif state:
+                        done.append(scan.result)
+                    else:
+                        pending.append(scan)
+                yield from executor.map(self.report, done)
+
+    async def asubmit(self, query: str) -> ScanResult:
+        result = ScanResult(query)
+        try:
+            result.scan_id = get_data(await self.submit_endpoint(query), "scan_id")
+        except Exception as e:
+            result.error = e
+        return result
+
+    async def apoll(self, scan: PendingScan) -> typing.Any:
+        try:
+            return await self.status_endpoint(scan.result.scan_id)
+        except Exception as e:
+            return e
+
+    async def areport(self, result: ScanResult) -> ScanResult:
+        try:
+            result.report = await self.report_endpoint(result.scan_id)
+        except Exception as e:
+            result.error = e
+        return result
+
+    async def ascan(
+        self, queries: typing.Iterable[str]
+    ) -> typing.AsyncIterator[ScanResult]:
+        """Asyncio version of `scan` for AsyncCriminalIP"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        pending = []
+        for result in await asyncio.gather(
+            *(bounded(self.asubmit(query)) for query in queries)
+        ):
+            if result.ok:
+                pending.append(PendingScan(result, self.interval, self.timeout))
+            else:
+                yield result
+
+        while pending:
+            next_poll = min(scan.next_poll for scan in pending)
+            await asyncio.sleep(max(0.0, next_poll - time.monotonic()))
+            now = time.monotonic()
+            due = [scan for scan in pending if scan.next_poll <= now]
+            pending = [scan for scan in pending if scan.next_poll > now]
+
+            statuses = await asyncio.gather(
+                *(bounded(self.apoll(scan)) for scan in due)
+            )
+            done = []
+            for scan, status in zip(due, statuses):
+                state = self.check(scan, status)
+                if state is None:
+                    yield scan.result
+                elif state:
+                    done.append(bounded(self.areport(scan.result)))
+                else:
+                    pending.append(scan)
+            for report in asyncio.as_completed(done):
+                yield await report
@@ -0,0 +1,241 @@
+import collections
+import contextlib
+import contextvars
+import threading
+import time
+import typing
+
+from .exceptions import ApiClientException, CIPDeadlineExceeded
+
+# (class name, deadline) of the requests of the current thread or task
+PRIORITY: contextvars.ContextVar[typing.Optional[tuple]] = contextvars.ContextVar(
+    "criminalip_priority", default=None
+)
+
+
+@contextlib.contextmanager
+def priority(name: str, deadline: typing.Optional[float] = None):
+    """Send the requests of the block with the priority class `name`
+
+    The worker threads of `bulk_lookup` and the asyncio tasks inherit it.
+
+    :param deadline: Seconds a request may wait for a slot, overrides the
+        deadline of the class.
+    """
+    token = PRIORITY.set((name, deadline))
+    try:
+        yield
+    finally:
+        PRIORITY.reset(token)
+
+
+def batch_class(scheduler: typing.Optional["Scheduler"]) -> str:
+    """Priority class of the bulk jobs of a client"""
+    return "batch" if scheduler is None else scheduler.batch
+
+
+def default_context(name: str = "batch") -> contextvars.Context:
+    """Copy of the current context with the priority `name` unless one is
+    set, to run the workers of the bulk jobs
+    """
+    context = contextvars.copy_context()
+    if context.get(PRIORITY) is None:
+        context.run(PRIORITY.set, (name, None))
+    return context
+
+
+class PriorityClass:
+    """Priority class of a `Scheduler`
+
+    :param rank: Order of the classes, the lowest rank is served first.
+    :param concurrency: Maximum number of requests of the class in flight.
+    :param deadline: Seconds a request may wait for a slot before failing
+        with `CIPDeadlineExceeded`, it waits as long as needed if None.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rank: int,
+        concurrency: typing.Optional[int] = None,
+        deadline: typing.Optional[float] = None,
+    ):
+        self.name = name
+        self.rank = rank
+        self.concurrency = concurrency
+        self.deadline = deadline
+
+
+class Ticket:
+    __slots__ = ("name", "deadline", "queued", "granted", "event", "future", "loop")
+
+    def __init__(self, name: str, deadline: typing.Optional[float]):
+        self.name = name
+        self.deadline = deadline
+        self.queued = time.monotonic()
+        self.granted = False
+        self.event = None
+        self.future = None
+        self.loop = None
+
+    def grant(self):
+        self.granted = True
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(self.resolve)
+        else:
+            self.event.set()
+
+    def resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+    def timeout(self) -> typing.Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.queued + self.deadline - time.monotonic())
+
+
+class Scheduler:
+    """Admit the requests of a client by priority class
+
+    The requests wait for one of the `concurrency` slots before the rate
+    limiter. A free slot goes to the waiting class of the lowest rank under
+    its concurrency limit, first come first served within a class. So the
+    interactive requests jump ahead of the queued batch requests, which use
+    the slots left. The slots are held per attempt and aren't taken by the
+    cache hits.
+
+    The class comes from `priority()`, `bulk_lookup` runs as `batch` and
+    the other calls as `default`.
+
+    :param concurrency: Number of requests in flight.
+    :param classes: `PriorityClass` list, by default "interactive" and
+        "batch", the batch requests leave 2 slots to the interactive ones.
+    :param default: Class of the requests without priority.
+    :param batch: Class of the `bulk_lookup` requests, `default` if the
+        classes have no such class.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        classes: typing.Optional[typing.Sequence[PriorityClass]] = None,
+        default: str = "interactive",
+        batch: str = "batch",
+    ):
+        if classes is None:
+            classes = [
+                PriorityClass("interactive", 0),
+                PriorityClass("batch", 10, concurrency=max(1, concurrency - 2)),
+            ]
+        self.concurrency = concurrency
+        self.classes = sorted(classes, key=lambda cls: cls.rank)
+        self.by_name = {cls.name: cls for cls in self.classes}
+        if default not in self.by_name:
+            raise ApiClientException(f"Unknown priority class, {default}")
+        self.default = default
+        self.batch = batch if batch in self.by_name else default
+        self.active = 0
+        self.in_flight = collections.Counter()
+        self.queues = {cls.name: collections.deque() for cls in self.classes}
+        self.granted = collections.Counter()
+        self.expired = collections.Counter()
+        self.waited = collections.Counter()
+        self._lock = threading.Lock()
+
+    def create_ticket(self) -> Ticket:
+        name, deadline = PRIORITY.get() or (self.default, None)
+        cls = self.by_name.get(name)
+        if cls is None:
+            raise ApiClientException(f"Unknown priority class, {name}")
+        return Ticket(name, cls.deadline if deadline is None else deadline)
+
+    def dispatch(self):
+        """Grant the free slots, the lock must be held"""
+        while self.active < self.concurrency:
+            for cls in self.classes:
+                queue = self.queues[cls.name]
+                if queue and (
+                    cls.concurrency is None
+                    or self.in_flight[cls.name] < cls.concurrency
+                ):
+                    ticket = queue.popleft()
+                    break
+            else:
+                return
+            self.active += 1
+            self.in_flight[ticket.name] += 1
+            self.granted[ticket.name] += 1
+            self.waited[ticket.name] += time.monotonic() - ticket.queued
+            ticket.grant()
+
+    def withdraw(self, ticket: Ticket, expired: bool = True) -> bool:
+        """Remove a waiting ticket, False if it was granted meanwhile"""
+        with self._lock:
+            if ticket.granted:
+                return False
+            self.queues[ticket.name].remove(ticket)
+            if expired:
+                self.expired[ticket.name] += 1
+            return True
+
+    @staticmethod
+    def deadline_exceeded(ticket: Ticket) -> CIPDeadlineExceeded:
+        return CIPDeadlineExceeded(
+            f"No slot for the {ticket.name} request within {ticket.deadline}s"
+        )
+
+    def acquire(self) -> Ticket:
+        """Wait for a slot, it must be given back with `release`"""
+        ticket = self.create_ticket()
+        ticket.event = threading.Event()
+        with self._lock:
+            self.queues[ticket.name].append(ticket)
+            self.dispatch()
+        if not ticket.granted and not ticket.event.wait(ticket.timeout()):
+            if self.withdraw(ticket):
+                raise self.deadline_exceeded(ticket)
+        return ticket
+
+    async def acquire_async(self) -> Ticket:
+        import asyncio
+
+        ticket = self.create_ticket()
+        ticket.loop = asyncio.get_running_loop()
+        ticket.future = ticket.loop.create_future()
+        with self._lock:
+            self.queues[ticket.name].append(ticket)
+            self.dispatch()
+        if ticket.granted:
+            return ticket
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), ticket.timeout())
+        except asyncio.TimeoutError:
+            if self.withdraw(ticket):
+                raise self.deadline_exceeded(ticket)
+        except asyncio.CancelledError:
+            if not self.withdraw(ticket, expired=False):
+                # Granted while cancelled, the slot goes to the next one
+                self.release(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: Ticket):
+        with self._lock:
+            self.active -= 1
+            self.in_flight[ticket.name] -= 1
+            self.dispatch()
+
+    def stats(self) -> dict[str, dict[str, typing.Any]]:
+        with self._lock:
+            return {
+                cls.name: {
+                    "in_flight": self.in_flight[cls.name],
+                    "queued": len(self.queues[cls.name]),
+                    "granted": self.granted[cls.name],
+                    "expired": self.expired[cls.name],
+                    "average_wait": self.waited[cls.name]
+                    / max(1, self.granted[cls.name]),
+                }
+                for cls in self.classes
+            }
@@ -0,0 +1,77 @@
+import functools
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    import asyncio
+
+
+class Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run a function once for the concurrent calls with the same key
+
+    The callers arriving while the call of their key is in flight wait for
+    it and get its result or its error. `do` is for threads and `ado` for
+    asyncio tasks, the tasks only share the calls of their event loop. The
+    asyncio call runs in its own task, so cancelling the caller that
+    started it doesn't cancel the others.
+    """
+
+    def __init__(self):
+        self.calls: dict[typing.Hashable, Call] = {}
+        self.tasks: dict[typing.Hashable, "asyncio.Future"] = {}
+        self.shared = 0
+        self._lock = threading.Lock()
+
+    def do(self, key: typing.Hashable, fn: typing.Callable, *args) -> typing.Any:
+        with self._lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self.calls[key]
+            call.event.set()
+        return call.result
+
+    async def ado(self, key: typing.Hashable, fn: typing.Callable, *args) -> typing.Any:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        key = (id(loop), key)
+        task = self.tasks.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = self.tasks[key] = loop.create_task(fn(*args))
+            task.add_done_callback(functools.partial(self.forget, key))
+        return await asyncio.shield(task)
+
+    def forget(self, key: typing.Hashable, task: "asyncio.Task"):
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+        if not task.cancelled():
+            # Mark it retrieved, the waiters get it through the shield
+            task.exception()
@@ -0,0 +1,206 @@
+import ipaddress
+import json
+import os
+import threading
+import time
+import typing
+
+from .cache import MISS, get_connection
+
+if typing.TYPE_CHECKING:
+    import sqlite3
+
+# Inbound/outbound score levels of Criminal IP, from the lowest risk
+SCORES = ("safe", "low", "moderate", "dangerous", "critical")
+
+
+def pack_ip(ip: typing.Union[str, ipaddress.IPv4Address, ipaddress.IPv6Address]):
+    """16 bytes of the address, IPv4 is mapped into IPv6 so that both
+    sort in one index
+    """
+    address = ipaddress.ip_address(ip)
+    if address.version == 4:
+        return b"\x00" * 10 + b"\xff\xff" + address.packed
+    return address.packed
+
+
+def unpack_ip(value: bytes) -> str:
+    address = ipaddress.IPv6Address(bytes(value))
+    return str(address.ipv4_mapped or address)
+
+
+def pack_network(cidr: str) -> tuple[bytes, bytes]:
+    """First and last packed address of the network"""
+    network = ipaddress.ip_network(cidr, strict=False)
+    return pack_ip(network.network_address), pack_ip(network.broadcast_address)
+
+
+def get_score(value: typing.Any) -> typing.Optional[int]:
+    """Rank of the inbound score in `SCORES`, e.g. 3 for Dangerous"""
+    try:
+        score = value["score"]["inbound"]
+    except (KeyError, TypeError):
+        return None
+    if isinstance(score, str):
+        score = score.lower()
+        return SCORES.index(score) if score in SCORES else None
+    return score
+
+
+def get_asn(value: typing.Any) -> typing.Optional[int]:
+    """AS number of ip_summary, or of the first whois record of ip_report"""
+    try:
+        asn = value.get("as_no")
+        if asn is None:
+            asn = value["whois"]["data"][0]["as_no"]
+        return int(asn)
+    except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+class Snapshot:
+    """On-disk store of the IP results indexed by IP, network and ASN
+
+    The client answers the snapshot routes (ip_report, ip_summary) from
+    the store while the entries are fresh and falls back to the API.
+    Stored results can also be queried locally by network and ASN.
+
+    :param path: Path of the SQLite database.
+    :param max_age: Age in seconds of the entries used by the client.
+    :param max_ages: Maximum age per route name, e.g. {"ip_report": 3600}.
+    """
+
+    def __init__(
+        self,
+        path: typing.Union[str, os.PathLike],
+        max_age: float = 86400,
+        max_ages: typing.Optional[dict[str, float]] = None,
+    ):
+        self.path = os.fspath(path)
+        self.max_age = max_age
+        self.max_ages = dict(max_ages or {})
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshot "
+                "(ip BLOB, route TEXT, asn INTEGER, score INTEGER, value BLOB, "
+                "updated REAL, PRIMARY KEY (ip, route)) WITHOUT ROWID"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS snapshot_asn ON snapshot (asn)"
+            )
+
+    @property
+    def connection(self) -> "sqlite3.Connection":
+        return get_connection(self._local, self.path)
+
+    def get_max_age(self, route: str) -> float:
+        return self.max_ages.get(route.split(":")[0], self.max_age)
+
+    def get(
+        self, route: str, ip: str, max_age: typing.Optional[float] = None
+    ) -> typing.Any:
+        """Return the stored result of the route, or `MISS` if it's missing
+        or older than `max_age`
+        """
+        if max_age is None:
+            max_age = self.get_max_age(route)
+        row = self.connection.execute(
+            "SELECT value FROM snapshot WHERE ip = ? AND route = ? AND updated > ?",
+            (pack_ip(ip), route, time.time() - max_age),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return MISS
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(
+        self,
+        route: str,
+        ip: str,
+        value: typing.Any,
+        updated: typing.Optional[float] = None,
+    ):
+        self.put_many(route, [(ip, value)], updated)
+
+    def put_many(
+        self,
+        route: str,
+        items: typing.Iterable[tuple[str, typing.Any]],
+        updated: typing.Optional[float] = None,
+    ):
+        """Store the results of the (ip, value) items in one transaction"""
+        updated = time.time() if updated is None else updated
+        rows = (
+            (
+                pack_ip(ip),
+                route,
+                get_asn(value),
+                get_score(value),
+                json.dumps(value),
+                updated,
+            )
+            for ip, value in items
+        )
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO snapshot VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def query(
+        self,
+        cidr: typing.Optional[str] = None,
+        asn: typing.Optional[int] = None,
+        route: typing.Optional[str] = None,
+        min_score: typing.Union[str, int, None] = None,
+        max_age: typing.Optional[float] = None,
+    ) -> typing.Iterator[tuple[str, str, typing.Any]]:
+        """Iterate the (ip, route, value) entries matching all the filters
+
+        e.g. the known dangerous IPs of a /16:
+        `snapshot.query("10.1.0.0/16", min_score="dangerous")`
+        """
+        clauses, args = [], []
+        if cidr is not None:
+            clauses.append("ip BETWEEN ? AND ?")
+            args.extend(pack_network(cidr))
+        if asn is not None:
+            clauses.append("asn = ?")
+            args.append(asn)
+        if route is not None:
+            clauses.append("route = ?")
+            args.append(route)
+        if min_score is not None:
+            if isinstance(min_score, str):
+                min_score = SCORES.index(min_score.lower())
+            clauses.append("score >= ?")
+            args.append(min_score)
+        if max_age is not None:
+            clauses.append("updated > ?")
+            args.append(time.time() - max_age)
+        sql = "SELECT ip, route, value FROM snapshot"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        for ip, route, value in self.connection.execute(sql + " ORDER BY ip", args):
+            yield unpack_ip(ip), route, json.loads(value)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM snapshot").fetchone()[0]
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM snapshot")
+
+    def purge(self, max_age: typing.Optional[float] = None):
+        """Delete the entries older than `max_age`"""
+        max_age = self.max_age if max_age is None else max_age
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM snapshot WHERE updated <= ?", (time.time() - max_age,)
+            )
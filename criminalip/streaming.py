@@ -0,0 +1,194 @@
+import json
+import re
+import typing
+
+# Next structural byte inside a container, or the end of a scalar
+STRUCTURE = re.compile(rb'["{}\[\]]')
+SCALAR_END = re.compile(rb"[,:\]}\s]")
+WHITESPACE = b" \t\r\n,:"
+
+QUOTE, BACKSLASH = ord('"'), ord("\\")
+OPENERS = frozenset(b"{[")
+CLOSERS = frozenset(b"}]")
+
+
+def string_end(buffer: bytearray, start: int) -> typing.Optional[int]:
+    """Return the index after the closing quote of the string at `start`"""
+    index = start + 1
+    while True:
+        index = buffer.find(b'"', index)
+        if index < 0:
+            return None
+        escapes = 0
+        while buffer[index - 1 - escapes] == BACKSLASH:
+            escapes += 1
+        index += 1
+        if escapes % 2 == 0:
+            return index
+
+
+def value_end(buffer: bytearray, start: int, final: bool) -> typing.Optional[int]:
+    """Return the index after the value at `start`, None if it's incomplete"""
+    char = buffer[start]
+    if char == QUOTE:
+        return string_end(buffer, start)
+    if char not in OPENERS:
+        match = SCALAR_END.search(buffer, start)
+        if match is None:
+            return len(buffer) if final else None
+        return match.start()
+    depth = 0
+    index = start
+    while True:
+        match = STRUCTURE.search(buffer, index)
+        if match is None:
+            return None
+        index = match.start()
+        char = buffer[index]
+        if char == QUOTE:
+            index = string_end(buffer, index)
+            if index is None:
+                return None
+            continue
+        depth += 1 if char in OPENERS else -1
+        index += 1
+        if depth == 0:
+            return index
+
+
+class Frame:
+    __slots__ = ("is_object", "path", "key", "collect")
+
+    def __init__(self, is_object: bool, path: tuple, collect: bool):
+        self.is_object = is_object
+        self.path = path
+        self.key = None
+        self.collect = collect
+
+
+class ItemParser:
+    """Incremental parser yielding the items of one array of a JSON document
+
+    The array is selected by its prefix, the object keys from the root
+    separated by dots and `item` for the array elements, like ijson, e.g.
+    "data.result" for the banners of banner_search. The bytes before the
+    current item are released, so the memory is bounded by the largest item
+    instead of the document.
+    """
+
+    def __init__(self, prefix: str, loads: typing.Callable = json.loads):
+        self.target = tuple(prefix.split(".")) if prefix else ()
+        self.loads = loads
+        self.buffer = bytearray()
+        self.stack: list[Frame] = []
+
+    def value_path(self) -> tuple:
+        if not self.stack:
+            return ()
+        frame = self.stack[-1]
+        return frame.path + (frame.key if frame.is_object else "item",)
+
+    def value_done(self):
+        if self.stack and self.stack[-1].is_object:
+            self.stack[-1].key = None
+
+    def feed(self, chunk: bytes, final: bool = False) -> list:
+        """Parse the chunk and return the items completed by it"""
+        buffer = self.buffer
+        buffer += chunk
+        items = []
+        index = 0
+        size = len(buffer)
+        while True:
+            while index < size and buffer[index] in WHITESPACE:
+                index += 1
+            if index >= size:
+                break
+            char = buffer[index]
+            frame = self.stack[-1] if self.stack else None
+            if char in CLOSERS:
+                self.stack.pop()
+                self.value_done()
+                index += 1
+                continue
+            if frame is not None and frame.collect:
+                end = value_end(buffer, index, final)
+                if end is None:
+                    break
+                items.append(self.loads(bytes(buffer[index:end])))
+                index = end
+                continue
+            if char in OPENERS:
+                path = self.value_path()
+                is_object = char == ord("{")
+                collect = not is_object and path == self.target
+                self.stack.append(Frame(is_object, path, collect))
+                index += 1
+                continue
+            if char == QUOTE:
+                end = string_end(buffer, index)
+                if end is None:
+                    break
+                if frame is not None and frame.is_object and frame.key is None:
+                    frame.key = json.loads(bytes(buffer[index:end]))
+                else:
+                    self.value_done()
+                index = end
+                continue
+            end = value_end(buffer, index, final)
+            if end is None:
+                break
+            self.value_done()
+            index = end
+        del buffer[:index]
+        return items
+
+
+def ijson_items(prefix: str):
+    """Push parser of ijson if it's installed, it's used over `ItemParser`"""
+    try:
+        import ijson
+    except ImportError:
+        return None
+    events = ijson.sendable_list()
+    coroutine = ijson.items_coro(
+        events, f"{prefix}.item" if prefix else "item", use_float=True
+    )
+
+    def feed(chunk: bytes, final: bool = False) -> list:
+        if chunk:
+            coroutine.send(chunk)
+        if final:
+            coroutine.close()
+        items = list(events)
+        del events[:]
+        return items
+
+    return feed
+
+
+def create_parser(prefix: str, loads: typing.Callable = json.loads):
+    return ijson_items(prefix) or ItemParser(prefix, loads).feed
+
+
+def iter_items(
+    chunks: typing.Iterable[bytes], prefix: str, loads: typing.Callable = json.loads
+) -> typing.Iterator[typing.Any]:
+    """Yield the items of the `prefix` array as the chunks are read"""
+    feed = create_parser(prefix, loads)
+    for chunk in chunks:
+        yield from feed(chunk)
+    yield from feed(b"", final=True)
+
+
+async def aiter_items(
+    chunks: typing.AsyncIterable[bytes],
+    prefix: str,
+    loads: typing.Callable = json.loads,
+) -> typing.AsyncIterator[typing.Any]:
+    feed = create_parser(prefix, loads)
+    async for chunk in chunks:
+        for item in feed(chunk):
+            yield item
+    for item in feed(b"", final=True):
+        yield item
@@ -0,0 +1,81 @@
+import collections
+import importlib.util
+import threading
+import typing
+
+
+def require_http2():
+    for name in ("httpx", "h2"):
+        if importlib.util.find_spec(name) is None:
+            from .exceptions import ApiClientException
+
+            raise ApiClientException(
+                f"{name} is required for HTTP/2, "
+                "install it with `pip install pycriminalip[http2]`"
+            )
+
+
+def wire_size(res, size: int) -> int:
+    """Bytes of the body received before the decompression"""
+    downloaded = getattr(res, "num_bytes_downloaded", None)
+    if isinstance(downloaded, int):
+        return downloaded
+    # urllib3 counts the bytes read from the socket
+    tell = getattr(getattr(res, "raw", None), "tell", None)
+    received = tell() if callable(tell) else None
+    return received if isinstance(received, int) and received > 0 else size
+
+
+class TransportStats:
+    """Bytes on the wire and connections of a client, to check the savings
+    of the compression and of the connection reuse or HTTP/2
+
+    The streamed responses of `ApiClient.stream` aren't counted.
+    """
+
+    def __init__(self):
+        self.responses = 0
+        self.bytes_on_wire = 0
+        self.bytes_decoded = 0
+        self.encodings = collections.Counter()
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def record(self, res, size: int):
+        encoding = res.headers.get("Content-Encoding")
+        with self._lock:
+            self.responses += 1
+            self.bytes_on_wire += wire_size(res, size)
+            self.bytes_decoded += size
+            self.encodings[encoding if isinstance(encoding, str) else "identity"] += 1
+
+    def trace(self, name: str, info: dict):
+        """httpx trace extension counting the new connections"""
+        if name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+
+    def get_atrace(self, event=None) -> typing.Callable:
+        """Async trace for httpx.AsyncClient, also calling the one of `event`"""
+
+        async def trace(name: str, info: dict):
+            self.trace(name, info)
+            if event is not None:
+                await event.trace(name, info)
+
+        return trace
+
+    def as_dict(self, connections: int = 0) -> dict[str, typing.Any]:
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "bytes_on_wire": self.bytes_on_wire,
+                "bytes_decoded": self.bytes_decoded,
+                "compression_ratio": (
+                    self.bytes_on_wire / self.bytes_decoded
+                    if self.bytes_decoded
+                    else 1.0
+                ),
+                "encodings": dict(self.encodings),
+                "connections": self.connections + connections,
+            }
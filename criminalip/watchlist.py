@@ -0,0 +1,260 @@
+import hashlib
+import ipaddress
+import json
+import os
+import threading
+import time
+import typing
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+from .cache import get_connection
+
+if typing.TYPE_CHECKING:
+    import sqlite3
+
+ENDPOINTS = {
+    "ip": ("ip_malicious_info",),
+    "domain": ("check_domain_malicious", "check_domain_trusted"),
+}
+
+# Fields of the results that aren't part of the reputation
+IGNORED_FIELDS = frozenset(("status", "message"))
+
+
+@dataclass
+class Change:
+    """Change of a field of an endpoint result of a watched entity
+
+    `old` is None for the `added` fields and `new` for the `removed` ones.
+    """
+
+    entity: str
+    endpoint: str
+    field: str
+    old: typing.Any
+    new: typing.Any
+    added: bool = False
+    removed: bool = False
+
+
+def get_kind(entity: str) -> str:
+    try:
+        ipaddress.ip_address(entity)
+    except ValueError:
+        return "domain"
+    return "ip"
+
+
+def flatten(
+    value: typing.Any, prefix: str = "", fields: typing.Optional[dict] = None
+) -> dict[str, typing.Any]:
+    """Flatten the nested mappings into dotted fields, lists are leaves"""
+    fields = {} if fields is None else fields
+    if isinstance(value, Mapping):
+        for key, item in value.items():
+            if not prefix and key in IGNORED_FIELDS:
+                continue
+            flatten(item, f"{prefix}{key}.", fields)
+        if value or not prefix:
+            return fields
+    fields[prefix[:-1]] = value
+    return fields
+
+
+def diff(
+    old: dict[str, typing.Any], new: dict[str, typing.Any]
+) -> typing.Iterator[tuple[str, typing.Any, typing.Any, bool, bool]]:
+    """Yield the (field, old, new, added, removed) of the flattened fields
+    that differ
+    """
+    for field, value in new.items():
+        if field not in old:
+            yield field, None, value, True, False
+        elif old[field] != value:
+            yield field, old[field], value, False, False
+    for field in old.keys() - new.keys():
+        yield field, old[field], None, False, True
+
+
+def default_risk(results: dict[str, typing.Any]) -> float:
+    """Risk from 0 to 1 of an entity from its results"""
+    risk = 0.0
+    for result in results.values():
+        data = getattr(result, "raw", result)
+        if isinstance(data, Mapping):
+            data = data.get("data", data)
+        if not isinstance(data, Mapping):
+            continue
+        if data.get("is_malicious"):
+            return 1.0
+        if data.get("is_vpn") or data.get("can_remote_access"):
+            risk = max(risk, 0.5)
+        if data.get("is_trusted") is False:
+            risk = max(risk, 0.3)
+    return risk
+
+
+class Watchlist:
+    """Watch IPs and domains and report the changes of their reputation
+
+    The last seen fields of every entity are kept in SQLite with a hash of
+    each endpoint result, so that an unchanged result is detected without
+    diffing. The entities are re-checked once due, after an interval going
+    from `max_interval` for the risk 0 down to `min_interval` for the risk 1,
+    the most overdue first.
+
+    :param client: `CriminalIP` used for the lookups.
+    :param path: Path of the SQLite database.
+    :param endpoints: Endpoints per kind of entity, ip or domain.
+    :param min_interval: Seconds between the checks of the riskiest entities.
+    :param max_interval: Seconds between the checks of the entities without risk.
+    :param risk: Function returning the risk from 0 to 1 of an entity from
+        its results per endpoint, the changed entities have at least 0.75.
+    """
+
+    def __init__(
+        self,
+        client,
+        path: typing.Union[str, os.PathLike],
+        endpoints: typing.Optional[dict[str, typing.Sequence[str]]] = None,
+        min_interval: float = 3600,
+        max_interval: float = 7 * 86400,
+        risk: typing.Callable[[dict[str, typing.Any]], float] = default_risk,
+    ):
+        self.client = client
+        self.path = os.fspath(path)
+        self.endpoints = {**ENDPOINTS, **(endpoints or {})}
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.risk = risk
+        self._local = threading.local()
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS entities (entity TEXT PRIMARY KEY, "
+                "kind TEXT, risk REAL, checked REAL, due REAL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS entities_due ON entities (due)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS state (entity TEXT, endpoint TEXT, "
+                "hash BLOB, fields TEXT, PRIMARY KEY (entity, endpoint)) WITHOUT ROWID"
+            )
+
+    @property
+    def connection(self) -> "sqlite3.Connection":
+        return get_connection(self._local, self.path)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+
+    def add(self, entities: typing.Iterable[str]):
+        """Watch the IPs and domains, they are due on the next refresh"""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO entities VALUES (?, ?, 0, NULL, 0)",
+                ((entity, get_kind(entity)) for entity in entities),
+            )
+
+    def remove(self, entities: typing.Iterable[str]):
+        entities = [(entity,) for entity in entities]
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM entities WHERE entity = ?", entities
+            )
+            self.connection.executemany("DELETE FROM state WHERE entity = ?", entities)
+
+    def due(
+        self, limit: typing.Optional[int] = None, now: typing.Optional[float] = None
+    ) -> list[tuple[str, str]]:
+        """Return the (entity, kind) due for a check, the most overdue first"""
+        now = time.time() if now is None else now
+        return self.connection.execute(
+            "SELECT entity, kind FROM entities WHERE due <= ? ORDER BY due LIMIT ?",
+            (now, -1 if limit is None else limit),
+        ).fetchall()
+
+    def get_interval(self, risk: float) -> float:
+        risk = min(1.0, max(0.0, risk))
+        return self.max_interval - (self.max_interval - self.min_interval) * risk
+
+    def refresh(
+        self, limit: typing.Optional[int] = None, concurrency: int = 8
+    ) -> typing.Iterator[Change]:
+        """Check the due entities and yield the changes of their fields
+
+        The first check of an entity records its fields without changes.
+        The entities failing are checked again after `min_interval`.
+
+        :param limit: Maximum number of entities checked.
+        :param concurrency: Number of concurrent lookups.
+        """
+        by_kind: dict[str, list[str]] = {}
+        for entity, kind in self.due(limit):
+            by_kind.setdefault(kind, []).append(entity)
+        for kind, entities in by_kind.items():
+            endpoints = self.endpoints[kind]
+            results = self.client.bulk_lookup(
+                entities, endpoints, concurrency, ordered=False
+            )
+            for result in results:
+                yield from self.update(result, endpoints)
+
+    def update(self, result, endpoints: typing.Sequence[str]) -> list[Change]:
+        """Store the `BulkResult` of an entity and return its changes"""
+        now = time.time()
+        entity = result.value
+        if not result.ok:
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE entities SET due = ? WHERE entity = ?",
+                    (now + self.min_interval, entity),
+                )
+            return []
+
+        stored = {
+            endpoint: (bytes(digest), fields)
+            for endpoint, digest, fields in self.connection.execute(
+                "SELECT endpoint, hash, fields FROM state WHERE entity = ?", (entity,)
+            )
+        }
+        changes, rows = [], []
+        for endpoint in endpoints:
+            value = getattr(result.results[endpoint], "raw", result.results[endpoint])
+            if isinstance(value, bytes):
+                value = json.loads(value)
+            fields = flatten(value)
+            encoded = json.dumps(fields, sort_keys=True, default=str)
+            digest = hashlib.blake2b(encoded.encode(), digest_size=16).digest()
+            previous = stored.get(endpoint)
+            if previous is not None and previous[0] == digest:
+                continue
+            rows.append((entity, endpoint, digest, encoded))
+            if previous is not None:
+                changes.extend(
+                    Change(entity, endpoint, *change)
+                    for change in diff(json.loads(previous[1]), fields)
+                )
+
+        risk = self.risk(result.results)
+        if changes:
+            risk = max(risk, 0.75)
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)", rows
+            )
+            self.connection.execute(
+                "UPDATE entities SET risk = ?, checked = ?, due = ? WHERE entity = ?",
+                (risk, now, now + self.get_interval(risk), entity),
+            )
+        return changes
+
+    def stats(self) -> dict[str, typing.Any]:
+        now = time.time()
+        total, due, risky = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(due <= ?), 0), COALESCE(SUM(risk >= 0.5), 0) "
+            "FROM entities",
+            (now,),
+        ).fetchone()
+        return {"entities": total, "due": due, "risky": risky}
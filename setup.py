@@ -20,7 +20,19 @@ setup(
     author="Jonghak Choi",
     author_email="haginara@gmail.com",
     install_requires=install_requires,
+    extras_require={
+        "async": ["httpx"],
+        "speedups": ["orjson", "ijson"],
+        "columnar": ["pyarrow"],
+        "pandas": ["pandas"],
+        "http2": ["httpx[http2]"],
+    },
     packages=find_packages(),
+    entry_points={
+        "console_scripts": [
+            "criminalip = criminalip.cli:main",
+        ],
+    },
     package_data={
         '': ['README.md', 'LICENSE'],
     },
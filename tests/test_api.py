@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from criminalip import CriminalIP
+from criminalip.api import RequestRoute
+from criminalip.codec import JSONCodec, get_codec
+from criminalip.exceptions import ApiClientException
+
+
+class TestApiClient(unittest.TestCase):
+    def test_session_is_reused(self):
+        client = CriminalIP("https://api.criminalip.io", "api_key", pool_maxsize=4)
+        session = client.session
+        self.assertIs(session, client.session)
+        adapter = session.get_adapter("https://api.criminalip.io/v1/ip/summary")
+        self.assertEqual(adapter._pool_maxsize, 4)
+        client.close()
+        self.assertIsNot(session, client.session)
+
+    def test_context_manager_closes_session(self):
+        with CriminalIP("https://api.criminalip.io", "api_key") as client:
+            client.session
+        self.assertIsNone(client._session)
+
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+@unittest.skipUnless(httpx, "httpx is not installed")
+class TestAsyncCriminalIP(unittest.TestCase):
+    def test_endpoints_are_coroutines(self):
+        from criminalip import AsyncCriminalIP, User
+
+        def handler(request):
+            if request.url.path == "/v1/user/me":
+                user = dict.fromkeys(User.__dataclass_fields__, "")
+                return httpx.Response(200, json={"data": user})
+            return httpx.Response(200, json={"ip": request.url.params["ip"]})
+
+        async def run():
+            async with AsyncCriminalIP("https://api.criminalip.io", "key") as client:
+                client._session = httpx.AsyncClient(
+                    transport=httpx.MockTransport(handler)
+                )
+                summary = await client.ip_summary("1.1.1.1")
+                user = await client.get_user()
+            return summary, user
+
+        summary, user = asyncio.run(run())
+        self.assertEqual(summary["ip"], "1.1.1.1")
+        self.assertIsInstance(user, User)
+
+
+class TestRequestRoute(unittest.TestCase):
+    def setUp(self):
+        self.client = CriminalIP("https://api.criminalip.io", "key")
+        self.response = mock.Mock(status_code=200, content=b"{}")
+
+    def test_path_arguments_are_bound_by_name(self):
+        with mock.patch.object(
+            self.client.session, "request", return_value=self.response
+        ) as request:
+            self.client.domain_report(123)
+            self.client.domain_lite_report(scan_id="a/b")
+        urls = [call.args[1] for call in request.call_args_list]
+        self.assertEqual(
+            urls,
+            [
+                "https://api.criminalip.io/v1/domain/report/123",
+                "https://api.criminalip.io/v1/domain/lite/report/a%2Fb",
+            ],
+        )
+
+    def test_unknown_path_argument(self):
+        with self.assertRaises(ApiClientException):
+
+            @RequestRoute("GET", "v1/domain/report/<scan_id>")
+            def domain_report(self, report_id):
+                return None, None, None
+
+    def test_route_headers_do_not_leak_into_client(self):
+        route = RequestRoute("GET", "v1/ip/summary", headers={"X-Extra": "1"})
+        endpoint = route(lambda client: (None, None, None))
+        with mock.patch.object(
+            self.client.session, "request", return_value=self.response
+        ) as request:
+            endpoint(self.client)
+        self.assertEqual(request.call_args.kwargs["headers"]["X-Extra"], "1")
+        self.assertNotIn("X-Extra", self.client.headers)
+
+
+class TestJSONCodec(unittest.TestCase):
+    def test_codecs(self):
+        self.assertIsInstance(get_codec("json"), JSONCodec)
+        self.assertIn(get_codec().name, ("orjson", "msgspec", "json"))
+        with self.assertRaises(ApiClientException):
+            get_codec("yaml")
+
+    def test_raw_response(self):
+        client = CriminalIP("https://api.criminalip.io", "key", raw_response=True)
+        response = mock.Mock(status_code=200, content=b'{"ip": "1.1.1.1"}')
+        with mock.patch.object(client.session, "request", return_value=response):
+            self.assertEqual(client.ip_summary("1.1.1.1"), b'{"ip": "1.1.1.1"}')
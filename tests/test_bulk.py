@@ -0,0 +1,48 @@
+import asyncio
+import unittest
+
+from criminalip import AsyncCriminalIP, CriminalIP
+from criminalip.exceptions import CIPException
+
+
+class FakeCriminalIP(CriminalIP):
+    def ip_report(self, ip):
+        if ip == "bad":
+            raise Exception("Failed to run command")
+        return {"ip": ip}
+
+
+class FakeAsyncCriminalIP(AsyncCriminalIP):
+    async def ip_report(self, ip):
+        await asyncio.sleep(0.01 if ip == "1.1.1.1" else 0)
+        return {"ip": ip}
+
+
+class TestBulkLookup(unittest.TestCase):
+    def test_ordered_dedupe_and_errors(self):
+        client = FakeCriminalIP("https://api.criminalip.io", "key")
+        ips = ["1.1.1.1", "bad", "8.8.8.8", "1.1.1.1"] * 10
+        results = list(client.bulk_ip_lookup(ips, ["ip_report"], concurrency=2))
+        self.assertEqual([r.value for r in results], ["1.1.1.1", "bad", "8.8.8.8"])
+        self.assertEqual(results[0].results["ip_report"], {"ip": "1.1.1.1"})
+        self.assertFalse(results[1].ok)
+        self.assertIn("ip_report", results[1].errors)
+
+    def test_only_routes(self):
+        client = FakeCriminalIP("https://api.criminalip.io", "key")
+        for endpoint in ("close", "bulk_lookup", "missing"):
+            with self.assertRaises(CIPException):
+                client.bulk_lookup(["1.1.1.1"], [endpoint])
+
+    def test_async_unordered(self):
+        client = FakeAsyncCriminalIP("https://api.criminalip.io", "key")
+
+        async def run():
+            return [
+                r.value
+                async for r in client.bulk_ip_lookup(
+                    ["1.1.1.1", "8.8.8.8"], ["ip_report"], ordered=False
+                )
+            ]
+
+        self.assertEqual(asyncio.run(run()), ["8.8.8.8", "1.1.1.1"])
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from criminalip import CriminalIP, MemoryCache, SQLiteCache
+from criminalip.cache import MISS, BaseCache
+from criminalip.mock_server import MockServer
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_lru_eviction_and_ttl(self):
+        cache = MemoryCache(maxsize=2, ttl=60, ttls={"ip_vpn": 0})
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIs(cache.get("b"), MISS)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("d", 4, ttl=cache.get_ttl("ip_vpn"))
+        self.assertIs(cache.get("d"), MISS)
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 2})
+
+    def test_key_ignores_params_order(self):
+        self.assertEqual(
+            MemoryCache.make_key(
+                "GET", "v1/ip/summary", {"ip": "1.1.1.1", "full": True}
+            ),
+            MemoryCache.make_key(
+                "GET", "v1/ip/summary", {"full": True, "ip": "1.1.1.1"}
+            ),
+        )
+
+    def test_incomplete_cache_class(self):
+        class NoClear(BaseCache):
+            def _get(self, key, now):
+                return MISS
+
+            def _set(self, key, value, expires):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoClear()
+
+
+class TestSQLiteCache(unittest.TestCase):
+    def test_shared_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            SQLiteCache(path).set("key", {"ip": "1.1.1.1"})
+            SQLiteCache(path).set("raw", b"{}", ttl=60)
+            cache = SQLiteCache(path)
+            self.assertEqual(cache.get("key"), {"ip": "1.1.1.1"})
+            self.assertEqual(cache.get("raw"), b"{}")
+            with mock.patch("time.time", return_value=time.time() + 600):
+                self.assertIs(cache.get("key"), MISS)
+
+
+class TestRouteCache(unittest.TestCase):
+    def test_get_routes_are_cached(self):
+        response = mock.Mock(status_code=200, content=b'{"ip": "1.1.1.1"}')
+        client = CriminalIP("https://api.criminalip.io", "key", cache=MemoryCache())
+        with mock.patch.object(
+            client.session, "request", return_value=response
+        ) as request:
+            client.ip_summary("1.1.1.1")
+            client.ip_summary("1.1.1.1")
+            client.domain_private_scan("example.com")
+            client.domain_private_scan("example.com")
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(client.cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_raw_and_decoded_results_dont_mix(self):
+        with tempfile.TemporaryDirectory() as tmp, MockServer() as server:
+            cache = SQLiteCache(os.path.join(tmp, "cache.db"))
+            raw = CriminalIP(server.url, "key", cache=cache, raw_response=True)
+            decoded = CriminalIP(server.url, "key", cache=cache)
+            self.assertIsInstance(raw.ip_summary("1.1.1.1"), bytes)
+            self.assertEqual(decoded.ip_summary("1.1.1.1")["ip"], "1.1.1.1")
+            self.assertEqual(server.requests, 2)
+            raw.close()
+            decoded.close()
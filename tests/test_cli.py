@@ -0,0 +1,77 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from criminalip import cli
+from criminalip.mock_server import MockServer
+
+
+class TestCli(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.input = os.path.join(self.tmp.name, "ips.txt")
+        self.output = os.path.join(self.tmp.name, "out")
+        with open(self.input, "w") as f:
+            f.write("".join(f"10.0.0.{n}\n" for n in range(5)) + "\n# comment\n")
+
+    def run_cli(self, *args):
+        argv = [self.input, "--base-url", self.server.url, "--api-key", "key"]
+        argv += ["--output", self.output, "--concurrency", "2", *args]
+        self.assertEqual(cli.main(argv), 0)
+
+    def test_ndjson(self):
+        self.run_cli("--endpoints", "ip_summary,ip_vpn")
+        with open(self.output) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(
+            [row["value"] for row in rows], [f"10.0.0.{n}" for n in range(5)]
+        )
+        self.assertEqual(rows[0]["ip_summary"]["ip"], "10.0.0.0")
+        self.assertIn("ip_vpn", rows[0])
+
+    def test_csv(self):
+        self.run_cli("--endpoints", "ip_summary", "--format", "csv")
+        with open(self.output, newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["value", "ip_summary", "errors"])
+        self.assertEqual(json.loads(rows[1][1])["ip"], "10.0.0.0")
+
+    def test_resume_from_checkpoint(self):
+        checkpoint = os.path.join(self.tmp.name, "ckpt")
+        cli.write_checkpoint(checkpoint, 3)
+        with open(self.output, "w") as f:
+            f.write("previous\n" * 3)
+        self.run_cli("--endpoints", "ip_vpn", "--checkpoint", checkpoint)
+        with open(self.output) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[3])["value"], "10.0.0.3")
+        self.assertEqual(
+            cli.read_checkpoint(checkpoint), (5, os.path.getsize(self.output))
+        )
+
+    def test_resume_drops_the_rows_after_the_checkpoint(self):
+        checkpoint = os.path.join(self.tmp.name, "ckpt")
+        with open(self.output, "w") as f:
+            f.write("previous\n" * 3)
+            offset = f.tell()
+            # Flushed by the buffer after the checkpoint, then killed
+            f.write('{"value": "10.0.0.3"}\n{"value": "10.0')
+        cli.write_checkpoint(checkpoint, 3, offset)
+        self.run_cli("--endpoints", "ip_vpn", "--checkpoint", checkpoint)
+        with open(self.output) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[:3], ["previous"] * 3)
+        values = [json.loads(line)["value"] for line in lines[3:]]
+        self.assertEqual(values, ["10.0.0.3", "10.0.0.4"])
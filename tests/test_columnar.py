@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+from criminalip import CriminalIP
+from criminalip.columnar import SCHEMAS, ColumnarBuffer, ColumnarWriter, coerce
+from criminalip.exceptions import ApiClientException
+from criminalip.mock_server import Fixtures, MockServer
+from criminalip.models import IPReport
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+class TestColumnarBuffer(unittest.TestCase):
+    def setUp(self):
+        self.fixtures = Fixtures(payload_size=3, total_results=10)
+
+    def test_ip_report(self):
+        buffer = ColumnarBuffer("ip_report")
+        report = self.fixtures.ip_report({"ip": "1.1.1.1"}, {})
+        self.assertEqual(buffer.add(IPReport(report)), 1)
+        buffer.add({"ip": "2.2.2.2", "whois": {"data": []}, "port": "unexpected"})
+        columns = buffer.flush()
+        self.assertEqual(columns["ip"], ["1.1.1.1", "2.2.2.2"])
+        self.assertEqual(columns["as_no"], [64500, None])
+        self.assertEqual(columns["open_ports"], [[22, 23, 24], None])
+        self.assertEqual(columns["is_tor"], [None, None])
+        self.assertEqual(len(buffer), 0)
+
+    def test_bool_flags(self):
+        values = [True, False, "true", "False", "1", "0", 1, 0, "yes", 2, "", []]
+        self.assertEqual(
+            [coerce(value, "bool") for value in values],
+            [
+                True,
+                False,
+                True,
+                False,
+                True,
+                False,
+                True,
+                False,
+                None,
+                None,
+                None,
+                None,
+            ],
+        )
+        buffer = ColumnarBuffer("ip_report")
+        buffer.add({"ip": "1.1.1.1", "issues": {"is_vpn": "false", "is_tor": "1"}})
+        columns = buffer.flush()
+        self.assertEqual((columns["is_vpn"], columns["is_tor"]), ([False], [True]))
+
+    def test_rows_per_item(self):
+        buffer = ColumnarBuffer("banner_search")
+        self.assertEqual(buffer.add(self.fixtures.banner_search({}, {})), 3)
+        self.assertEqual(buffer.columns["port"], [22, 22, 22])
+        stats = ColumnarBuffer("banner_stats")
+        stats.add(self.fixtures.banner_stats({}, {}))
+        self.assertEqual(
+            stats.flush(),
+            {"aggregation": ["as_name"], "key": ["EXAMPLE-AS"], "count": [1]},
+        )
+
+    def test_every_schema_accepts_the_fixtures(self):
+        for endpoint in SCHEMAS:
+            with self.subTest(endpoint=endpoint):
+                buffer = ColumnarBuffer(endpoint)
+                buffer.add(getattr(self.fixtures, endpoint)({"ip": "1.1.1.1"}, {}))
+                self.assertGreater(len(buffer), 0)
+
+    def test_unknown_endpoint(self):
+        with self.assertRaises(ApiClientException):
+            ColumnarBuffer("domain_report")
+
+    @unittest.skipIf(pyarrow, "pyarrow is installed")
+    def test_missing_pyarrow(self):
+        with self.assertRaises(ApiClientException):
+            ColumnarBuffer("ip_report").to_batch()
+
+
+@unittest.skipUnless(pyarrow, "pyarrow is not installed")
+class TestColumnarWriter(unittest.TestCase):
+    def test_export(self):
+        import pyarrow.parquet
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "banners.parquet")
+            with MockServer(payload_size=5) as server:
+                with CriminalIP(server.url, "key") as client:
+                    rows = client.export(
+                        "banner_search", ["ssh", "http"], path, batch_size=4
+                    )
+            table = pyarrow.parquet.read_table(path)
+        self.assertEqual(rows, 10)
+        self.assertEqual(table.num_rows, 10)
+        self.assertEqual(table.schema, SCHEMAS["banner_search"].to_arrow())
+
+    def test_arrow_file(self):
+        import pyarrow.ipc
+
+        fixtures = Fixtures(payload_size=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "reports.arrow")
+            with ColumnarWriter(path, "ip_report", "arrow", batch_size=1) as writer:
+                for ip in ("1.1.1.1", "2.2.2.2"):
+                    writer.write(fixtures.ip_report({"ip": ip}, {}))
+            with pyarrow.ipc.open_file(path) as reader:
+                self.assertEqual(reader.num_record_batches, 2)
+                table = reader.read_all()
+        self.assertEqual(table.column("ip").to_pylist(), ["1.1.1.1", "2.2.2.2"])
+
+    @unittest.skipUnless(pandas, "pandas is not installed")
+    def test_dataframe(self):
+        with MockServer(payload_size=2) as server:
+            with CriminalIP(server.url, "key") as client:
+                df = client.to_dataframe("ip_report", ["1.1.1.1", "2.2.2.2"])
+        self.assertEqual(list(df["ip"]), ["1.1.1.1", "2.2.2.2"])
+        self.assertEqual(list(df.columns), SCHEMAS["ip_report"].names)
@@ -0,0 +1,53 @@
+import time
+import unittest
+
+from criminalip import MultiKeyCriminalIP, RetryPolicy
+from criminalip.engine import ProcessPoolEnricher, SharedRateLimiter
+from criminalip.engine import SharedTokenBucket
+from criminalip.exceptions import CIPQuotaExhausted
+from criminalip.mock_server import MockServer
+
+
+class TestProcessPoolEnricher(unittest.TestCase):
+    def test_bucket_state_is_shared(self):
+        bucket = SharedTokenBucket(rate=100, capacity=1)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.01, places=2)
+        self.assertLess(bucket.tokens, 0)
+
+    def test_run_with_shared_quota(self):
+        ips = [f"10.0.0.{n}" for n in range(20)]
+        limiter = SharedRateLimiter(default_rate=1000, quota=15)
+        with MockServer() as server:
+            enricher = ProcessPoolEnricher(
+                server.url,
+                "api_key",
+                endpoints=["ip_summary"],
+                processes=2,
+                chunksize=3,
+                rate_limiter=limiter,
+            )
+            results = list(enricher.run(ips))
+        self.assertEqual([result.value for result in results], ips)
+        succeeded = [result for result in results if result.ok]
+        self.assertEqual(len(succeeded), 15)
+        self.assertEqual(succeeded[0].results["ip_summary"].ip, succeeded[0].value)
+        errors = [result.errors["ip_summary"] for result in results if not result.ok]
+        self.assertTrue(all(isinstance(e, CIPQuotaExhausted) for e in errors))
+        self.assertEqual(limiter.quota.used, 15)
+
+    def test_exhausted_quota_fails_at_once(self):
+        limiter = SharedRateLimiter(default_rate=1000, quota=1)
+        retry = RetryPolicy(backoff_factor=5, jitter=False)
+        with MockServer() as server:
+            client = MultiKeyCriminalIP(
+                server.url, ["a", "b"], rate_limiter=limiter, retry=retry
+            )
+            client.ip_summary("1.1.1.1")
+            started = time.monotonic()
+            with self.assertRaises(CIPQuotaExhausted):
+                client.ip_summary("8.8.8.8")
+            client.close()
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(retry.stats()["retries"], {})
+        self.assertEqual(len(client.key_pool.available()), 2)
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+import unittest
+
+# Generous for slow CI, it was about 200 ms with the eager imports
+IMPORT_BUDGET = 0.1
+
+HEAVY_MODULES = (
+    "asyncio",
+    "concurrent.futures.thread",
+    "httpx",
+    "msgspec",
+    "orjson",
+    "requests",
+    "sqlite3",
+)
+
+
+def run(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+
+
+class TestImports(unittest.TestCase):
+    def test_lazy_modules(self):
+        code = (
+            "import sys, criminalip\n"
+            "client = criminalip.CriminalIP("
+            "'https://api.criminalip.io', 'key', json_codec='json')\n"
+            f"print([name for name in {HEAVY_MODULES!r} if name in sys.modules],"
+            " file=sys.stderr)\n"
+        )
+        self.assertEqual(run(code).splitlines()[-1], "[]")
+
+    def test_import_budget(self):
+        lines = run("import criminalip; criminalip.CriminalIP").splitlines()
+        # The top level entries after site are imported by the statement
+        start = next(i for i, line in enumerate(lines) if line.endswith("| site"))
+        elapsed = sum(
+            int(line.split("|")[1])
+            for line in lines[start + 1 :]
+            if line.startswith("import time:") and not line.split("|")[2][1:2].isspace()
+        )
+        self.assertLess(elapsed / 1e6, IMPORT_BUDGET)
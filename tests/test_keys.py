@@ -0,0 +1,48 @@
+import unittest
+
+from criminalip import APIKeyPool, MultiKeyCriminalIP
+from criminalip.exceptions import CIPLimitExcceed
+from criminalip.mock_server import MockServer
+
+
+class TestAPIKeyPool(unittest.TestCase):
+    def test_round_robin(self):
+        pool = APIKeyPool(["a", "b", "c"], strategy="round_robin")
+        keys = []
+        for _ in range(6):
+            key = pool.acquire()
+            keys.append(key.api_key)
+            pool.release(key)
+        self.assertEqual(keys, ["a", "b", "c"] * 2)
+
+    def test_least_loaded(self):
+        pool = APIKeyPool(["a", "b"])
+        first, second = pool.acquire(), pool.acquire()
+        self.assertNotEqual(first.api_key, second.api_key)
+
+    def test_limited_keys_leave_the_rotation(self):
+        pool = APIKeyPool(["a", "b"], cooldown=60)
+        key = pool.acquire()
+        pool.release(key, CIPLimitExcceed("limit"))
+        self.assertEqual([key.api_key for key in pool.available()], ["b"])
+        pool.keys[1].max_search = pool.keys[1].used
+        with self.assertRaises(CIPLimitExcceed) as ctx:
+            pool.acquire()
+        self.assertGreater(ctx.exception.retry_after, 50)
+
+
+class TestMultiKeyCriminalIP(unittest.TestCase):
+    def test_requests_switch_keys_on_limits(self):
+        with MockServer(limited_keys=["limited"]) as server:
+            client = MultiKeyCriminalIP(server.url, ["limited", "ok"])
+            for _ in range(4):
+                self.assertEqual(client.ip_summary("1.1.1.1").ip, "1.1.1.1")
+            self.assertEqual(server.requests_per_key, {"limited": 1, "ok": 4})
+        self.assertNotIn("x-api-key", client.headers)
+
+    def test_refresh_quotas(self):
+        with MockServer() as server:
+            client = MultiKeyCriminalIP(server.url, ["a", "b"])
+            stats = client.refresh_quotas()
+            self.assertEqual([key["max_search"] for key in stats], [100, 100])
+            self.assertIsNotNone(client._session)
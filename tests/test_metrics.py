@@ -0,0 +1,86 @@
+import asyncio
+import importlib.util
+import unittest
+
+from criminalip import CriminalIP, MemoryCache
+from criminalip.exceptions import CIPRequestError
+from criminalip.metrics import Metrics
+from criminalip.mock_server import MockServer
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class TestHooks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_events(self):
+        events = []
+        client = CriminalIP(self.server.url, "api_key", cache=MemoryCache())
+        client.add_hook("before_request", lambda e: events.append(("before", e)))
+        client.add_hook("after_response", lambda e: events.append(("after", e)))
+        client.ip_summary("1.1.1.1")
+        client.ip_summary("1.1.1.1")
+        self.assertEqual([name for name, _ in events], ["before", "after", "after"])
+        event = events[1][1]
+        self.assertEqual((event.route, event.status_code), ("ip_summary", 200))
+        self.assertGreater(event.response_bytes, 0)
+        self.assertLessEqual({"total", "ttfb", "decode"}, set(event.timings))
+        self.assertTrue(events[2][1].cached)
+
+    def test_metrics(self):
+        client = CriminalIP(self.server.url, "api_key", cache=MemoryCache())
+        metrics = Metrics().install(client)
+        client.ip_summary("1.1.1.1")
+        client.ip_summary("1.1.1.1")
+        client.ip_vpn("1.1.1.1")
+        self.assertEqual(metrics.requests.get(("ip_summary", "200")), 1)
+        self.assertEqual(metrics.cache_hits.get(("ip_summary",)), 1)
+        self.assertEqual(metrics.latency.count(("ip_vpn",)), 1)
+        text = metrics.render()
+        self.assertIn('criminalip_requests_total{route="ip_vpn",status="200"} 1', text)
+        self.assertIn(
+            'criminalip_request_duration_seconds_count{route="ip_vpn"} 1', text
+        )
+
+        metrics.uninstall(client)
+        self.assertFalse(client.has_hooks)
+
+    def test_errors(self):
+        with MockServer(error_rate=1.0) as server:
+            client = CriminalIP(server.url, "api_key")
+            metrics = Metrics().install(client)
+            with self.assertRaises(CIPRequestError):
+                client.ip_summary("1.1.1.1")
+        self.assertEqual(metrics.errors.get(("ip_summary", "CIPRequestError")), 1)
+        self.assertEqual(metrics.requests.get(("ip_summary", "503")), 1)
+
+    @unittest.skipUnless(httpx, "httpx is not installed")
+    def test_async_connection_timings(self):
+        from criminalip import AsyncCriminalIP
+
+        events = []
+
+        async def run():
+            async with AsyncCriminalIP(self.server.url, "api_key") as client:
+                client.add_hook("after_response", events.append)
+                await client.ip_summary("1.1.1.1")
+
+        asyncio.run(run())
+        self.assertLessEqual({"connect", "ttfb", "decode"}, set(events[0].timings))
+
+    @unittest.skipUnless(importlib.util.find_spec("h2"), "h2 is not installed")
+    def test_http2_connection_timings(self):
+        events = []
+        with CriminalIP(self.server.url, "api_key", http2=True) as client:
+            client.add_hook("after_response", events.append)
+            client.ip_summary("1.1.1.1")
+        self.assertLessEqual({"connect", "ttfb", "decode"}, set(events[0].timings))
@@ -0,0 +1,103 @@
+import asyncio
+import inspect
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from criminalip import CriminalIP, IPReport, User
+from criminalip import benchmark
+from criminalip.exceptions import CIPRequestError
+from criminalip.mock_server import MockServer, iter_routes
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def arguments(func):
+    """Return sample positional arguments for an endpoint"""
+    values = {"ip": "1.1.1.1", "offset": 0, "scan_id": "1234"}
+    parameters = list(inspect.signature(func).parameters.values())[1:]
+    return [
+        values.get(parameter.name, "example.com")
+        for parameter in parameters
+        if parameter.default is inspect.Parameter.empty
+    ]
+
+
+class TestMockServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockServer(payload_size=3).start()
+        cls.client = CriminalIP(cls.server.url, "api_key")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+        cls.server.stop()
+
+    def test_every_route(self):
+        for name, route in iter_routes(CriminalIP):
+            with self.subTest(route=name):
+                func = getattr(CriminalIP, name)
+                result = getattr(self.client, name)(*arguments(func))
+                self.assertTrue(result)
+
+    def test_models(self):
+        self.assertIsInstance(self.client.get_user(), User)
+        report = self.client.ip_report("1.1.1.1")
+        self.assertIsInstance(report, IPReport)
+        self.assertEqual(len(report.ports), 3)
+
+    def test_suspicious_info(self):
+        result = self.client.ip_suspicious_info("1.1.1.1")
+        self.assertEqual(result["abuse_record_count"], 0)
+        self.assertFalse(result["issues"]["is_vpn"])
+        self.assertEqual(result["current_opened_port"]["count"], 3)
+
+    def test_concurrent_requests_are_counted(self):
+        ips = [f"10.0.0.{n}" for n in range(200)]
+        with MockServer() as server, ThreadPoolExecutor(16) as executor:
+            with CriminalIP(server.url, "api_key", pool_maxsize=16) as client:
+                list(executor.map(client.ip_vpn, ips))
+        self.assertEqual(server.requests, 200)
+        self.assertEqual(server.requests_per_key["api_key"], 200)
+
+    def test_pagination(self):
+        self.server.fixtures.total_results = 7
+        try:
+            self.assertEqual(len(list(self.client.iter_banner_search("ssh"))), 7)
+        finally:
+            self.server.fixtures.total_results = 100
+
+    def test_errors(self):
+        with MockServer(error_rate=1.0) as server:
+            with CriminalIP(server.url, "api_key") as client:
+                with self.assertRaises(CIPRequestError) as ctx:
+                    client.ip_summary("1.1.1.1")
+        self.assertEqual(ctx.exception.status_code, 503)
+
+    @unittest.skipUnless(httpx, "httpx is not installed")
+    def test_async_client(self):
+        from criminalip import AsyncCriminalIP
+
+        async def run():
+            async with AsyncCriminalIP(self.server.url, "api_key") as client:
+                return await client.domain_report(1234)
+
+        self.assertEqual(asyncio.run(run())["data"]["scan_id"], "1234")
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run(self):
+        results = benchmark.run(requests=20, concurrency=2, modes=["sync", "threaded"])
+        self.assertEqual(results["modes"]["sync"]["requests"], 20)
+        self.assertGreater(results["modes"]["threaded"]["rps"], 0)
+        self.assertTrue(benchmark.compare(results, results))
+
+    def test_skip_asyncio_without_httpx(self):
+        with mock.patch.dict(sys.modules, {"httpx": None}):
+            results = benchmark.run(requests=5, concurrency=1, modes=["asyncio"])
+        self.assertIn("httpx", results["modes"]["asyncio"]["skipped"])
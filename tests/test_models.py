@@ -0,0 +1,56 @@
+import json
+import unittest
+
+from criminalip import BannerSearch, IPReport, IPSummary
+
+REPORT = {
+    "ip": "1.1.1.1",
+    "score": {"inbound": "Safe", "outbound": "Low"},
+    "issues": {"is_vpn": False, "is_scanner": True},
+    "whois": {"count": 1, "data": [{"as_name": "CLOUDFLARENET", "as_no": 13335}]},
+    "port": {
+        "count": 2,
+        "data": [
+            {"open_port_no": 53, "protocol": "udp"},
+            {"open_port_no": 443, "protocol": "tcp"},
+        ],
+    },
+    "vulnerability": {"count": 0, "data": []},
+}
+
+
+class TestModels(unittest.TestCase):
+    def test_ip_report(self):
+        report = IPReport.map_model(REPORT)
+        self.assertEqual(report.ip, "1.1.1.1")
+        self.assertEqual(report.score_inbound, "Safe")
+        self.assertTrue(report.is_scanner)
+        self.assertIsNone(report._cache)
+        self.assertEqual([port.port for port in report.ports], [53, 443])
+        self.assertIs(report.ports, report.ports)
+        self.assertEqual(report.whois[0].as_no, 13335)
+        self.assertEqual(report.vulnerabilities, ())
+
+    def test_models_are_dicts(self):
+        summary = IPSummary.map_model({"ip": "1.1.1.1", "country": "AU"})
+        self.assertIsInstance(summary, dict)
+        self.assertEqual(summary.get("ip"), "1.1.1.1")
+        self.assertEqual(summary, {"ip": "1.1.1.1", "country": "AU"})
+        self.assertEqual(json.loads(json.dumps(summary)), summary)
+        self.assertIsNone(summary.score_inbound)
+        with self.assertRaises(AttributeError):
+            summary.extra = 1
+
+    def test_missing_defaults_are_not_shared(self):
+        first, second = IPReport.map_model({}), IPReport.map_model({})
+        first.issues["is_vpn"] = True
+        self.assertEqual(second.issues, {})
+        self.assertIsNot(first.issues, second.issues)
+
+    def test_banner_search(self):
+        banners = BannerSearch.map_model(
+            {"data": {"count": 1, "result": [{"ip_address": "1.1.1.1"}]}}
+        )
+        self.assertEqual(banners.count, 1)
+        self.assertEqual(banners.banners[0].ip, "1.1.1.1")
+        self.assertEqual(BannerSearch.map_model({}).banners, ())
@@ -0,0 +1,60 @@
+import email.parser
+import io
+import mmap
+import tempfile
+import unittest
+
+from criminalip.multipart import MultipartEncoder
+
+
+def parse(encoder, body):
+    message = email.parser.BytesParser().parsebytes(
+        b"Content-Type: " + encoder.content_type.encode() + b"\r\n\r\n" + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part
+        for part in message.get_payload()
+    }
+
+
+class TestMultipartEncoder(unittest.TestCase):
+    def test_streams_files_in_chunks(self):
+        with tempfile.TemporaryFile() as fp:
+            fp.write(b"x" * 10000)
+            fp.seek(0)
+            encoder = MultipartEncoder(
+                {"file": ("scan.txt", fp), "query": "1.1.1.1"}, chunk_size=1024
+            )
+            chunks = list(encoder)
+        self.assertTrue(all(len(chunk) <= 1024 for chunk in chunks))
+        body = b"".join(chunks)
+        self.assertEqual(len(body), len(encoder))
+        parts = parse(encoder, body)
+        self.assertEqual(parts["file"].get_filename(), "scan.txt")
+        self.assertEqual(parts["file"].get_content_type(), "text/plain")
+        self.assertEqual(parts["file"].get_payload(decode=True), b"x" * 10000)
+        self.assertEqual(parts["query"].get_payload(), "1.1.1.1")
+
+    def test_read_and_reset(self):
+        fp = io.BytesIO(b"header" + b"data" * 100)
+        fp.seek(6)
+        encoder = MultipartEncoder({"file": ("data.bin", fp)})
+        body = b""
+        while chunk := encoder.read(100):
+            body += chunk
+        self.assertEqual(len(body), len(encoder))
+        encoder.reset()
+        self.assertEqual(encoder.read(), body)
+        parts = parse(encoder, body)
+        self.assertEqual(parts["file"].get_payload(decode=True), b"data" * 100)
+
+    def test_memory_mapped_file(self):
+        with tempfile.TemporaryFile() as fp:
+            fp.write(b"mapped" * 1000)
+            fp.flush()
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                encoder = MultipartEncoder({"file": ("mapped.bin", mapped)})
+                body = encoder.read()
+        self.assertEqual(len(body), len(encoder))
+        parts = parse(encoder, body)
+        self.assertEqual(parts["file"].get_payload(decode=True), b"mapped" * 1000)
@@ -0,0 +1,51 @@
+import asyncio
+import unittest
+
+from criminalip import AsyncCriminalIP, CriminalIP
+
+BANNERS = [{"ip": f"10.0.0.{n}", "as_name": "AS"} for n in range(25)]
+
+
+class FakeCriminalIP(CriminalIP):
+    def banner_search(self, query, offset=0):
+        self.offsets.append(offset)
+        page = BANNERS[offset : offset + 10]
+        return {"status": 200, "data": {"count": len(BANNERS), "result": page}}
+
+    def search_exploit(self, query, offset=0):
+        self.offsets.append(offset)
+        return {"data": {"result": BANNERS[offset : offset + 10]}}
+
+
+class FakeAsyncCriminalIP(AsyncCriminalIP, FakeCriminalIP):
+    async def banner_search(self, query, offset=0):
+        return FakeCriminalIP.banner_search(self, query, offset)
+
+
+class TestPaginator(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeCriminalIP("https://api.criminalip.io", "key")
+        self.client.offsets = []
+
+    def test_stops_at_count(self):
+        banners = list(self.client.iter_banner_search("ssh", prefetch=True))
+        self.assertEqual(banners, BANNERS)
+        self.assertEqual(self.client.offsets, [0, 10, 20])
+
+    def test_stops_at_empty_page(self):
+        self.assertEqual(len(list(self.client.iter_search_exploit("cve"))), 25)
+        self.assertEqual(self.client.offsets, [0, 10, 20, 25])
+
+    def test_max_results(self):
+        banners = list(self.client.iter_banner_search("ssh", max_results=12))
+        self.assertEqual(banners, BANNERS[:12])
+        self.assertEqual(self.client.offsets, [0, 10])
+
+    def test_async(self):
+        client = FakeAsyncCriminalIP("https://api.criminalip.io", "key")
+        client.offsets = []
+
+        async def run():
+            return [b async for b in client.iter_banner_search("ssh", prefetch=True)]
+
+        self.assertEqual(asyncio.run(run()), BANNERS)
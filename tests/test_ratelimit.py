@@ -0,0 +1,51 @@
+import time
+import unittest
+from unittest import mock
+
+from criminalip import CriminalIP, RateLimiter, TokenBucket
+from criminalip.exceptions import CIPLimitExcceed
+from criminalip.ratelimit import parse_retry_after
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_bucket_spaces_out_bursts(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.01, places=2)
+        bucket.pause(1)
+        self.assertGreater(bucket.reserve(), 0.9)
+
+    def test_pause_keeps_the_spacing(self):
+        bucket = TokenBucket(rate=10)
+        bucket.pause(5)
+        waits = [bucket.reserve() for _ in range(5)]
+        self.assertAlmostEqual(waits[0], 5.0, places=1)
+        for before, after in zip(waits, waits[1:]):
+            self.assertAlmostEqual(after - before, 0.1, places=3)
+        # A shorter pause doesn't release the callers already queued
+        bucket.pause(1)
+        self.assertAlmostEqual(bucket.reserve() - waits[-1], 0.1, places=2)
+
+    def test_groups(self):
+        self.assertEqual(RateLimiter.get_group("v1/feature/ip/malicious-info"), "ip")
+        self.assertEqual(RateLimiter.get_group("v1/domain/lite/scan"), "domain")
+        self.assertEqual(RateLimiter.get_group("v1/user/me"), "default")
+        limiter = RateLimiter({"domain": 1})
+        self.assertIsNone(limiter.bucket("ip"))
+        self.assertIsInstance(limiter.bucket("domain"), TokenBucket)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after(None))
+        date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 60))
+        self.assertGreater(parse_retry_after(date), 50)
+
+    def test_429_raises_limit_exceeded(self):
+        response = mock.Mock(status_code=429, text="", headers={"Retry-After": "5"})
+        limiter = RateLimiter(default_rate=10)
+        client = CriminalIP("https://api.criminalip.io", "key", rate_limiter=limiter)
+        with mock.patch.object(client.session, "request", return_value=response):
+            with self.assertRaises(CIPLimitExcceed) as ctx:
+                client.ip_summary("1.1.1.1")
+        self.assertEqual(ctx.exception.retry_after, 5.0)
+        self.assertGreater(limiter.bucket("ip").reserve(), 4)
@@ -0,0 +1,72 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import requests
+
+from criminalip import CriminalIP, RetryBudget, RetryPolicy
+from criminalip.exceptions import CIPRequestError
+
+
+def response(status_code, body=b'{"ip": "1.1.1.1"}'):
+    return mock.Mock(
+        status_code=status_code, text=body.decode(), content=body, headers={}
+    )
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(total=2, backoff_factor=0)
+        self.client = CriminalIP("https://api.criminalip.io", "key", retry=self.policy)
+
+    def test_transient_failures_are_retried(self):
+        responses = [requests.ConnectionError(), response(502), response(200)]
+        with mock.patch.object(self.client.session, "request", side_effect=responses):
+            self.assertEqual(self.client.ip_summary("1.1.1.1"), {"ip": "1.1.1.1"})
+        self.assertEqual(self.policy.stats()["retries"], {"ip_summary": 2})
+
+    def test_gives_up_after_total(self):
+        with mock.patch.object(
+            self.client.session, "request", return_value=response(503)
+        ) as request:
+            with self.assertRaises(CIPRequestError):
+                self.client.ip_summary("1.1.1.1")
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(self.policy.stats()["exhausted"], {"ip_summary": 1})
+
+    def test_post_and_client_errors_are_not_retried(self):
+        with mock.patch.object(
+            self.client.session, "request", return_value=response(503)
+        ) as request:
+            with self.assertRaises(CIPRequestError):
+                self.client.domain_private_scan("example.com")
+        self.assertEqual(request.call_count, 1)
+        with mock.patch.object(
+            self.client.session, "request", return_value=response(404)
+        ) as request:
+            with self.assertRaises(CIPRequestError):
+                self.client.ip_summary("1.1.1.1")
+        self.assertEqual(request.call_count, 1)
+
+    def test_budget(self):
+        budget = RetryBudget(rate=0, capacity=1)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+    def test_budget_shared_by_threads(self):
+        policy = RetryPolicy(total=5, budget=RetryBudget(rate=0, capacity=50))
+        route = type(self.client).ip_summary.route
+        error = CIPRequestError("Service Unavailable", 503)
+        with ThreadPoolExecutor(16) as executor:
+            delays = list(
+                executor.map(lambda n: policy.get_delay(route, 0, error), range(400))
+            )
+        self.assertEqual(sum(delay is not None for delay in delays), 50)
+        self.assertEqual(
+            policy.stats(),
+            {"retries": {"ip_summary": 50}, "exhausted": {"ip_summary": 350}},
+        )
+
+    def test_backoff_is_capped(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=4, jitter=False)
+        self.assertEqual([policy.backoff(n) for n in range(4)], [1, 2, 4, 4])
@@ -0,0 +1,71 @@
+import asyncio
+import collections
+import unittest
+
+from criminalip import AsyncCriminalIP, CriminalIP
+
+
+class FakeCriminalIP(CriminalIP):
+    steps = {"fast.com": 1, "slow.com": 3}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.polls = collections.Counter()
+
+    def domain_scan(self, query):
+        if query == "bad.com":
+            raise Exception("Failed to run command")
+        return {"status": 200, "data": {"scan_id": query}}
+
+    def domain_scan_status(self, scan_id):
+        self.polls[scan_id] += 1
+        percentage = min(100, 100 * self.polls[scan_id] // self.steps[scan_id])
+        return {"status": 200, "data": {"scan_percentage": percentage}}
+
+    def domain_report(self, scan_id):
+        return {"data": {"certificates": [], "scan_id": scan_id}}
+
+
+class FakeAsyncCriminalIP(AsyncCriminalIP, FakeCriminalIP):
+    async def domain_scan(self, query):
+        return FakeCriminalIP.domain_scan(self, query)
+
+    async def domain_scan_status(self, scan_id):
+        return FakeCriminalIP.domain_scan_status(self, scan_id)
+
+    async def domain_report(self, scan_id):
+        return FakeCriminalIP.domain_report(self, scan_id)
+
+
+OPTIONS = dict(interval=0.01, max_interval=0.05)
+
+
+class TestDomainScanner(unittest.TestCase):
+    def test_scan_domains(self):
+        client = FakeCriminalIP("https://api.criminalip.io", "key")
+        results = list(
+            client.scan_domains(["slow.com", "fast.com", "bad.com"], **OPTIONS)
+        )
+        self.assertEqual(
+            [r.query for r in results], ["bad.com", "fast.com", "slow.com"]
+        )
+        self.assertFalse(results[0].ok)
+        self.assertEqual(results[2].report["data"]["scan_id"], "slow.com")
+        self.assertEqual(client.polls, {"fast.com": 1, "slow.com": 3})
+
+    def test_timeout(self):
+        client = FakeCriminalIP("https://api.criminalip.io", "key")
+        client.steps = {"slow.com": 1000}
+        (result,) = client.scan_domains(["slow.com"], timeout=0, **OPTIONS)
+        self.assertIn("timed out", str(result.error))
+
+    def test_async_scan_domains(self):
+        client = FakeAsyncCriminalIP("https://api.criminalip.io", "key")
+
+        async def run():
+            return [
+                r.query
+                async for r in client.scan_domains(["slow.com", "fast.com"], **OPTIONS)
+            ]
+
+        self.assertEqual(asyncio.run(run()), ["fast.com", "slow.com"])
@@ -0,0 +1,128 @@
+import asyncio
+import contextvars
+import threading
+import time
+import unittest
+
+from criminalip import CriminalIP, PriorityClass, Scheduler, priority
+from criminalip.exceptions import CIPDeadlineExceeded
+from criminalip.mock_server import MockServer
+
+
+def wait_queued(scheduler, name, count):
+    while len(scheduler.queues[name]) < count:
+        time.sleep(0.001)
+
+
+class TestScheduler(unittest.TestCase):
+    def test_interactive_jumps_the_queue(self):
+        scheduler = Scheduler(concurrency=1)
+        held = scheduler.acquire()
+        order = []
+
+        def run(name):
+            with priority(name):
+                ticket = scheduler.acquire()
+            order.append(name)
+            scheduler.release(ticket)
+
+        threads = []
+        for name, queued in (("batch", 1), ("batch", 2), ("interactive", 1)):
+            threads.append(threading.Thread(target=run, args=(name,)))
+            threads[-1].start()
+            wait_queued(scheduler, name, queued)
+        scheduler.release(held)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ["interactive", "batch", "batch"])
+
+    def test_class_concurrency(self):
+        scheduler = Scheduler(
+            concurrency=3,
+            classes=[PriorityClass("interactive", 0), PriorityClass("batch", 1, 1)],
+        )
+        with priority("batch"):
+            first = scheduler.acquire()
+            context = contextvars.copy_context()
+            thread = threading.Thread(target=context.run, args=(scheduler.acquire,))
+            thread.start()
+        wait_queued(scheduler, "batch", 1)
+        scheduler.acquire()
+        self.assertEqual(scheduler.stats()["batch"]["queued"], 1)
+        scheduler.release(first)
+        thread.join()
+        self.assertEqual(scheduler.stats()["batch"]["in_flight"], 1)
+
+    def test_deadline(self):
+        scheduler = Scheduler(concurrency=1)
+        scheduler.acquire()
+        with priority("batch", deadline=0.01):
+            with self.assertRaises(CIPDeadlineExceeded):
+                scheduler.acquire()
+        self.assertEqual(scheduler.stats()["batch"]["expired"], 1)
+        self.assertEqual(scheduler.stats()["batch"]["queued"], 0)
+
+    def test_async(self):
+        scheduler = Scheduler(concurrency=1)
+        order = []
+
+        async def run(name):
+            with priority(name):
+                ticket = await scheduler.acquire_async()
+            order.append(name)
+            await asyncio.sleep(0)
+            scheduler.release(ticket)
+
+        async def main():
+            held = await scheduler.acquire_async()
+            tasks = [asyncio.ensure_future(run("batch"))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(run("interactive")))
+            await asyncio.sleep(0)
+            cancelled = asyncio.ensure_future(run("batch"))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            scheduler.release(held)
+            await asyncio.gather(*tasks)
+            with priority("batch", deadline=0.01):
+                held = await scheduler.acquire_async()
+                with self.assertRaises(CIPDeadlineExceeded):
+                    await scheduler.acquire_async()
+
+        asyncio.run(main())
+        self.assertEqual(order, ["interactive", "batch"])
+        self.assertEqual(scheduler.stats()["batch"]["queued"], 0)
+
+    def test_custom_classes(self):
+        classes = [PriorityClass("high", 0), PriorityClass("low", 1)]
+        for batch, expected in (("low", "low"), ("batch", "high")):
+            scheduler = Scheduler(4, classes, default="high", batch=batch)
+            self.assertEqual(scheduler.batch, expected)
+            with MockServer() as server:
+                client = CriminalIP(server.url, "key", scheduler=scheduler)
+                ips = [f"10.0.0.{n}" for n in range(5)]
+                results = list(client.bulk_ip_lookup(ips, ["ip_summary"], 2))
+                client.close()
+            self.assertTrue(all(result.ok for result in results))
+            self.assertEqual(scheduler.stats()[expected]["granted"], 5)
+
+    def test_client(self):
+        scheduler = Scheduler(concurrency=4)
+        with MockServer(latency=0.02) as server:
+            client = CriminalIP(server.url, "key", scheduler=scheduler)
+            ips = [f"10.0.0.{n}" for n in range(60)]
+            bulk = threading.Thread(
+                target=lambda: list(client.bulk_ip_lookup(ips, ["ip_summary"], 16))
+            )
+            bulk.start()
+            wait_queued(scheduler, "batch", 1)
+            started = time.monotonic()
+            client.ip_summary("1.1.1.1")
+            elapsed = time.monotonic() - started
+            bulk.join()
+            client.close()
+        stats = scheduler.stats()
+        self.assertEqual(stats["interactive"]["granted"], 1)
+        self.assertEqual(stats["batch"]["granted"], 60)
+        # The batch takes about 60 * 0.02 / 2 s, the interactive call one latency
+        self.assertLess(elapsed, 0.2)
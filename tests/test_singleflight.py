@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from criminalip import CriminalIP
+from criminalip.mock_server import MockServer
+from criminalip.singleflight import SingleFlight
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_threads_share_the_call(self):
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def slow():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return {"ip": "1.1.1.1"}
+
+        with ThreadPoolExecutor(4) as executor:
+            leader = executor.submit(flight.do, "key", slow)
+            started.wait()
+            followers = [executor.submit(flight.do, "key", slow) for _ in range(3)]
+            results = [leader.result()] + [f.result() for f in followers]
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight.shared, 3)
+        self.assertEqual(flight.calls, {})
+
+    def test_errors_are_shared(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("failed")
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.ado("key", fail) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(flight.shared, 2)
+
+    def test_leader_cancelled(self):
+        flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return {"ip": "1.1.1.1"}
+
+        async def run():
+            leader = asyncio.ensure_future(flight.ado("key", slow))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.ado("key", slow))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            result = await follower
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return result
+
+        self.assertEqual(asyncio.run(run()), {"ip": "1.1.1.1"})
+        self.assertEqual(flight.shared, 1)
+        self.assertEqual(flight.tasks, {})
+
+    def test_client_coalesces_requests(self):
+        with MockServer(latency=0.1) as server:
+            client = CriminalIP(server.url, "api_key", coalesce=True)
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(client.ip_malicious_info, ["1.1.1.1"] * 8))
+            self.assertEqual(server.requests, 1)
+        self.assertEqual({result.ip for result in results}, {"1.1.1.1"})
+
+    @unittest.skipUnless(httpx, "httpx is not installed")
+    def test_async_client_coalesces_requests(self):
+        from criminalip import AsyncCriminalIP
+
+        async def run():
+            async with AsyncCriminalIP(server.url, "api_key", coalesce=True) as client:
+                return await asyncio.gather(
+                    *(client.ip_summary("1.1.1.1") for _ in range(8))
+                )
+
+        with MockServer(latency=0.05) as server:
+            asyncio.run(run())
+            self.assertEqual(server.requests, 1)
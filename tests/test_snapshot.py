@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import unittest
+
+from criminalip import CriminalIP, Snapshot
+from criminalip.cache import MISS
+from criminalip.mock_server import MockServer
+
+
+def summary(ip, score="Safe", asn=64500):
+    return {"ip": ip, "score": {"inbound": score}, "as_no": asn}
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot = Snapshot(os.path.join(self.tmp.name, "snapshot.db"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_staleness(self):
+        self.snapshot.put("ip_summary", "1.1.1.1", summary("1.1.1.1"))
+        self.snapshot.put(
+            "ip_summary", "2.2.2.2", summary("2.2.2.2"), updated=time.time() - 60
+        )
+        self.assertEqual(self.snapshot.get("ip_summary", "1.1.1.1")["ip"], "1.1.1.1")
+        self.assertIs(self.snapshot.get("ip_report", "1.1.1.1"), MISS)
+        self.assertIs(self.snapshot.get("ip_summary", "2.2.2.2", max_age=30), MISS)
+        self.snapshot.purge(max_age=30)
+        self.assertEqual(len(self.snapshot), 1)
+
+    def test_query_by_network_asn_and_score(self):
+        self.snapshot.put_many(
+            "ip_summary",
+            [
+                ("10.1.0.1", summary("10.1.0.1", "Critical")),
+                ("10.1.255.9", summary("10.1.255.9", "Dangerous", asn=64501)),
+                ("10.1.3.3", summary("10.1.3.3", "Low")),
+                ("10.2.0.1", summary("10.2.0.1", "Critical")),
+                ("2001:db8::1", summary("2001:db8::1", "Critical")),
+            ],
+        )
+        self.snapshot.put(
+            "ip_report",
+            "10.1.0.2",
+            {"score": {"inbound": "Moderate"}, "whois": {"data": [{"as_no": 64501}]}},
+        )
+        dangerous = self.snapshot.query("10.1.0.0/16", min_score="dangerous")
+        self.assertEqual([ip for ip, _, _ in dangerous], ["10.1.0.1", "10.1.255.9"])
+        by_asn = self.snapshot.query(asn=64501)
+        self.assertEqual(
+            [(ip, route) for ip, route, _ in by_asn],
+            [("10.1.0.2", "ip_report"), ("10.1.255.9", "ip_summary")],
+        )
+        self.assertEqual(
+            [ip for ip, _, _ in self.snapshot.query("2001:db8::/32")], ["2001:db8::1"]
+        )
+
+    def test_client_answers_from_snapshot(self):
+        with MockServer() as server:
+            client = CriminalIP(server.url, "key", snapshot=self.snapshot)
+            client.ip_summary("1.1.1.1")
+            client.ip_summary("1.1.1.1")
+            client.ip_report("1.1.1.1", full=True)
+            client.ip_report("1.1.1.1")
+            client.ip_report("1.1.1.1", full=True)
+            self.assertEqual(server.requests, 3)
+            self.snapshot.max_ages["ip_summary"] = 0
+            client.ip_summary("1.1.1.1")
+            self.assertEqual(server.requests, 4)
+            client.close()
+        self.assertEqual(
+            sorted(route for _, route, _ in self.snapshot.query("1.1.1.1/32")),
+            ["ip_report", "ip_report:full=True", "ip_summary"],
+        )
+
+    def test_invalid_ip_goes_to_the_api(self):
+        with MockServer() as server:
+            client = CriminalIP(server.url, "key", snapshot=self.snapshot)
+            self.assertEqual(client.ip_summary("not-an-ip")["ip"], "not-an-ip")
+            self.assertEqual(server.requests, 1)
+            client.close()
+        self.assertEqual(len(self.snapshot), 0)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import unittest
+
+from criminalip import CriminalIP
+from criminalip.exceptions import ApiClientException, CIPLimitExcceed
+from criminalip.mock_server import MockServer
+from criminalip.streaming import ItemParser, iter_items
+
+DOCUMENT = {
+    "status": 200,
+    "data": {
+        "count": 7,
+        "skipped": [1, {"text": 'quoted "]}[{" text'}, [2, 3]],
+        "result": [
+            {"ip": "1.1.1.1", "banner": 'escaped \\" ] and \\\\'},
+            [1, [2, {"three": 3}]],
+            "string",
+            -12.5e3,
+            True,
+            None,
+            {"result": [9]},
+        ],
+        "tail": "done",
+    },
+}
+
+
+class TestItemParser(unittest.TestCase):
+    def test_chunk_boundaries(self):
+        raw = json.dumps(DOCUMENT).encode()
+        for size in (1, 2, 3, 7, 64, len(raw)):
+            with self.subTest(size=size):
+                chunks = [raw[i : i + size] for i in range(0, len(raw), size)]
+                items = list(iter_items(chunks, "data.result"))
+                self.assertEqual(items, DOCUMENT["data"]["result"])
+
+    def test_prefix(self):
+        raw = json.dumps(DOCUMENT).encode()
+        self.assertEqual(
+            list(iter_items([raw], "data.skipped")), DOCUMENT["data"]["skipped"]
+        )
+        self.assertEqual(list(iter_items([b" [1, 2 ,3] "], "")), [1, 2, 3])
+        self.assertEqual(list(iter_items([raw], "data.missing")), [])
+
+    def test_buffer_is_released(self):
+        parser = ItemParser("data")
+        parser.feed(b'{"data": [')
+        for n in range(1000):
+            self.assertEqual(parser.feed(b'{"n": %d},' % n), [{"n": n}])
+            self.assertLess(len(parser.buffer), 16)
+
+
+class TestStream(unittest.TestCase):
+    def test_stream_routes(self):
+        with MockServer(payload_size=50) as server:
+            with CriminalIP(server.url, "key") as client:
+                banners = list(client.stream("banner_search", "ssh", chunk_size=256))
+                ports = list(
+                    client.stream("ip_report", "1.1.1.1", full=True, prefix="port.data")
+                )
+                expected = client.banner_search("ssh").raw["data"]["result"]
+                with self.assertRaises(ApiClientException):
+                    client.stream("ip_summary", "1.1.1.1")
+        self.assertEqual(banners, expected)
+        self.assertEqual(len(ports), 50)
+
+    def test_stream_errors(self):
+        with MockServer(limited_keys=["limited"]) as server:
+            with CriminalIP(server.url, "limited") as client:
+                with self.assertRaises(CIPLimitExcceed):
+                    list(client.stream("banner_search", "ssh"))
+
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+@unittest.skipUnless(httpx, "httpx is not installed")
+class TestAsyncStream(unittest.TestCase):
+    def test_stream_routes(self):
+        from criminalip import AsyncCriminalIP
+
+        async def run(url):
+            async with AsyncCriminalIP(url, "key") as client:
+                return [
+                    item
+                    async for item in client.stream(
+                        "search_exploit", "cve", chunk_size=128
+                    )
+                ]
+
+        with MockServer(payload_size=20) as server:
+            exploits = asyncio.run(run(server.url))
+        self.assertEqual(len(exploits), 20)
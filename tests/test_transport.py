@@ -0,0 +1,89 @@
+import asyncio
+import importlib.util
+import unittest
+
+from criminalip import AsyncCriminalIP, CriminalIP
+from criminalip.mock_server import MockServer
+from criminalip.exceptions import ApiClientException
+
+
+class TestTransport(unittest.TestCase):
+    def test_accept_encoding(self):
+        client = CriminalIP("https://api.criminalip.io", "key")
+        # Left to the session, which accepts what urllib3 decodes
+        self.assertNotIn("Accept-Encoding", client.headers)
+        self.assertIn("gzip", client.session.headers["Accept-Encoding"])
+
+        client = CriminalIP("https://api.criminalip.io", "key", compression=False)
+        self.assertEqual(client.headers["Accept-Encoding"], "identity")
+
+        client = CriminalIP(
+            "https://api.criminalip.io", "key", headers={"accept-encoding": "br"}
+        )
+        self.assertEqual(client.headers["accept-encoding"], "br")
+        self.assertNotIn("Accept-Encoding", client.headers)
+
+    def test_disabled_by_default(self):
+        client = CriminalIP("https://api.criminalip.io", "key")
+        self.assertIsNone(client.transport_stats)
+        self.assertIsNone(client.get_extensions())
+        with self.assertRaises(ApiClientException):
+            client.get_transport_stats()
+
+    def test_compressed_responses(self):
+        with MockServer(payload_size=200, compression=True) as server:
+            client = CriminalIP(server.url, "key", transport_stats=True)
+            for n in range(3):
+                result = client.ip_malicious_info(f"10.0.0.{n}")
+                self.assertEqual(result["current_opened_port"]["count"], 200)
+            stats = client.get_transport_stats()
+        self.assertEqual(stats["responses"], 3)
+        self.assertEqual(stats["encodings"], {"gzip": 3})
+        self.assertLess(stats["bytes_on_wire"], stats["bytes_decoded"] / 2)
+        self.assertLess(stats["compression_ratio"], 0.5)
+        # Kept alive over the requests
+        self.assertEqual(stats["connections"], 1)
+        self.assertEqual(server.connections, 1)
+
+    def test_identity_responses(self):
+        with MockServer(payload_size=200, compression=True) as server:
+            client = CriminalIP(
+                server.url, "key", compression=False, transport_stats=True
+            )
+            client.ip_malicious_info("10.0.0.1")
+            stats = client.get_transport_stats()
+        self.assertEqual(stats["encodings"], {"identity": 1})
+        self.assertEqual(stats["bytes_on_wire"], stats["bytes_decoded"])
+
+    @unittest.skipUnless(importlib.util.find_spec("h2"), "h2 is not installed")
+    def test_http2_client(self):
+        with MockServer(payload_size=50, compression=True) as server:
+            client = CriminalIP(server.url, "key", http2=True, transport_stats=True)
+            self.assertEqual(client.ip_summary("1.1.1.1")["ip"], "1.1.1.1")
+            items = list(client.stream("banner_search", "ssh", 0))
+            self.assertEqual(len(items), 50)
+            stats = client.get_transport_stats()
+            client.session.close()
+        self.assertEqual(stats["connections"], 1)
+        self.assertEqual(stats["encodings"], {"gzip": 1})
+        self.assertLess(stats["bytes_on_wire"], stats["bytes_decoded"])
+
+    @unittest.skipUnless(importlib.util.find_spec("httpx"), "httpx is not installed")
+    def test_async_client(self):
+        async def run(url):
+            async with AsyncCriminalIP(url, "key", transport_stats=True) as client:
+                await asyncio.gather(
+                    *(client.ip_malicious_info(f"10.0.0.{n}") for n in range(4))
+                )
+                return client.get_transport_stats()
+
+        with MockServer(payload_size=200, compression=True) as server:
+            stats = asyncio.run(run(server.url))
+        self.assertEqual(stats["responses"], 4)
+        self.assertEqual(stats["encodings"], {"gzip": 4})
+        self.assertLess(stats["bytes_on_wire"], stats["bytes_decoded"] / 2)
+        self.assertEqual(stats["connections"], server.connections)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from criminalip import CriminalIP, Watchlist
+from criminalip.mock_server import Fixtures, MockServer
+from criminalip.watchlist import diff, flatten
+
+
+class TestDiff(unittest.TestCase):
+    def test_flatten(self):
+        fields = flatten(
+            {"status": 200, "data": {"is_malicious": False, "ports": [22], "tags": {}}}
+        )
+        self.assertEqual(
+            fields, {"data.is_malicious": False, "data.ports": [22], "data.tags": {}}
+        )
+
+    def test_diff(self):
+        old = {"a": 1, "b": [1], "c": None}
+        new = {"a": 1, "b": [1, 2], "d": True}
+        self.assertEqual(
+            sorted(diff(old, new), key=str),
+            [
+                ("b", [1], [1, 2], False, False),
+                ("c", None, None, False, True),
+                ("d", None, True, True, False),
+            ],
+        )
+
+
+class TestWatchlist(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "watchlist.db")
+        self.server = MockServer(payload_size=1)
+        self.server.start()
+        self.client = CriminalIP(self.server.url, "key")
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def set_response(self, name, body):
+        self.server.responses[name] = json.dumps(body).encode()
+
+    def test_changes(self):
+        watchlist = Watchlist(self.client, self.path, min_interval=0, max_interval=0)
+        watchlist.add(["1.1.1.1", "example.com", "1.1.1.1"])
+        self.assertEqual(len(watchlist), 2)
+        self.assertEqual(list(watchlist.refresh()), [])
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(list(watchlist.refresh()), [])
+
+        info = Fixtures(payload_size=1).ip_malicious_info({"ip": "1.1.1.1"}, {})
+        self.set_response("ip_malicious_info", {**info, "is_malicious": True})
+        self.set_response(
+            "check_domain_trusted",
+            {"status": 200, "data": {"domain": "example.com", "is_trusted": False}},
+        )
+        changes = sorted(watchlist.refresh(), key=lambda change: change.entity)
+        self.assertEqual(
+            [(c.entity, c.endpoint, c.field, c.old, c.new) for c in changes],
+            [
+                ("1.1.1.1", "ip_malicious_info", "is_malicious", False, True),
+                ("example.com", "check_domain_trusted", "data.is_trusted", True, False),
+            ],
+        )
+        watchlist.remove(["example.com"])
+        self.assertEqual(watchlist.due(), [("1.1.1.1", "ip")])
+
+    def test_schedule_by_risk(self):
+        watchlist = Watchlist(self.client, self.path, min_interval=60, max_interval=600)
+        self.set_response(
+            "check_domain_malicious",
+            {"status": 200, "data": {"domain": "bad.example", "is_malicious": True}},
+        )
+        watchlist.add(["bad.example", "1.1.1.1"])
+        list(watchlist.refresh(limit=1))
+        self.assertEqual(watchlist.due(), [("1.1.1.1", "ip")])
+        list(watchlist.refresh())
+        self.assertEqual(watchlist.due(), [])
+        now = time.time()
+        self.assertEqual(watchlist.due(now=now + 61), [("bad.example", "domain")])
+        # ip_malicious_info of the mock has can_remote_access, a risk of 0.5
+        self.assertEqual(len(watchlist.due(now=now + 331)), 2)
+        self.assertEqual(watchlist.stats()["risky"], 2)